@@ -2,6 +2,8 @@ from fastapi import APIRouter
 
 from app.api.v1.endpoints import documents
 from app.api.v1.endpoints import tickets
+from app.api.v1.endpoints import jobs
+from app.api.v1.endpoints import sessions
 
 api_v1_router = APIRouter()
 
@@ -16,3 +18,15 @@ api_v1_router.include_router(
     prefix="/tickets",
     tags=["Tickets"]
 )
+
+api_v1_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+api_v1_router.include_router(
+    sessions.router,
+    prefix="/sessions",
+    tags=["Sessions"]
+)
@@ -0,0 +1,121 @@
+# ai-service/app/api/v1/common.py
+"""
+Helpers shared by the v1 endpoint modules (tickets, jobs, sessions): document
+text extraction with its HTTP error mapping, context selection, LLM error
+status mapping and job/session ownership.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from minio import Minio
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas import ContextModeEnum, TicketGenerateRequest
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.pdf_extractor import (
+    pdf_extractor_service, # Shared with the upload endpoint so eager extraction jobs are visible here
+    DocumentNotFoundError,
+    DocumentTooLargeError,
+    PDFParsingError,
+    ServiceError as ExtractorServiceError
+)
+from app.services.text_compactor import compact_document_text, compacted_text_cache
+from app.services.relevance_retriever import retrieve_context
+
+logger = logging.getLogger(__name__)
+
+
+def owner_of(claims: dict) -> str:
+    """The owner recorded on jobs and sessions: the JWT subject, else its email."""
+    return str(claims.get('sub', claims.get('email', 'Unknown User')))
+
+
+def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    """Converts an epoch timestamp to an aware UTC datetime; None stays None."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+
+async def extract_document_text(
+    document_id: UUID,
+    minio_client: Minio,
+    user_identifier: str,
+    on_fetched: Optional[Callable[[dict], Awaitable[None]]] = None
+) -> str:
+    """
+    Extracts a document's text, mapping extractor failures to HTTP errors, and
+    compacts it for the LLM (see `text_compactor`). Compacted texts are cached
+    per document, so each document is compacted once.
+    """
+    try:
+        logger.info(f"Attempting text extraction for document: {document_id} by user '{user_identifier}'")
+        extracted_text = await pdf_extractor_service.extract_text_from_document(
+            document_id=document_id,
+            minio_client=minio_client,
+            on_fetched=on_fetched
+        )
+        if not extracted_text:
+            logger.warning(f"Extraction yielded empty text for document: {document_id}. Processing will proceed but may be limited.")
+        logger.info(f"Successfully extracted text (length: {len(extracted_text)}) for document: {document_id} by user '{user_identifier}'")
+
+    except DocumentNotFoundError as e:
+        logger.error(f"Document not found error for ID {document_id} requested by user '{user_identifier}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID '{document_id}' not found in storage."
+        )
+    except DocumentTooLargeError as e:
+        logger.warning(f"Document {document_id} requested by user '{user_identifier}' exceeds processing limits: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except PDFParsingError as e:
+        logger.error(f"PDF parsing error for document {document_id} requested by user '{user_identifier}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Failed to parse the PDF content for document '{document_id}'. It might be corrupted or invalid."
+        )
+    except ExtractorServiceError as e:
+        logger.exception(f"Storage or other service error during text extraction for {document_id} requested by user '{user_identifier}'.")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to retrieve or process document '{document_id}' due to a storage service issue: {e}"
+        )
+    except HTTPException as http_exc: # Re-raise HTTPExceptions from dependencies (like MinIO client init fail)
+        raise http_exc
+    except Exception as e:
+         logger.exception(f"Unexpected error during text extraction phase for {document_id} requested by user '{user_identifier}'.")
+         raise HTTPException(
+             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+             detail="An unexpected error occurred during text extraction."
+         )
+
+    if not settings.TEXT_COMPACTION_ENABLED:
+        return extracted_text
+    compacted_text = compacted_text_cache.get(document_id)
+    if compacted_text is None:
+        with stage_timer("text_compaction"):
+            compacted_text = await run_in_threadpool(compact_document_text, document_id, extracted_text)
+        compacted_text_cache.put(document_id, compacted_text)
+    return compacted_text
+
+
+async def select_context(document_id: UUID, extracted_text: str, request_data: TicketGenerateRequest) -> str:
+    """The text to send to the LLM: the whole document, or in retrieval mode the chunks relevant to the prompt."""
+    if request_data.context_mode != ContextModeEnum.RETRIEVAL:
+        return extracted_text
+    with stage_timer("retrieval"):
+        result = await run_in_threadpool(retrieve_context, document_id, extracted_text, request_data.system_prompt)
+    return result.text
+
+
+def llm_error_status_code(error_message: Optional[str]) -> int:
+    """Maps an AIProcessingResponse error to 503 for LLM outages and 422 for unusable output."""
+    if "LLM interaction" in (error_message or "") or "API error" in (error_message or ""):
+        return status.HTTP_503_SERVICE_UNAVAILABLE
+    return status.HTTP_422_UNPROCESSABLE_ENTITY
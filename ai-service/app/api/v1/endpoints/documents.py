@@ -18,14 +18,21 @@ from fastapi import (
 )
 from minio import Minio
 
+from app.core.config import settings
 from app.core.dependencies import get_minio_client
-from app.schemas import DocumentUploadResponse
-from app.services.storage import StorageService, StorageError
+from app.schemas import (
+    DocumentUploadResponse,
+    DocumentExtractionStatusResponse,
+    ExtractionMemoryStatsResponse,
+    TextCacheStatsResponse,
+)
+from app.services.pdf_extractor import pdf_extractor_service
+from app.services.storage import storage_service, StorageError
+from app.services.text_cache import extracted_text_cache
 from app.core.security import get_current_user_claims
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-storage_service = StorageService()
 
 @router.post(
     "/upload/",
@@ -43,8 +50,9 @@ async def upload_pdf_document(
     """
     Handles the upload of a single PDF file after authenticating the user via JWT.
 
-    - Validates the file content type.
-    - Calls the StorageService to save the file.
+    - Validates the file content type and size.
+    - Calls the StorageService to save the file, which also starts text
+      extraction in the background.
     - Returns document metadata upon successful upload.
     - Handles potential storage errors and returns appropriate HTTP exceptions.
     """
@@ -60,6 +68,15 @@ async def upload_pdf_document(
             detail=f"Unsupported file type: {file.content_type}. Only PDF files are allowed."
         )
 
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        logger.warning(
+            f"Upload attempt failed for user '{user_identifier}': File size {file.size} exceeds limit of {settings.MAX_UPLOAD_SIZE} bytes."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large: {file.size} bytes. Maximum allowed size is {settings.MAX_UPLOAD_SIZE} bytes."
+        )
+
     try:
         logger.info(f"Processing upload for file: {file.filename} by user '{user_identifier}'")
         doc_uuid, original_name = await storage_service.save_document(
@@ -97,4 +114,69 @@ async def upload_pdf_document(
         )
     finally:
         await file.close()
-        logger.debug(f"Closed file handle for: {file.filename}")
\ No newline at end of file
+        logger.debug(f"Closed file handle for: {file.filename}")
+
+@router.get(
+    "/text-cache/stats",
+    response_model=TextCacheStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Extracted Text Cache Statistics",
+    description="Returns hit/miss counters of the extracted PDF text cache. Requires authentication.",
+    tags=["Documents"]
+)
+async def get_text_cache_stats(
+    claims: dict = Depends(get_current_user_claims),
+):
+    """
+    Reports how often ticket generation was able to skip the PDF download and
+    fitz parse thanks to the extracted text cache.
+    """
+    return TextCacheStatsResponse(**extracted_text_cache.stats())
+
+@router.get(
+    "/extraction-memory/stats",
+    response_model=ExtractionMemoryStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Extraction Memory Statistics",
+    description="Returns per-extraction memory figures for PDFs fetched from storage. Requires authentication.",
+    tags=["Documents"]
+)
+async def get_extraction_memory_stats(
+    claims: dict = Depends(get_current_user_claims),
+):
+    """
+    Reports how much of each fetched PDF was buffered in memory, plus the
+    process-wide RSS change across each extraction.
+    """
+    return ExtractionMemoryStatsResponse(**pdf_extractor_service.memory_stats.stats())
+
+@router.get(
+    "/{document_id}/extraction",
+    response_model=DocumentExtractionStatusResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Background Text Extraction Status",
+    description="Reports the state of the text extraction started when the document was uploaded. Requires authentication.",
+    tags=["Documents"]
+)
+async def get_document_extraction_status(
+    document_id: UUID,
+    claims: dict = Depends(get_current_user_claims),
+):
+    """
+    Returns the status of the eager extraction job for a document.
+
+    Documents uploaded before a restart (or whose job history has been
+    trimmed) report "unknown"; generation still works for them on demand.
+    """
+    job = pdf_extractor_service.get_extraction_job(document_id)
+    if job is None:
+        return DocumentExtractionStatusResponse(document_id=document_id, status="unknown")
+
+    return DocumentExtractionStatusResponse(
+        document_id=document_id,
+        status=job.status,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        duration_ms=job.duration_ms,
+        error=job.error,
+    )
@@ -0,0 +1,174 @@
+# ai-service/app/api/v1/endpoints/jobs.py
+
+import logging
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+)
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas import (
+    TicketGenerateRequest,
+    TicketGenerateResponse,
+    JobEnqueueResponse,
+    JobStatusResponse,
+    JobQueueStatsResponse,
+)
+from app.core.config import settings
+from app.core.dependencies import get_minio_client
+from app.core.security import get_current_user_claims
+from app.core.tracing import current_traceparent, start_span
+from app.services.llm_processor import llm_processor_service
+from app.services.llm_scheduler import PRIORITY_BATCH, llm_priority
+from app.services.job_queue import (
+    GenerationJob,
+    JobError,
+    JobQueueFullError,
+    generation_job_queue,
+)
+from app.api.v1.common import extract_document_text, llm_error_status_code, owner_of, select_context, to_datetime
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+async def run_generation_job(job: GenerationJob) -> Dict[str, Any]:
+    """
+    Job handler: runs the extract -> LLM pipeline of `/tickets/generate-from-document`
+    for a queued job and returns the TicketGenerateResponse as a dict.
+
+    Raises:
+        JobError: With the status the synchronous endpoint would have returned.
+    """
+    # The job continues the trace of the request that queued it.
+    with start_span("jobs.run_generation_job", traceparent=job.payload.get("traceparent"),
+                    attributes={"job.id": str(job.job_id)}):
+        return await _run_generation_job(job)
+
+
+async def _run_generation_job(job: GenerationJob) -> Dict[str, Any]:
+    request_data = TicketGenerateRequest.model_validate(job.payload)
+    try:
+        minio_client = get_minio_client()
+        extracted_text = await extract_document_text(request_data.document_id, minio_client, job.owner)
+        extracted_text = await select_context(request_data.document_id, extracted_text, request_data)
+    except HTTPException as e:
+        raise JobError(e.status_code, str(e.detail)) from e
+
+    if llm_processor_service is None:
+        raise JobError(status.HTTP_503_SERVICE_UNAVAILABLE, "AI processing service is not configured or available.")
+
+    # Queued jobs yield LLM quota to requests a user is actively waiting on.
+    with llm_priority(PRIORITY_BATCH):
+        ai_response = await llm_processor_service.generate_ticket_json(
+            extracted_text=extracted_text,
+            system_prompt=request_data.system_prompt,
+            bypass_cache=request_data.bypass_cache
+        )
+    if ai_response.status == "error" or ai_response.ai_structured_output is None:
+        raise JobError(
+            llm_error_status_code(ai_response.error_message),
+            f"AI processing failed: {ai_response.error_message}"
+        )
+
+    return TicketGenerateResponse(
+        generated_json=ai_response.ai_structured_output,
+        llm_raw_output=ai_response.raw_llm_output,
+        document_id=request_data.document_id,
+        cache_hit=ai_response.cache_hit,
+        repaired=ai_response.repaired
+    ).model_dump(mode="json")
+
+
+@router.post(
+    "/generate-ticket",
+    response_model=JobEnqueueResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue Ticket Generation",
+    description="Queues ticket generation for a previously uploaded document and returns a job ID "
+                "to poll with `GET /jobs/{job_id}`. Requires authentication.",
+    tags=["Jobs"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        503: {"description": "The job queue is full."},
+    }
+)
+async def enqueue_ticket_generation(
+    request_data: TicketGenerateRequest,
+    response: Response,
+    claims: dict = Depends(get_current_user_claims),
+):
+    """Queues a generation job; document and LLM errors are reported on the job."""
+    owner = owner_of(claims)
+    try:
+        payload = request_data.model_dump(mode="json")
+        payload["traceparent"] = current_traceparent()
+        job = await generation_job_queue.enqueue(owner, payload)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected generation job from user '{owner}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+
+    logger.info(f"User '{owner}' queued generation job {job.job_id} for document {request_data.document_id}.")
+    response.headers["Location"] = f"{settings.API_V1_STR}/jobs/{job.job_id}"
+    return JobEnqueueResponse(job_id=job.job_id, status=job.status, enqueued_at=to_datetime(job.enqueued_at))
+
+
+@router.get(
+    "/stats",
+    response_model=JobQueueStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Job Queue Statistics",
+    description="Returns queue depth, throughput counters and wait-time percentiles. Requires authentication.",
+    tags=["Jobs"]
+)
+async def get_job_queue_stats(
+    claims: dict = Depends(get_current_user_claims),
+):
+    return JobQueueStatsResponse(**await run_in_threadpool(generation_job_queue.stats))
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get Job Status",
+    description="Returns the status of a generation job and, once it has finished, its result or error. "
+                "Only the user who queued the job can see it. Requires authentication.",
+    tags=["Jobs"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "No such job (or it has expired)."},
+    }
+)
+async def get_job_status(
+    job_id: UUID,
+    claims: dict = Depends(get_current_user_claims),
+):
+    job = await generation_job_queue.get(job_id)
+    if job is None or job.owner != owner_of(claims):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found."
+        )
+
+    return JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        document_id=job.payload["document_id"],
+        enqueued_at=to_datetime(job.enqueued_at),
+        started_at=to_datetime(job.started_at),
+        finished_at=to_datetime(job.finished_at),
+        result=job.result,
+        error_status_code=job.error_status_code,
+        error_detail=job.error_detail
+    )
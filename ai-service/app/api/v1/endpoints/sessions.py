@@ -0,0 +1,179 @@
+# ai-service/app/api/v1/endpoints/sessions.py
+
+import logging
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+)
+from minio import Minio
+
+from app.schemas import (
+    DocumentSessionCreateRequest,
+    DocumentSessionResponse,
+    SessionTicketGenerateRequest,
+    SessionTicketGenerateResponse,
+)
+from app.core.config import settings
+from app.core.dependencies import get_minio_client
+from app.core.security import get_current_user_claims
+from app.services.document_session import (
+    DocumentSession,
+    DocumentSessionNotFoundError,
+    document_session_store,
+)
+from app.services.llm_processor import llm_processor_service
+from app.api.v1.common import extract_document_text, llm_error_status_code, owner_of, to_datetime
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _session_response(session: DocumentSession) -> DocumentSessionResponse:
+    stats = session.stats()
+    stats["created_at"] = to_datetime(stats["created_at"])
+    stats["expires_at"] = to_datetime(stats["expires_at"])
+    return DocumentSessionResponse(**stats)
+
+
+def _get_session(session_id: UUID, claims: dict) -> DocumentSession:
+    try:
+        return document_session_store.get(session_id, owner_of(claims))
+    except DocumentSessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post(
+    "",
+    response_model=DocumentSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create Document Session",
+    description="Extracts a previously uploaded document once and registers its text, so later "
+                "generations in the session send only their new prompt. Uses Gemini context caching "
+                "when available and a stable cached-prefix prompt layout otherwise. Requires authentication.",
+    tags=["Sessions"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "Document not found in storage."},
+        413: {"description": "Document exceeds the configured byte or page limit."},
+        422: {"description": "Failed to parse the PDF."},
+        503: {"description": "Dependent service (Storage, LLM) unavailable or not configured."},
+    }
+)
+async def create_document_session(
+    request_data: DocumentSessionCreateRequest,
+    response: Response,
+    claims: dict = Depends(get_current_user_claims),
+    minio_client: Minio = Depends(get_minio_client),
+):
+    owner = owner_of(claims)
+    if llm_processor_service is None:
+        logger.critical(f"LLM Processor Service is not available for request from user '{owner}'.")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI processing service is not configured or available."
+        )
+
+    extracted_text = await extract_document_text(request_data.document_id, minio_client, owner)
+    session = await document_session_store.create(owner, request_data.document_id, extracted_text)
+    response.headers["Location"] = f"{settings.API_V1_STR}/sessions/{session.session_id}"
+    return _session_response(session)
+
+
+@router.post(
+    "/{session_id}/generate",
+    response_model=SessionTicketGenerateResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate Ticket in Document Session",
+    description="Generates a ticket from the session's document with a new system prompt, without "
+                "sending the document again. Reports the prompt tokens, cached tokens and latency of "
+                "the generation. Requires authentication.",
+    tags=["Sessions"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "No such session (or it has expired)."},
+        422: {"description": "LLM output validation failed."},
+        503: {"description": "LLM unavailable or not configured."},
+    }
+)
+async def generate_ticket_in_session(
+    session_id: UUID,
+    request_data: SessionTicketGenerateRequest,
+    claims: dict = Depends(get_current_user_claims),
+):
+    session = _get_session(session_id, claims)
+    if llm_processor_service is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI processing service is not configured or available."
+        )
+
+    ai_response = await llm_processor_service.generate_session_ticket_json(
+        session=session,
+        system_prompt=request_data.system_prompt,
+        bypass_cache=request_data.bypass_cache
+    )
+    if ai_response.status == "error" or ai_response.ai_structured_output is None:
+        logger.error(f"LLM processing failed in document session {session_id}. Error: {ai_response.error_message}")
+        raise HTTPException(
+            status_code=llm_error_status_code(ai_response.error_message),
+            detail=f"AI processing failed: {ai_response.error_message}"
+        )
+
+    return SessionTicketGenerateResponse(
+        generated_json=ai_response.ai_structured_output,
+        llm_raw_output=ai_response.raw_llm_output,
+        document_id=session.document_id,
+        cache_hit=ai_response.cache_hit,
+        repaired=ai_response.repaired,
+        session_id=session.session_id,
+        prompt_tokens=ai_response.prompt_tokens or 0,
+        cached_prompt_tokens=ai_response.cached_prompt_tokens or 0,
+        latency_ms=ai_response.latency_ms or 0.0
+    )
+
+
+@router.get(
+    "/{session_id}",
+    response_model=DocumentSessionResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get Document Session",
+    description="Returns the session's cache mode, token savings and generation latency. "
+                "Only the user who created the session can see it. Requires authentication.",
+    tags=["Sessions"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "No such session (or it has expired)."},
+    }
+)
+async def get_document_session(
+    session_id: UUID,
+    claims: dict = Depends(get_current_user_claims),
+):
+    return _session_response(_get_session(session_id, claims))
+
+
+@router.delete(
+    "/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Close Document Session",
+    description="Ends the session and deletes any cached content it holds at the provider. Requires authentication.",
+    tags=["Sessions"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "No such session (or it has expired)."},
+    }
+)
+async def close_document_session(
+    session_id: UUID,
+    claims: dict = Depends(get_current_user_claims),
+):
+    try:
+        await document_session_store.close(session_id, owner_of(claims))
+    except DocumentSessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
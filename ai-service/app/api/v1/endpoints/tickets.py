@@ -1,120 +1,73 @@
 # ai-service/app/api/v1/endpoints/tickets.py
 
+import asyncio
+import json
 import logging
+import time
+from typing import Optional
 from uuid import UUID
 
 from fastapi import (
     APIRouter,
     Depends, # <<< Import Depends
     HTTPException,
+    Request,
     status,
 )
+from fastapi.responses import StreamingResponse
 from minio import Minio
+from starlette.concurrency import run_in_threadpool
 
 # --- Application Imports ---
 # Schemas
 from app.schemas import (
+    ContextModeEnum,
     TicketGenerateRequest,
     TicketGenerateResponse,
+    TicketEvaluation,
+    TicketGenerateAndEvaluateResponse,
     AIProcessingResponse, # Assuming this is the response from llm_processor service
-    GeneratedTicketData # The target validated data structure from llm_processor output
+    GeneratedTicketData, # The target validated data structure from llm_processor output
+    LLMCacheStatsResponse,
+    MultiTicketGenerateRequest,
+    MultiTicketGenerateResponse,
+    MultiTicketProcessingResponse
 )
+from app.core.config import settings
+from app.core.metrics import stage_timer
 # Dependencies
 from app.core.dependencies import get_minio_client
 from app.core.security import get_current_user_claims # <<< Import the security dependency
 # Services
-from app.services.pdf_extractor import (
-    PDFExtractorService,
-    DocumentNotFoundError,
-    PDFParsingError,
-    ServiceError as ExtractorServiceError # Rename to avoid name clash if needed
-)
 from app.services.llm_processor import (
     llm_processor_service, # Using the singleton instance for POC
     LLMProcessingError,
     LLMConfigurationError # Import specific exceptions if needed
 )
+from app.services.llm_cache import llm_response_cache
+from app.services.document_chunker import chunk_document, count_text_pages
+from app.services.relevance_retriever import retrieve_context
+from app.services.eval_client import EvalServiceError, eval_service_client
+from app.api.v1.common import extract_document_text, llm_error_status_code, select_context
 
 # --- Setup ---
 logger = logging.getLogger(__name__)
 router = APIRouter()
-# Instantiate services (or inject if preferred)
-pdf_extractor = PDFExtractorService()
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-# --- API Endpoint Definition ---
-@router.post(
-    "/generate-from-document",
-    response_model=TicketGenerateResponse,
-    status_code=status.HTTP_200_OK,
-    summary="Generate Ticket from Document ID",
-    description="Extracts text from a previously uploaded document and uses an LLM, "
-                "guided by a system prompt, to generate a structured ticket. Requires authentication.",
-    tags=["Tickets"],
-    responses={
-        401: {"description": "Authentication required or invalid token."},
-        404: {"description": "Document not found in storage."},
-        422: {"description": "Failed to parse PDF or LLM output validation failed."},
-        500: {"description": "Internal server error during processing."},
-        503: {"description": "Dependent service (Storage, LLM) unavailable or not configured."},
-    }
-)
-async def generate_ticket_from_document(
-    # Request body automatically validated
+async def _generate_ticket(
     request_data: TicketGenerateRequest,
-    # Inject dependencies
-    claims: dict = Depends(get_current_user_claims), # <<< ADD SECURITY DEPENDENCY
-    minio_client: Minio = Depends(get_minio_client),
-    # llm_service: LLMProcessorService = Depends(get_llm_processor_service) # Alternative if injecting service
-):
-    """
-    Orchestrates the ticket generation pipeline after authenticating the user via JWT:
-    1. Fetches and extracts text from the specified document ID using PDFExtractorService.
-    2. Calls the LLMProcessorService with the extracted text and system prompt.
-    3. Handles errors from each service appropriately.
-    4. Returns the structured ticket data upon success.
-    """
+    minio_client: Minio,
+    user_identifier: str,
+) -> TicketGenerateResponse:
+    """The single-ticket pipeline shared by `/generate-from-document` and `/generate-and-evaluate`."""
     document_id = request_data.document_id
     system_prompt = request_data.system_prompt
-    user_identifier = claims.get('email', claims.get('sub', 'Unknown User'))
-    logger.info(f"User '{user_identifier}' received request to generate ticket from document ID: {document_id}")
 
     # --- Step 1: Extract Text from PDF ---
-    try:
-        logger.info(f"Attempting text extraction for document: {document_id} by user '{user_identifier}'")
-        extracted_text = await pdf_extractor.extract_text_from_document(
-            document_id=document_id,
-            minio_client=minio_client
-        )
-        if not extracted_text:
-            logger.warning(f"Extraction yielded empty text for document: {document_id}. Processing will proceed but may be limited.")
-        logger.info(f"Successfully extracted text (length: {len(extracted_text)}) for document: {document_id} by user '{user_identifier}'")
-
-    except DocumentNotFoundError as e:
-        logger.error(f"Document not found error for ID {document_id} requested by user '{user_identifier}': {e}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document with ID '{document_id}' not found in storage."
-        )
-    except PDFParsingError as e:
-        logger.error(f"PDF parsing error for document {document_id} requested by user '{user_identifier}': {e}")
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Failed to parse the PDF content for document '{document_id}'. It might be corrupted or invalid."
-        )
-    except ExtractorServiceError as e:
-        logger.exception(f"Storage or other service error during text extraction for {document_id} requested by user '{user_identifier}'.")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Failed to retrieve or process document '{document_id}' due to a storage service issue: {e}"
-        )
-    except HTTPException as http_exc: # Re-raise HTTPExceptions from dependencies (like MinIO client init fail)
-        raise http_exc
-    except Exception as e:
-         logger.exception(f"Unexpected error during text extraction phase for {document_id} requested by user '{user_identifier}'.")
-         raise HTTPException(
-             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-             detail="An unexpected error occurred during text extraction."
-         )
+    extracted_text = await extract_document_text(document_id, minio_client, user_identifier)
+    extracted_text = await select_context(document_id, extracted_text, request_data)
 
     # --- Step 2: Process Text with LLM ---
     if llm_processor_service is None:
@@ -129,16 +82,14 @@ async def generate_ticket_from_document(
         # Assuming llm_processor_service.generate_ticket_json returns AIProcessingResponse schema instance
         ai_response: AIProcessingResponse = await llm_processor_service.generate_ticket_json(
             extracted_text=extracted_text,
-            system_prompt=system_prompt
+            system_prompt=system_prompt,
+            bypass_cache=request_data.bypass_cache
         )
 
         if ai_response.status == "error":
             logger.error(f"LLM processing failed for document {document_id} requested by user '{user_identifier}'. Error: {ai_response.error_message}")
-            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY # Default for processing/validation errors
-            if "LLM interaction" in (ai_response.error_message or "") or "API error" in (ai_response.error_message or ""):
-                 status_code = status.HTTP_503_SERVICE_UNAVAILABLE
             raise HTTPException(
-                status_code=status_code,
+                status_code=llm_error_status_code(ai_response.error_message),
                 detail=f"AI processing failed: {ai_response.error_message}"
             )
 
@@ -155,7 +106,9 @@ async def generate_ticket_from_document(
         final_response = TicketGenerateResponse(
             generated_json=ai_response.ai_structured_output, # Already validated GeneratedTicketData
             llm_raw_output=ai_response.raw_llm_output,
-            document_id=document_id
+            document_id=document_id,
+            cache_hit=ai_response.cache_hit,
+            repaired=ai_response.repaired
         )
         return final_response
 
@@ -172,4 +125,316 @@ async def generate_ticket_from_document(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred during AI processing."
-        )
\ No newline at end of file
+        )
+
+# --- API Endpoint Definition ---
+@router.post(
+    "/generate-from-document",
+    response_model=TicketGenerateResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate Ticket from Document ID",
+    description="Extracts text from a previously uploaded document and uses an LLM, "
+                "guided by a system prompt, to generate a structured ticket. Requires authentication.",
+    tags=["Tickets"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "Document not found in storage."},
+        413: {"description": "Document exceeds the configured byte or page limit."},
+        422: {"description": "Failed to parse PDF or LLM output validation failed."},
+        500: {"description": "Internal server error during processing."},
+        503: {"description": "Dependent service (Storage, LLM) unavailable or not configured."},
+    }
+)
+async def generate_ticket_from_document(
+    # Request body automatically validated
+    request_data: TicketGenerateRequest,
+    # Inject dependencies
+    claims: dict = Depends(get_current_user_claims), # <<< ADD SECURITY DEPENDENCY
+    minio_client: Minio = Depends(get_minio_client),
+    # llm_service: LLMProcessorService = Depends(get_llm_processor_service) # Alternative if injecting service
+):
+    """
+    Orchestrates the ticket generation pipeline after authenticating the user via JWT:
+    1. Fetches and extracts text from the specified document ID using PDFExtractorService.
+    2. Calls the LLMProcessorService with the extracted text and system prompt.
+    3. Handles errors from each service appropriately.
+    4. Returns the structured ticket data upon success.
+    """
+    user_identifier = claims.get('email', claims.get('sub', 'Unknown User'))
+    logger.info(f"User '{user_identifier}' received request to generate ticket from document ID: {request_data.document_id}")
+    return await _generate_ticket(request_data, minio_client, user_identifier)
+
+@router.post(
+    "/generate-and-evaluate",
+    response_model=TicketGenerateAndEvaluateResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate and Evaluate Ticket from Document ID",
+    description="Generates a ticket like `/generate-from-document`, then evaluates it with eval-service over a "
+                "pooled keep-alive connection and returns both, saving the client a second round trip through "
+                "the gateway. If only the evaluation fails, the ticket is returned with `evaluation_error`. "
+                "Requires authentication.",
+    tags=["Tickets"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "Document not found in storage."},
+        413: {"description": "Document exceeds the configured byte or page limit."},
+        422: {"description": "Failed to parse PDF or LLM output validation failed."},
+        500: {"description": "Internal server error during processing."},
+        503: {"description": "Dependent service (Storage, LLM) unavailable or not configured."},
+    }
+)
+async def generate_and_evaluate_ticket(
+    request_data: TicketGenerateRequest,
+    request: Request,
+    claims: dict = Depends(get_current_user_claims),
+    minio_client: Minio = Depends(get_minio_client),
+):
+    user_identifier = claims.get('email', claims.get('sub', 'Unknown User'))
+    logger.info(f"User '{user_identifier}' requested generation and evaluation of a ticket from document ID: {request_data.document_id}")
+    generated = await _generate_ticket(request_data, minio_client, user_identifier)
+
+    evaluation, evaluation_error = None, None
+    started = time.perf_counter()
+    try:
+        with stage_timer("evaluation"):
+            result = await eval_service_client.evaluate_ticket(
+                generated_json=generated.generated_json.model_dump(mode="json"),
+                original_system_prompt=request_data.system_prompt,
+                authorization=request.headers.get("authorization"),
+                bypass_cache=request_data.bypass_cache
+            )
+        evaluation = TicketEvaluation(**result)
+    except EvalServiceError as e:
+        logger.warning(f"Evaluation of the ticket for document {request_data.document_id} failed for user '{user_identifier}': {e}")
+        evaluation_error = str(e)
+
+    return TicketGenerateAndEvaluateResponse(
+        **generated.model_dump(),
+        evaluation=evaluation,
+        evaluation_error=evaluation_error,
+        evaluation_latency_ms=(time.perf_counter() - started) * 1000.0
+    )
+
+@router.post(
+    "/generate-from-document/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Generate Ticket from Document ID (Server-Sent Events)",
+    description="Streaming variant of `/generate-from-document`. Emits `started`, `fetched`, `extracted` "
+                "(with page count), `token` (LLM output fragments) and finally `validated` (a "
+                "`TicketGenerateResponse`) or `error` (with `status_code` and `detail`). Requires authentication.",
+    tags=["Tickets"],
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "A stream of server-sent events."},
+        401: {"description": "Authentication required or invalid token."},
+        503: {"description": "LLM service not configured."},
+    }
+)
+async def stream_ticket_from_document(
+    request_data: TicketGenerateRequest,
+    claims: dict = Depends(get_current_user_claims),
+    minio_client: Minio = Depends(get_minio_client),
+):
+    """
+    Runs the same pipeline as `generate_ticket_from_document` but reports each
+    stage as it completes. Failures after the stream has started are sent as an
+    `error` event, since the 200 status has already been sent. Comment lines are
+    sent while a stage is busy so proxies do not time out the connection.
+    """
+    document_id = request_data.document_id
+    user_identifier = claims.get('email', claims.get('sub', 'Unknown User'))
+    logger.info(f"User '{user_identifier}' requested streamed ticket generation from document ID: {document_id}")
+
+    if llm_processor_service is None:
+         logger.critical(f"LLM Processor Service is not available for request from user '{user_identifier}'.")
+         raise HTTPException(
+             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+             detail="AI processing service is not configured or available."
+         )
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def _on_fetched(info: dict) -> None:
+        await events.put(_sse_event("fetched", {"document_id": str(document_id), **info}))
+
+    async def _run_pipeline() -> None:
+        try:
+            extracted_text = await extract_document_text(document_id, minio_client, user_identifier, _on_fetched)
+            await events.put(_sse_event("extracted", {
+                "page_count": count_text_pages(extracted_text),
+                "characters": len(extracted_text)
+            }))
+            extracted_text = await select_context(document_id, extracted_text, request_data)
+
+            ai_response: Optional[AIProcessingResponse] = None
+            async for item in llm_processor_service.stream_ticket_json(
+                extracted_text=extracted_text,
+                system_prompt=request_data.system_prompt,
+                bypass_cache=request_data.bypass_cache
+            ):
+                if isinstance(item, str):
+                    await events.put(_sse_event("token", {"text": item}))
+                else:
+                    ai_response = item
+
+            if ai_response is None or ai_response.status == "error" or ai_response.ai_structured_output is None:
+                error_message = ai_response.error_message if ai_response is not None else "No response from the LLM."
+                logger.error(f"Streamed LLM processing failed for document {document_id} requested by user '{user_identifier}'. Error: {error_message}")
+                await events.put(_sse_event("error", {
+                    "status_code": llm_error_status_code(error_message),
+                    "detail": f"AI processing failed: {error_message}"
+                }))
+                return
+
+            final_response = TicketGenerateResponse(
+                generated_json=ai_response.ai_structured_output,
+                llm_raw_output=ai_response.raw_llm_output,
+                document_id=document_id,
+                cache_hit=ai_response.cache_hit,
+                repaired=ai_response.repaired
+            )
+            await events.put(_sse_event("validated", final_response.model_dump(mode="json")))
+            logger.info(f"Successfully streamed ticket generation for document: {document_id} for user '{user_identifier}'")
+        except HTTPException as http_exc:
+            await events.put(_sse_event("error", {"status_code": http_exc.status_code, "detail": http_exc.detail}))
+        except Exception:
+            logger.exception(f"Unexpected error during streamed ticket generation for {document_id} requested by user '{user_identifier}'.")
+            await events.put(_sse_event("error", {
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": "An unexpected error occurred during ticket generation."
+            }))
+        finally:
+            await events.put(None)
+
+    async def _event_stream():
+        pipeline = asyncio.create_task(_run_pipeline())
+        try:
+            yield _sse_event("started", {"document_id": str(document_id)})
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            if not pipeline.done():
+                logger.info(f"Client disconnected from streamed generation for document {document_id}; cancelling.")
+                pipeline.cancel()
+
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post(
+    "/generate-multiple-from-document",
+    response_model=MultiTicketGenerateResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate Multiple Tickets from Document ID",
+    description="Splits a previously uploaded document into page-aligned chunks within a token budget, "
+                "generates tickets for the chunks concurrently and merges them into one list, "
+                "each ticket annotated with its source pages. Requires authentication.",
+    tags=["Tickets"],
+    responses={
+        401: {"description": "Authentication required or invalid token."},
+        404: {"description": "Document not found in storage."},
+        413: {"description": "Document exceeds the configured byte, page or chunk limit."},
+        422: {"description": "Failed to parse PDF, or no chunk produced valid tickets."},
+        500: {"description": "Internal server error during processing."},
+        503: {"description": "Dependent service (Storage, LLM) unavailable or not configured."},
+    }
+)
+async def generate_multiple_tickets_from_document(
+    request_data: MultiTicketGenerateRequest,
+    claims: dict = Depends(get_current_user_claims),
+    minio_client: Minio = Depends(get_minio_client),
+):
+    """
+    Map-reduce variant of `generate_ticket_from_document` for long documents:
+    1. Extracts the document text (shared with the single-ticket endpoint and its caches).
+    2. Chunks it along page and section boundaries.
+    3. Generates tickets per chunk with bounded concurrency and merges duplicates.
+    """
+    document_id = request_data.document_id
+    user_identifier = claims.get('email', claims.get('sub', 'Unknown User'))
+    logger.info(f"User '{user_identifier}' requested multi-ticket generation from document ID: {document_id}")
+
+    extracted_text = await extract_document_text(document_id, minio_client, user_identifier)
+
+    if llm_processor_service is None:
+         logger.critical(f"LLM Processor Service is not available for request from user '{user_identifier}'.")
+         raise HTTPException(
+             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+             detail="AI processing service is not configured or available."
+         )
+
+    max_chunk_tokens = request_data.max_chunk_tokens or settings.MULTI_TICKET_CHUNK_TOKENS
+    chunks = None
+    if request_data.context_mode == ContextModeEnum.RETRIEVAL:
+        # The selected retrieval chunks keep their page ranges, so they are mapped directly.
+        with stage_timer("retrieval"):
+            retrieval = await run_in_threadpool(retrieve_context, document_id, extracted_text, request_data.system_prompt)
+        chunks = retrieval.selected_chunks or None
+        max_chunk_tokens = settings.RETRIEVAL_CHUNK_TOKENS if chunks else max_chunk_tokens
+    if chunks is None:
+        chunks = chunk_document(extracted_text, max_chunk_tokens)
+    if not chunks:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Document '{document_id}' contains no extractable text."
+        )
+    if len(chunks) > settings.MULTI_TICKET_MAX_CHUNKS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Document splits into {len(chunks)} chunks of ~{max_chunk_tokens} tokens; "
+                   f"the limit is {settings.MULTI_TICKET_MAX_CHUNKS}. Use a larger chunk budget."
+        )
+    logger.info(f"Document {document_id} split into {len(chunks)} chunks of at most ~{max_chunk_tokens} tokens.")
+
+    try:
+        result: MultiTicketProcessingResponse = await llm_processor_service.generate_tickets_from_chunks(
+            chunks=chunks,
+            system_prompt=request_data.system_prompt,
+            concurrency=settings.MULTI_TICKET_CONCURRENCY,
+            bypass_cache=request_data.bypass_cache
+        )
+    except Exception as e:
+        logger.exception(f"Unexpected error during multi-ticket generation for {document_id} requested by user '{user_identifier}'.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred during AI processing."
+        )
+
+    if len(result.failed_chunks) == result.chunk_count:
+        first_error = result.failed_chunks[0].error_message
+        raise HTTPException(
+            status_code=llm_error_status_code(first_error),
+            detail=f"AI processing failed for every chunk. First error: {first_error}"
+        )
+
+    logger.info(f"Generated {len(result.tickets)} tickets for document {document_id} for user '{user_identifier}'")
+    return MultiTicketGenerateResponse(
+        document_id=document_id,
+        tickets=result.tickets,
+        chunk_count=result.chunk_count,
+        cached_chunks=result.cached_chunks,
+        failed_chunks=result.failed_chunks
+    )
+
+@router.get(
+    "/llm-cache/stats",
+    response_model=LLMCacheStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="LLM Response Cache Statistics",
+    description="Returns hit/miss counters of the ticket-generation LLM response cache. Requires authentication.",
+    tags=["Tickets"]
+)
+async def get_llm_cache_stats(
+    claims: dict = Depends(get_current_user_claims),
+):
+    """Reports how many LLM calls the response cache has saved."""
+    return LLMCacheStatsResponse(**await run_in_threadpool(llm_response_cache.stats))
@@ -9,7 +9,22 @@ Settings include:
 - API configuration
 - MinIO object storage configuration
 - File upload settings
+- Extracted text cache settings
+- PDF parsing engine settings
+- Text compaction settings
+- Relevance retrieval settings
 - AI model parameters
+- LLM provider settings (Gemini, record/replay, synthetic)
+- LLM output repair settings
+- Document session settings
+- LLM rate limiting and retry settings
+- Multi-ticket (chunked) generation settings
+- Streaming (SSE) settings
+- Generation job queue settings
+- LLM response cache settings
+- Evaluation service client settings
+- Metrics and request logging settings
+- Tracing settings
 - JWT authentication settings
 """
 
@@ -36,10 +51,46 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "minioadmin123")
     MINIO_BUCKET_NAME: str = os.getenv("MINIO_BUCKET_NAME", "requirements-pdfs")
     MINIO_SECURE: bool = os.getenv("MINIO_SECURE", "False").lower() == "true"
+    MINIO_POOL_MAXSIZE: int = int(os.getenv("MINIO_POOL_MAXSIZE", 20))
+    MINIO_CONNECT_TIMEOUT: float = float(os.getenv("MINIO_CONNECT_TIMEOUT", 5.0))
+    MINIO_READ_TIMEOUT: float = float(os.getenv("MINIO_READ_TIMEOUT", 60.0))
+    MINIO_MAX_RETRIES: int = int(os.getenv("MINIO_MAX_RETRIES", 3))
 
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB in bytes
     ALLOWED_EXTENSIONS: List[str] = ["pdf"]
+    MAX_DOCUMENT_PAGES: int = int(os.getenv("MAX_DOCUMENT_PAGES", 500))
+    PDF_FETCH_SPOOL_THRESHOLD: int = int(os.getenv("PDF_FETCH_SPOOL_THRESHOLD", 2 * 1024 * 1024))  # larger PDFs are spooled to a temp file
+
+    # Extracted Text Cache Settings
+    PDF_TEXT_CACHE_MAX_BYTES: int = int(os.getenv("PDF_TEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 64MB of UTF-8 text
+    PDF_TEXT_CACHE_SIDECAR_ENABLED: bool = os.getenv("PDF_TEXT_CACHE_SIDECAR_ENABLED", "True").lower() == "true"
+    PDF_EAGER_EXTRACTION_ENABLED: bool = os.getenv("PDF_EAGER_EXTRACTION_ENABLED", "True").lower() == "true"
+    PDF_EXTRACTION_JOB_HISTORY: int = int(os.getenv("PDF_EXTRACTION_JOB_HISTORY", 256))  # finished jobs kept for status lookups
+
+    # PDF Parsing Engine Settings
+    PDF_PARSE_POOL_SIZE: int = int(os.getenv("PDF_PARSE_POOL_SIZE", min(4, os.cpu_count() or 1)))  # 0 disables the process pool
+    PDF_PARSE_INLINE_MAX_PAGES: int = int(os.getenv("PDF_PARSE_INLINE_MAX_PAGES", 50))
+    PDF_PARSE_MIN_PAGES_PER_TASK: int = int(os.getenv("PDF_PARSE_MIN_PAGES_PER_TASK", 16))
+    PDF_PARSE_MAX_TASKS_PER_CHILD: int = int(os.getenv("PDF_PARSE_MAX_TASKS_PER_CHILD", 50))
+
+    # Text Compaction Settings (drops headers, footers, page numbers and other filler before the LLM)
+    TEXT_COMPACTION_ENABLED: bool = os.getenv("TEXT_COMPACTION_ENABLED", "True").lower() == "true"
+    TEXT_COMPACTION_REPEATED_LINE_MIN_PAGES: int = int(os.getenv("TEXT_COMPACTION_REPEATED_LINE_MIN_PAGES", 3))  # a header/footer repeats on at least this many pages
+    TEXT_COMPACTION_REPEATED_LINE_MIN_SHARE: float = float(os.getenv("TEXT_COMPACTION_REPEATED_LINE_MIN_SHARE", 0.5))  # ...and on at least this share of the pages
+    TEXT_COMPACTION_DROP_TOC: bool = os.getenv("TEXT_COMPACTION_DROP_TOC", "False").lower() == "true"
+    TEXT_COMPACTION_DROP_BOILERPLATE: bool = os.getenv("TEXT_COMPACTION_DROP_BOILERPLATE", "False").lower() == "true"
+    TEXT_COMPACTION_BOILERPLATE_HEADINGS: str = os.getenv(
+        "TEXT_COMPACTION_BOILERPLATE_HEADINGS",
+        "revision history,document history,change history,change log,copyright,disclaimer,confidentiality notice,approvals,sign-off,distribution list"
+    )  # comma-separated section headings dropped when TEXT_COMPACTION_DROP_BOILERPLATE is on
+    TEXT_COMPACTION_CACHE_MAX_BYTES: int = int(os.getenv("TEXT_COMPACTION_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # compacted texts kept per document and options
+
+    # Relevance Retrieval Settings (requests with context_mode "retrieval" send only the chunks matching the prompt)
+    RETRIEVAL_CHUNK_TOKENS: int = int(os.getenv("RETRIEVAL_CHUNK_TOKENS", 600))  # page/section chunk size of the BM25 index
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", 6))
+    RETRIEVAL_MAX_TOKENS: int = int(os.getenv("RETRIEVAL_MAX_TOKENS", 4000))  # budget for the selected chunks; smaller documents are sent whole
+    RETRIEVAL_INDEX_CACHE_ENTRIES: int = int(os.getenv("RETRIEVAL_INDEX_CACHE_ENTRIES", 64))  # per-document BM25 indexes kept; 0 disables the cache
 
     # AI Model Configuration
     GOOGLE_API_KEY: Optional[str] = os.getenv("GOOGLE_API_KEY")
@@ -47,14 +98,87 @@ class Settings(BaseSettings):
     AI_TEMPERATURE: float = float(os.getenv("AI_TEMPERATURE", 0.9))
     AI_MAX_RETRIES: int = int(os.getenv("AI_MAX_RETRIES", 2))
 
+    # LLM Provider Settings
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")  # "gemini", "record", "replay" or "synthetic"
+    LLM_REPLAY_DIR: str = os.getenv("LLM_REPLAY_DIR", "./.cache/llm_replay")  # captures written by "record", served by "replay"
+    LLM_REPLAY_SIMULATE_LATENCY: bool = os.getenv("LLM_REPLAY_SIMULATE_LATENCY", "False").lower() == "true"  # wait as long as the recorded call took
+    LLM_SYNTHETIC_LATENCY_MS: float = float(os.getenv("LLM_SYNTHETIC_LATENCY_MS", 800.0))  # median time to first token
+    LLM_SYNTHETIC_LATENCY_SIGMA: float = float(os.getenv("LLM_SYNTHETIC_LATENCY_SIGMA", 0.5))  # log-normal spread; 0 gives a fixed latency
+    LLM_SYNTHETIC_TOKENS_PER_SECOND: float = float(os.getenv("LLM_SYNTHETIC_TOKENS_PER_SECOND", 150.0))  # output rate; 0 emits instantly
+    LLM_SYNTHETIC_PREFILL_TOKENS_PER_SECOND: float = float(os.getenv("LLM_SYNTHETIC_PREFILL_TOKENS_PER_SECOND", 0.0))  # prompt rate for tokens outside its prefix cache; 0 is free
+    LLM_STRUCTURED_OUTPUT: bool = os.getenv("LLM_STRUCTURED_OUTPUT", "False").lower() == "true"  # pass the ticket schema as the response schema (JSON mime type)
+
+    # LLM Output Repair Settings (one repair call with only the invalid JSON, its errors and the schema)
+    LLM_REPAIR_ENABLED: bool = os.getenv("LLM_REPAIR_ENABLED", "True").lower() == "true"
+    LLM_REPAIR_MAX_INPUT_TOKENS: int = int(os.getenv("LLM_REPAIR_MAX_INPUT_TOKENS", 2000))  # larger repair prompts are not sent
+    LLM_REPAIR_MAX_OUTPUT_TOKENS: int = int(os.getenv("LLM_REPAIR_MAX_OUTPUT_TOKENS", 1024))
+
+    # Document Session Settings (register a document once, then send only new prompts against it)
+    DOCUMENT_SESSION_TTL_SECONDS: float = float(os.getenv("DOCUMENT_SESSION_TTL_SECONDS", 3600.0))  # sessions and their provider caches expire this long after creation
+    DOCUMENT_SESSION_MAX_SESSIONS: int = int(os.getenv("DOCUMENT_SESSION_MAX_SESSIONS", 256))  # the oldest session is closed to make room
+    DOCUMENT_SESSION_PROVIDER_CACHE: bool = os.getenv("DOCUMENT_SESSION_PROVIDER_CACHE", "True").lower() == "true"  # Gemini context caching (LLM_PROVIDER=gemini only)
+    DOCUMENT_SESSION_CACHE_MIN_TOKENS: int = int(os.getenv("DOCUMENT_SESSION_CACHE_MIN_TOKENS", 4096))  # smaller documents use the cached-prefix layout instead
+
+    # LLM Rate Limiting Settings (0, the default, disables a limit)
+    LLM_RATE_LIMIT_RPM: int = int(os.getenv("LLM_RATE_LIMIT_RPM", 0))  # set to the per-process share of the provider quota
+    LLM_RATE_LIMIT_TPM: int = int(os.getenv("LLM_RATE_LIMIT_TPM", 0))  # estimated tokens
+    LLM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", 1.0))
+    LLM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", 30.0))
+
+    # Multi-Ticket (Chunked) Generation Settings
+    MULTI_TICKET_CHUNK_TOKENS: int = int(os.getenv("MULTI_TICKET_CHUNK_TOKENS", 6000))  # estimated as chars / 4
+    MULTI_TICKET_CONCURRENCY: int = int(os.getenv("MULTI_TICKET_CONCURRENCY", 4))  # chunk LLM calls in flight per request
+    MULTI_TICKET_MAX_CHUNKS: int = int(os.getenv("MULTI_TICKET_MAX_CHUNKS", 100))
+
+    # Streaming (SSE) Settings
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15.0))  # keep-alive comment interval while a stage is busy
+
+    # Generation Job Queue Settings
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "memory")  # memory | sqlite
+    JOB_QUEUE_SQLITE_PATH: str = os.getenv("JOB_QUEUE_SQLITE_PATH", "./.cache/generation_jobs.sqlite3")
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 4))
+    JOB_QUEUE_MAX_DEPTH: int = int(os.getenv("JOB_QUEUE_MAX_DEPTH", 1000))
+    JOB_QUEUE_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_QUEUE_POLL_INTERVAL_SECONDS", 1.0))
+    JOB_RESULT_TTL_SECONDS: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", 24 * 3600))  # finished jobs kept for polling
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 60.0))  # sqlite: running jobs without a renewed lease for this long are requeued
+
+    # LLM Response Cache Settings
+    LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | sqlite | none
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024))  # memory backend
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # sqlite backend
+    LLM_CACHE_SQLITE_PATH: str = os.getenv("LLM_CACHE_SQLITE_PATH", "./.cache/llm_cache.sqlite3")
+
+    # Evaluation Service Client Settings (used by /tickets/generate-and-evaluate)
+    EVAL_SERVICE_URL: str = os.getenv("EVAL_SERVICE_URL", "http://localhost:8001")
+    EVAL_SERVICE_TIMEOUT_SECONDS: float = float(os.getenv("EVAL_SERVICE_TIMEOUT_SECONDS", 30.0))  # budget for the whole evaluation call
+    EVAL_SERVICE_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("EVAL_SERVICE_CONNECT_TIMEOUT_SECONDS", 2.0))
+    EVAL_SERVICE_MAX_CONNECTIONS: int = int(os.getenv("EVAL_SERVICE_MAX_CONNECTIONS", 20))
+    EVAL_SERVICE_KEEPALIVE_SECONDS: float = float(os.getenv("EVAL_SERVICE_KEEPALIVE_SECONDS", 60.0))
+    EVAL_SERVICE_HTTP2: bool = os.getenv("EVAL_SERVICE_HTTP2", "True").lower() == "true"  # only when the h2 package is installed
+
+    # Metrics & Request Logging Settings
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"  # Serves GET /metrics
+    HEADER_LOG_SAMPLE_RATE: float = float(os.getenv("HEADER_LOG_SAMPLE_RATE", 0.0))  # Share of requests whose headers are logged at DEBUG
+
+    # Tracing Settings
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "file")  # "file", "otlp" or "none"
+    TRACING_FILE_PATH: str = os.getenv("TRACING_FILE_PATH", "./.cache/traces/ai-service-spans.jsonl")
+    TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACING_SAMPLE_RATIO: float = float(os.getenv("TRACING_SAMPLE_RATIO", 1.0))  # For requests without a sampled traceparent
+    TRACING_EXPORT_INTERVAL_SECONDS: float = float(os.getenv("TRACING_EXPORT_INTERVAL_SECONDS", 5.0))
+
     # JWT Authentication Settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS512")
     JWT_ISSUER: Optional[str] = os.getenv("JWT_ISSUER", None)
+    JWT_CACHE_MAX_ENTRIES: int = int(os.getenv("JWT_CACHE_MAX_ENTRIES", 4096))  # 0 disables the verified-token cache
+    JWT_CACHE_MAX_TTL_SECONDS: int = int(os.getenv("JWT_CACHE_MAX_TTL_SECONDS", 300))  # Entries also expire at the token's exp
 
 # Initialize settings instance
 settings = Settings()
 
 # Validate required environment variables
-if not settings.GOOGLE_API_KEY:
+if settings.LLM_PROVIDER in ("gemini", "record") and not settings.GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API_KEY is not set. Please set it in the .env file.")
\ No newline at end of file
@@ -1,3 +1,8 @@
+import logging
+from typing import Optional
+
+import certifi
+import urllib3
 from minio import Minio 
 import google.generativeai as genai 
 from google.generativeai import GenerativeModel
@@ -12,26 +17,88 @@ This module provides dependency injection functions for:
 - MinIO client connection for object storage
 """
 
-# Configure Google Generative AI SDK
+logger = logging.getLogger(__name__)
+
+# Application-lifespan MinIO client; shared by all requests so its urllib3
+# connection pool (and the kept-alive connections in it) is reused.
+_minio_client: Optional[Minio] = None
+_minio_http_client: Optional[urllib3.PoolManager] = None
+
+# Configure Google Generative AI SDK (only the Gemini-backed providers need a key)
 try:
-    if not settings.GOOGLE_API_KEY:
+    if settings.LLM_PROVIDER not in ("gemini", "record"):
+        logger.info(f"LLM_PROVIDER is '{settings.LLM_PROVIDER}'; skipping Google Generative AI SDK configuration.")
+    elif not settings.GOOGLE_API_KEY:
         raise ValueError(
             "GOOGLE_API_KEY is not set in the environment variables."
         )
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
-    print("Google Generative AI SDK configured successfully.")
+    else:
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        logger.info("Google Generative AI SDK configured successfully.")
 
 except ValueError as ve:
-    print(f"Configuration Error: {ve}")
+    logger.critical(f"Configuration Error: {ve}")
     raise ve
 
 except Exception as e:
-    print(f"Error configuration Google Generative AI SDK: {e}")
+    logger.critical(f"Error configuration Google Generative AI SDK: {e}")
     raise RuntimeError(f"Failed to configure Google Generative AI SDK: {e}")
 
+def _build_minio_http_client() -> urllib3.PoolManager:
+    return urllib3.PoolManager(
+        maxsize=settings.MINIO_POOL_MAXSIZE,
+        block=False,
+        timeout=urllib3.Timeout(
+            connect=settings.MINIO_CONNECT_TIMEOUT,
+            read=settings.MINIO_READ_TIMEOUT,
+        ),
+        retries=urllib3.Retry(
+            total=settings.MINIO_MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=certifi.where(),
+    )
+
+def init_minio_client() -> Minio:
+    """
+    Creates the shared MinIO client with a sized, tuned connection pool.
+    Called once from the application lifespan.
+
+    Returns:
+        Minio: The shared MinIO client instance
+    """
+    global _minio_client, _minio_http_client
+    if _minio_client is None:
+        _minio_http_client = _build_minio_http_client()
+        _minio_client = Minio(
+            settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_SECURE,
+            http_client=_minio_http_client,
+        )
+        logger.info(
+            f"MinIO client created for endpoint: {settings.MINIO_ENDPOINT} "
+            f"(pool size {settings.MINIO_POOL_MAXSIZE}, connect timeout {settings.MINIO_CONNECT_TIMEOUT}s, "
+            f"read timeout {settings.MINIO_READ_TIMEOUT}s)"
+        )
+    return _minio_client
+
+def close_minio_client() -> None:
+    """Releases the pooled connections of the shared MinIO client on shutdown."""
+    global _minio_client, _minio_http_client
+    if _minio_http_client is not None:
+        _minio_http_client.clear()
+        logger.info("MinIO client connection pool closed.")
+    _minio_client = None
+    _minio_http_client = None
+
 def get_minio_client() -> Minio:
     """
-    Creates and returns a MinIO client instance.
+    Returns the shared MinIO client instance, creating it on first use if the
+    application lifespan has not done so already.
     
     Returns:
         Minio: Configured MinIO client instance
@@ -40,17 +107,10 @@ def get_minio_client() -> Minio:
         HTTPException: If connection to MinIO fails
     """
     try: 
-        minio_client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE,
-        )
-        print(f"MinIO client created for endpoint: {settings.MINIO_ENDPOINT}")
-        return minio_client
+        return _minio_client or init_minio_client()
 
     except Exception as e:
-        print(f"Error creating MinIO client: {e}")
+        logger.error(f"Error creating MinIO client: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Could not connect to MinIO storage: {e}"
@@ -68,11 +128,11 @@ def get_gemini_model() -> GenerativeModel:
     """
     try:
         model = genai.GenerativeModel(settings.AI_MODEL_NAME)
-        print(f"Gemini Model instance created for model: {settings.AI_MODEL_NAME}")
+        logger.debug(f"Gemini Model instance created for model: {settings.AI_MODEL_NAME}")
         return model
 
     except Exception as e:
-        print(f"Error creating Gemini Model instance: {e}")
+        logger.error(f"Error creating Gemini Model instance: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Could not instantiate Gemini Model: {e}"
@@ -0,0 +1,376 @@
+"""
+Tracing Module
+
+Lightweight in-process tracing for the request pipeline, so a slow call can
+be broken down into storage, parsing and LLM time after the fact.
+
+- Trace context arrives in the W3C `traceparent` header (set by the API
+  gateway) and is returned on every response, so the frontend, the gateway
+  and both services can refer to the same trace ID.
+- `TracingMiddleware` opens a server span per request; `start_span` and the
+  `traced` decorator open child spans. The current span lives in a
+  contextvar, so it follows awaits, tasks and `run_in_threadpool` calls.
+- Finished spans are batched and exported as OTLP/JSON
+  (`ExportTraceServiceRequest`), either appended one batch per line to a local
+  file or POSTed to an OTLP/HTTP collector such as `benchmarks/trace_collector.py`.
+
+When tracing is disabled, the middleware is not installed and spans cost a
+single flag check.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "ai-service"
+
+TRACEPARENT_HEADER = "traceparent"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Spans kept while the exporter is behind; older spans are dropped first.
+MAX_BUFFERED_SPANS = 10000
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Parses a W3C traceparent header into (trace_id, parent_span_id, sampled), or None."""
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """
+    A timed operation within a trace.
+
+    Attributes:
+        name (str): Operation name
+        trace_id (str): 32 hex characters, shared by every span of the trace
+        span_id (str): 16 hex characters
+        parent_span_id (Optional[str]): Span ID of the caller, if any
+        sampled (bool): Whether the span is exported
+    """
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id", "sampled", "kind",
+        "start_ns", "end_ns", "attributes", "status_code", "status_message",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], sampled: bool, kind: int):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.status_code = STATUS_OK
+        self.status_message: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:500]
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class OTLPJsonExporter:
+    """
+    Buffers finished spans and writes them out from a background thread every
+    `interval_seconds`, or sooner once `batch_size` spans are waiting.
+
+    Attributes:
+        target (str): "file" to append to `file_path`, "otlp" to POST to `endpoint`
+        file_path (str): JSON-lines file, one ExportTraceServiceRequest per line
+        endpoint (str): OTLP/HTTP traces URL, e.g. http://localhost:4318/v1/traces
+    """
+
+    def __init__(self, service_name: str, target: str, file_path: str, endpoint: str,
+                 batch_size: int = 512, interval_seconds: float = 5.0):
+        self.service_name = service_name
+        self.target = target
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self._spans: deque = deque(maxlen=MAX_BUFFERED_SPANS)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen:
+                self.dropped += 1
+            self._spans.append(span)
+            pending = len(self._spans)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            spans = list(self._spans)
+            self._spans.clear()
+        if not spans:
+            return
+        body = json.dumps(self._payload(spans), separators=(",", ":"))
+        try:
+            if self.target == "otlp":
+                request = urllib.request.Request(
+                    self.endpoint, data=body.encode("utf-8"), headers={"Content-Type": "application/json"}
+                )
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    response.read()
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+                with open(self.file_path, "a", encoding="utf-8") as trace_file:
+                    trace_file.write(body + "\n")
+            self.exported += len(spans)
+        except Exception as e:
+            self.dropped += len(spans)
+            logger.warning(f"Could not export {len(spans)} spans to {self.target}: {e}")
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+
+class Tracer:
+    """Creates spans and hands sampled, finished spans to the exporter."""
+
+    def __init__(self, enabled: bool, sample_ratio: float, exporter: Optional[OTLPJsonExporter]):
+        self.enabled = enabled and exporter is not None
+        self.sample_ratio = sample_ratio
+        self.exporter = exporter
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Runs the block inside a new span, a child of the current span or of
+        `traceparent` if given. Yields the span, or None when tracing is off.
+        Exceptions are recorded on the span and re-raised.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = self._current.get()
+        remote = parse_traceparent(traceparent) if parent is None else None
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind)
+        elif remote is not None:
+            span = Span(name, remote[0], remote[1], remote[2], kind)
+        else:
+            span = Span(name, _new_id(128), None, random.random() < self.sample_ratio, kind)
+        if attributes:
+            span.attributes.update(attributes)
+
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end_ns = time.time_ns()
+            if span.sampled:
+                self.exporter.export(span)
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator that runs each call of a sync or async function in its own span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with self.start_span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.start_span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def _build_exporter() -> Optional[OTLPJsonExporter]:
+    target = settings.TRACING_EXPORTER.lower()
+    if target not in ("file", "otlp"):
+        if target != "none":
+            logger.warning(f"Unknown TRACING_EXPORTER '{settings.TRACING_EXPORTER}'; tracing is disabled.")
+        return None
+    return OTLPJsonExporter(
+        service_name=SERVICE_NAME,
+        target=target,
+        file_path=settings.TRACING_FILE_PATH,
+        endpoint=settings.TRACING_OTLP_ENDPOINT,
+        interval_seconds=settings.TRACING_EXPORT_INTERVAL_SECONDS,
+    )
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    sample_ratio=settings.TRACING_SAMPLE_RATIO,
+    exporter=_build_exporter() if settings.TRACING_ENABLED else None,
+)
+start_span = tracer.start_span
+traced = tracer.traced
+
+
+def set_span_attribute(key: str, value: Any) -> None:
+    """Sets an attribute on the current span, if there is one."""
+    span = tracer.current_span()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def current_traceparent() -> Optional[str]:
+    """The traceparent header value to send on outgoing calls, if a span is active."""
+    span = tracer.current_span()
+    return span.traceparent if span is not None else None
+
+
+class TracingMiddleware:
+    """ASGI middleware that runs each HTTP request in a server span."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for header_name, header_value in scope.get("headers", []):
+            if header_name == TRACEPARENT_HEADER.encode("latin-1"):
+                traceparent = header_value.decode("latin-1")
+                break
+
+        with start_span(scope["method"], kind=SPAN_KIND_SERVER, traceparent=traceparent) as span:
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope.get("path", ""))
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status_code = STATUS_ERROR
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (TRACEPARENT_HEADER.encode("latin-1"), span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.route", route)
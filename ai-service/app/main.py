@@ -1,10 +1,29 @@
 import logging
+import random
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.api.v1.api import api_v1_router
+from app.core.dependencies import init_minio_client, close_minio_client
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics_registry, sample_threadpool
+from app.core.tracing import TracingMiddleware, tracer
+from app.core.security import verified_token_cache
+from app.services.pdf_extractor import pdf_parse_engine, pdf_extractor_service
+from app.services.text_cache import extracted_text_cache
+from app.services.llm_cache import llm_response_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.storage import storage_service, StorageError
+from app.services.job_queue import generation_job_queue
+from app.services.document_session import document_session_store
+from app.services.relevance_retriever import retrieval_index_cache
+from app.services.text_compactor import compacted_text_cache
+from app.services.eval_client import eval_service_client
+from app.api.v1.endpoints.jobs import run_generation_job
 
 from fastapi import Request, Response
 import logging
@@ -18,9 +37,29 @@ logger = logging.getLogger("ai-service")
 
 logger.info(f"Initializing {settings.PROJECT_NAME}...")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    minio_client = init_minio_client()
+    try:
+        await storage_service.ensure_bucket(minio_client)
+    except StorageError as e:
+        # Not fatal: the check is retried on the first upload.
+        logger.error(f"Startup bucket verification failed: {e}")
+    generation_job_queue.start(settings.JOB_WORKERS, run_generation_job)
+    yield
+    logger.info(f"Shutting down {settings.PROJECT_NAME}...")
+    await generation_job_queue.stop()
+    await document_session_store.close_all()
+    await eval_service_client.aclose()
+    pdf_parse_engine.shutdown()
+    close_minio_client()
+    if tracer.exporter is not None:
+        tracer.exporter.shutdown()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -31,12 +70,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
+_REDACTED_HEADERS = {"authorization", "cookie"}
+
 async def log_headers_middleware(request: Request, call_next):
-    # Log headers before processing request
-    logger.info(f"Incoming Headers for {request.url.path}: {dict(request.headers)}")
-    response = await call_next(request)
-    return response
+    # Sampled, DEBUG-only header logging for troubleshooting the gateway hop.
+    if random.random() < settings.HEADER_LOG_SAMPLE_RATE:
+        headers = {
+            name: ("<redacted>" if name in _REDACTED_HEADERS else value)
+            for name, value in request.headers.items()
+        }
+        logger.debug(f"Incoming Headers for {request.url.path}: {headers}")
+    return await call_next(request)
+
+# Only installed when it can log anything, so normal requests skip it entirely.
+if settings.HEADER_LOG_SAMPLE_RATE > 0 and logger.isEnabledFor(logging.DEBUG):
+    app.middleware("http")(log_headers_middleware)
 
 @app.get("/", tags=["Health Check"])
 async def read_root():
@@ -48,6 +102,24 @@ async def health_check():
     logger.debug("Health endpoint '/health' accessed.")
     return {"status": "ok", "service": settings.PROJECT_NAME}
 
+if settings.METRICS_ENABLED:
+    metrics_registry.register_stats("text_cache", extracted_text_cache.stats)
+    metrics_registry.register_stats("extraction_memory", pdf_extractor_service.memory_stats.stats)
+    metrics_registry.register_stats("llm_cache", llm_response_cache.stats)
+    metrics_registry.register_stats("llm_scheduler", llm_scheduler.stats)
+    metrics_registry.register_stats("job_queue", generation_job_queue.stats)
+    metrics_registry.register_stats("document_sessions", document_session_store.stats)
+    metrics_registry.register_stats("retrieval_index_cache", retrieval_index_cache.stats)
+    metrics_registry.register_stats("compacted_text_cache", compacted_text_cache.stats)
+    metrics_registry.register_stats("eval_service_client", eval_service_client.stats)
+    metrics_registry.register_stats("jwt_cache", verified_token_cache.stats)
+
+    @app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+    async def metrics():
+        sample_threadpool()
+        body = await run_in_threadpool(metrics_registry.render)
+        return PlainTextResponse(body, media_type=CONTENT_TYPE)
+
 logger.info(f"Including API V1 router with prefix: {settings.API_V1_STR}")
 app.include_router(api_v1_router, prefix=settings.API_V1_STR)
 
@@ -1,20 +1,60 @@
 # backend/app/schemas/__init__.py
 
-from .document import DocumentUploadResponse
+from .document import (
+    DocumentUploadResponse,
+    DocumentExtractionStatusResponse,
+    ExtractionMemoryStatsResponse,
+    TextCacheStatsResponse,
+)
 from .ticket import (
     PriorityEnum,
+    ContextModeEnum,
     TicketGenerateRequest,
     GeneratedTicketData,
     TicketGenerateResponse,
+    TicketEvaluation,
+    TicketGenerateAndEvaluateResponse,
+    MultiTicketGenerateRequest,
+    SourcePageRange,
+    SourcedTicket,
+    ChunkFailure,
+    MultiTicketGenerateResponse,
+)
+from .job import JobEnqueueResponse, JobStatusResponse, JobQueueStatsResponse
+from .session import (
+    DocumentSessionCreateRequest,
+    DocumentSessionResponse,
+    SessionTicketGenerateRequest,
+    SessionTicketGenerateResponse,
 )
 # Add the new LLM schema
-from .llm import AIProcessingResponse
+from .llm import AIProcessingResponse, MultiTicketProcessingResponse, LLMCacheStatsResponse
 
 __all__ = [
     "DocumentUploadResponse",
+    "DocumentExtractionStatusResponse",
+    "ExtractionMemoryStatsResponse",
+    "TextCacheStatsResponse",
     "PriorityEnum",
+    "ContextModeEnum",
     "TicketGenerateRequest",
     "GeneratedTicketData",
     "TicketGenerateResponse",
+    "TicketEvaluation",
+    "TicketGenerateAndEvaluateResponse",
+    "MultiTicketGenerateRequest",
+    "SourcePageRange",
+    "SourcedTicket",
+    "ChunkFailure",
+    "MultiTicketGenerateResponse",
+    "JobEnqueueResponse",
+    "JobStatusResponse",
+    "JobQueueStatsResponse",
+    "DocumentSessionCreateRequest",
+    "DocumentSessionResponse",
+    "SessionTicketGenerateRequest",
+    "SessionTicketGenerateResponse",
     "AIProcessingResponse",
+    "MultiTicketProcessingResponse",
+    "LLMCacheStatsResponse",
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field 
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 class DocumentUploadResponse(BaseModel):
@@ -26,3 +27,74 @@ class DocumentUploadResponse(BaseModel):
         description="Timestamp of when the document was uploaded",
         example="2023-10-19T14:30:00Z"
     )
+
+class TextCacheStatsResponse(BaseModel):
+    """
+    Schema for the extracted text cache counters.
+
+    Attributes:
+        memory_hits (int): Lookups served from the in-process LRU by document ID
+        content_hits (int): Lookups served from the LRU after hashing downloaded content
+        sidecar_hits (int): Lookups served from the `<uuid>.txt` sidecar in MinIO
+        misses (int): Lookups that required a full fitz parse
+        hit_ratio (float): Share of lookups that skipped the fitz parse
+        evictions (int): Entries evicted from the LRU to stay within its size bound
+        entries (int): Entries currently held in memory
+        current_bytes (int): UTF-8 size of the texts currently held in memory
+        max_bytes (int): Configured size bound of the in-memory tier
+    """
+    memory_hits: int = Field(..., description="Lookups served from the in-process LRU by document ID")
+    content_hits: int = Field(..., description="Lookups served from the LRU after hashing downloaded content")
+    sidecar_hits: int = Field(..., description="Lookups served from the `<uuid>.txt` sidecar in MinIO")
+    misses: int = Field(..., description="Lookups that required a full fitz parse")
+    hit_ratio: float = Field(..., description="Share of lookups that skipped the fitz parse")
+    evictions: int = Field(..., description="Entries evicted from the LRU to stay within its size bound")
+    entries: int = Field(..., description="Entries currently held in memory")
+    current_bytes: int = Field(..., description="UTF-8 size of the texts currently held in memory")
+    max_bytes: int = Field(..., description="Configured size bound of the in-memory tier")
+
+class DocumentExtractionStatusResponse(BaseModel):
+    """
+    Schema for the status of the background text extraction of a document.
+
+    Attributes:
+        document_id (UUID): Unique identifier of the document
+        status (str): "running", "completed", "failed" or "unknown"
+        started_at (Optional[datetime]): When extraction was scheduled
+        finished_at (Optional[datetime]): When extraction completed or failed
+        duration_ms (Optional[float]): Extraction wall time in milliseconds
+        error (Optional[str]): Failure details, if any
+    """
+    document_id: UUID = Field(..., description="Unique identifier of the document")
+    status: str = Field(
+        ...,
+        examples=["running", "completed", "failed", "unknown"],
+        description="State of the background extraction job"
+    )
+    started_at: Optional[datetime] = Field(None, description="When extraction was scheduled")
+    finished_at: Optional[datetime] = Field(None, description="When extraction completed or failed")
+    duration_ms: Optional[float] = Field(None, description="Extraction wall time in milliseconds")
+    error: Optional[str] = Field(None, description="Failure details, if any")
+
+class ExtractionMemoryStatsResponse(BaseModel):
+    """
+    Schema for the memory figures of PDFs fetched from storage for extraction.
+
+    Attributes:
+        extractions (int): Extractions that downloaded the PDF from MinIO
+        spooled_to_disk (int): Extractions whose PDF was spooled to a temporary file
+        last_buffered_bytes (int): PDF bytes held in memory by the most recent extraction (the per-request figure)
+        max_buffered_bytes (int): Largest number of PDF bytes held in memory by one extraction
+        last_rss_delta_bytes (Optional[int]): Process RSS change across the most recent extraction
+        max_rss_delta_bytes (Optional[int]): Largest process RSS change across one extraction
+    """
+    extractions: int = Field(..., description="Extractions that downloaded the PDF from MinIO")
+    spooled_to_disk: int = Field(..., description="Extractions whose PDF was spooled to a temporary file")
+    last_buffered_bytes: int = Field(..., description="PDF bytes held in memory by the most recent extraction; the per-request memory figure")
+    max_buffered_bytes: int = Field(..., description="Largest number of PDF bytes held in memory by one extraction")
+    last_rss_delta_bytes: Optional[int] = Field(
+        None,
+        description="Change in this process's RSS across the most recent extraction. Process-wide: it includes "
+                    "concurrent requests and excludes parses run in worker processes; not a peak"
+    )
+    max_rss_delta_bytes: Optional[int] = Field(None, description="Largest process RSS change across one extraction (see last_rss_delta_bytes)")
@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from .ticket import TicketGenerateResponse
+
+class JobEnqueueResponse(BaseModel):
+    """
+    Schema for the response after queueing a ticket generation job.
+    
+    Attributes:
+        job_id (UUID): Identifier to poll the job with
+        status (str): Initial job status, always "queued"
+        enqueued_at (datetime): When the job was queued
+    """
+    job_id: UUID = Field(..., example="0b6f6a0e-3f0c-4b8e-9d7e-2a41b1c1f4aa", description="Identifier to poll the job with")
+    status: str = Field(..., example="queued", description="Initial job status")
+    enqueued_at: datetime = Field(..., description="When the job was queued")
+
+class JobStatusResponse(BaseModel):
+    """
+    Schema for the status of a ticket generation job.
+    
+    Attributes:
+        job_id (UUID): The job's identifier
+        status (str): One of queued, running, succeeded, failed
+        document_id (UUID): The document being processed
+        enqueued_at / started_at / finished_at (datetime): Lifecycle timestamps
+        result (Optional[TicketGenerateResponse]): The generated ticket, once succeeded
+        error_status_code (Optional[int]): HTTP status the synchronous endpoint would have returned, once failed
+        error_detail (Optional[str]): Why the job failed
+    """
+    job_id: UUID = Field(..., description="The job's identifier")
+    status: str = Field(..., examples=["queued", "running", "succeeded", "failed"], description="Current job status")
+    document_id: UUID = Field(..., description="The document being processed")
+    enqueued_at: datetime = Field(..., description="When the job was queued")
+    started_at: Optional[datetime] = Field(None, description="When a worker picked the job up")
+    finished_at: Optional[datetime] = Field(None, description="When the job finished")
+    result: Optional[TicketGenerateResponse] = Field(None, description="The generated ticket, once the job has succeeded")
+    error_status_code: Optional[int] = Field(None, description="HTTP status the synchronous endpoint would have returned")
+    error_detail: Optional[str] = Field(None, description="Why the job failed")
+
+class JobQueueStatsResponse(BaseModel):
+    """
+    Schema for the generation job queue metrics.
+    """
+    backend: str = Field(..., examples=["memory", "sqlite"], description="The configured queue backend")
+    workers: int = Field(..., description="Number of running worker tasks")
+    queue_depth: int = Field(..., description="Jobs waiting for a worker")
+    running: int = Field(..., description="Jobs currently being processed")
+    enqueued_total: int = Field(..., description="Jobs queued since start-up")
+    succeeded_total: int = Field(..., description="Jobs that succeeded since start-up")
+    failed_total: int = Field(..., description="Jobs that failed since start-up")
+    rejected_total: int = Field(..., description="Enqueue attempts rejected because the queue was full")
+    wait_seconds_avg: float = Field(..., description="Mean time from enqueue to pick-up over recent jobs")
+    wait_seconds_p95: float = Field(..., description="95th percentile time from enqueue to pick-up over recent jobs")
+    wait_seconds_max: float = Field(..., description="Longest time from enqueue to pick-up over recent jobs")
+    run_seconds_avg: float = Field(..., description="Mean processing time over recent jobs")
+    run_seconds_p95: float = Field(..., description="95th percentile processing time over recent jobs")
@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, Any, Dict, List
 from uuid import UUID
 
-from .ticket import GeneratedTicketData
+from .ticket import GeneratedTicketData, SourcedTicket, ChunkFailure
 
 class AIProcessingResponse(BaseModel):
     """
@@ -18,6 +18,35 @@ class AIProcessingResponse(BaseModel):
     model_used: str = Field(..., examples=["gemini-2.0-flash"], description="The identifier of the AI model used for generation.")
     error_message: Optional[str] = Field(None, description="Details about any error that occurred during processing or validation.")
     raw_llm_output: Optional[str] = Field(None, description="The raw string output received from the LLM before parsing/validation.")
+    cache_hit: bool = Field(False, description="True if the response was served from the LLM response cache.")
+    repaired: bool = Field(False, description="True if the LLM output failed validation and was fixed by a one-shot repair call.")
+    prompt_tokens: Optional[int] = Field(None, description="Estimated prompt tokens of the generation (document sessions only).")
+    cached_prompt_tokens: Optional[int] = Field(None, description="Prompt tokens served from the provider's prompt cache (document sessions only).")
+    latency_ms: Optional[float] = Field(None, description="Time the generation took, including any repair call (document sessions only).")
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MultiTicketProcessingResponse(BaseModel):
+    """
+    Schema for the merged result of chunked (map-reduce) ticket generation.
+    """
+    tickets: List[SourcedTicket] = Field(default_factory=list, description="De-duplicated tickets in document order.")
+    chunk_count: int = Field(..., description="Number of chunks processed.")
+    cached_chunks: int = Field(0, description="Chunks answered from the LLM response cache.")
+    failed_chunks: List[ChunkFailure] = Field(default_factory=list, description="Chunks that produced no usable output.")
+    model_used: str = Field(..., examples=["gemini-2.0-flash"], description="The identifier of the AI model used for generation.")
+
+class LLMCacheStatsResponse(BaseModel):
+    """
+    Schema for the LLM response cache counters.
+    """
+    backend: str = Field(..., examples=["memory", "sqlite", "none"], description="The configured cache backend.")
+    hits: int = Field(..., description="Generations answered from the cache.")
+    misses: int = Field(..., description="Cache lookups that required an LLM call.")
+    bypassed: int = Field(..., description="Generations that skipped the cache at the caller's request.")
+    stores: int = Field(..., description="Validated responses written to the cache.")
+    hit_ratio: float = Field(..., description="hits / (hits + misses).")
+    evictions: int = Field(..., description="Entries dropped because of TTL expiry or size limits.")
+    entries: int = Field(..., description="Entries currently cached.")
+    size_bytes: int = Field(..., description="Size of the cached payloads in bytes.")
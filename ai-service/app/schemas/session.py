@@ -0,0 +1,84 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from .ticket import TicketGenerateResponse
+
+class DocumentSessionCreateRequest(BaseModel):
+    """
+    Schema for registering a document for repeated generations.
+
+    Attributes:
+        document_id (UUID): The previously uploaded document to register
+    """
+    document_id: UUID = Field(
+        ...,
+        example="f47ac10b-58cc-4372-a567-0e02b2c3d479",
+        description="Unique identifier of the document to register"
+    )
+
+class DocumentSessionResponse(BaseModel):
+    """
+    Schema for a document session and the usage of its generations.
+
+    Attributes:
+        session_id (UUID): Identifier to generate against
+        document_id (UUID): The registered document
+        cache_mode (str): "provider" (Gemini cached content) or "prefix" (stable prompt prefix)
+        document_tokens (int): Estimated tokens of the document
+        created_at / expires_at (datetime): Session lifetime
+        generations (int): Generations run in the session
+        prompt_tokens_sent (int): Prompt tokens sent and not served from a cache
+        cached_tokens (int): Prompt tokens served from the provider's cache
+        baseline_tokens (int): Prompt tokens the same generations would have sent without a session
+        tokens_saved (int): baseline_tokens - prompt_tokens_sent
+        latency_ms_avg (float): Mean generation latency
+        latency_ms_last (Optional[float]): Latency of the latest generation
+    """
+    session_id: UUID = Field(..., description="Identifier to generate against")
+    document_id: UUID = Field(..., description="The registered document")
+    cache_mode: str = Field(..., examples=["provider", "prefix"], description="How the document is held between generations")
+    document_tokens: int = Field(..., description="Estimated tokens of the document (characters / 4)")
+    created_at: datetime = Field(..., description="When the session was created")
+    expires_at: datetime = Field(..., description="When the session and its cached content expire")
+    generations: int = Field(0, description="Generations run in the session")
+    prompt_tokens_sent: int = Field(0, description="Prompt tokens sent and not served from a cache")
+    cached_tokens: int = Field(0, description="Prompt tokens served from the provider's prompt cache")
+    baseline_tokens: int = Field(0, description="Prompt tokens the same generations would have sent without a session")
+    tokens_saved: int = Field(0, description="baseline_tokens minus prompt_tokens_sent")
+    latency_ms_avg: float = Field(0.0, description="Mean generation latency in milliseconds")
+    latency_ms_last: Optional[float] = Field(None, description="Latency of the latest generation in milliseconds")
+
+class SessionTicketGenerateRequest(BaseModel):
+    """
+    Schema for a generation against a document session.
+
+    Attributes:
+        system_prompt (str): Instructions for the LLM to extract ticket information
+        bypass_cache (bool): Skip the LLM response cache for this request
+    """
+    system_prompt: str = Field(
+        ...,
+        example="Extract the main requirement title, a detailed description including acceptance criteria, and assign a priority (High, Medium, Low). Format as JSON with keys 'title', 'description', 'priority'.",
+        description="Instructions for the LLM to extract ticket information"
+    )
+    bypass_cache: bool = Field(
+        False,
+        description="If true, always call the LLM instead of reusing a cached response for identical inputs"
+    )
+
+class SessionTicketGenerateResponse(TicketGenerateResponse):
+    """
+    Schema for a ticket generated in a document session.
+
+    Attributes:
+        session_id (UUID): The session the ticket was generated in
+        prompt_tokens (int): Estimated prompt tokens of the generation
+        cached_prompt_tokens (int): Prompt tokens served from the provider's cache
+        latency_ms (float): Time the generation took
+    """
+    session_id: UUID = Field(..., description="The session the ticket was generated in")
+    prompt_tokens: int = Field(0, description="Estimated prompt tokens of the generation, cached or not")
+    cached_prompt_tokens: int = Field(0, description="Prompt tokens served from the provider's prompt cache")
+    latency_ms: float = Field(0.0, description="Time the generation took in milliseconds, including any repair call")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 from uuid import UUID
 
@@ -9,6 +9,11 @@ class PriorityEnum(str, Enum):
     MEDIUM = "Medium"
     LOW = "Low"
 
+class ContextModeEnum(str, Enum):
+    """Enumeration for how much of the document is sent to the LLM."""
+    FULL = "full"
+    RETRIEVAL = "retrieval"
+
 class TicketGenerateRequest(BaseModel):
     """
     Schema for ticket generation request.
@@ -16,6 +21,8 @@ class TicketGenerateRequest(BaseModel):
     Attributes:
         document_id (UUID): Unique identifier for the document to process
         system_prompt (str): Instructions for the LLM to extract ticket information
+        bypass_cache (bool): Skip the LLM response cache for this request
+        context_mode (ContextModeEnum): Send the full document, or only the sections relevant to the prompt
     """
     document_id: UUID = Field(
         ..., 
@@ -27,6 +34,15 @@ class TicketGenerateRequest(BaseModel):
         example="Extract the main requirement title, a detailed description including acceptance criteria, and assign a priority (High, Medium, Low). Format as JSON with keys 'title', 'description', 'priority'.",
         description="Instructions for the LLM to extract ticket information"
     )
+    bypass_cache: bool = Field(
+        False,
+        description="If true, always call the LLM instead of reusing a cached response for identical inputs"
+    )
+    context_mode: ContextModeEnum = Field(
+        ContextModeEnum.FULL,
+        description="'full' sends the whole document; 'retrieval' sends only the page/section chunks that best "
+                    "match the system prompt (ranked locally with BM25), for narrow prompts on large documents"
+    )
 
 class GeneratedTicketData(BaseModel):
     """
@@ -61,6 +77,8 @@ class TicketGenerateResponse(BaseModel):
         generated_json (GeneratedTicketData): Structured ticket data generated by the LLM
         llm_raw_output (Optional[str]): Raw output from the LLM for debugging
         document_id (UUID): ID of the processed document
+        cache_hit (bool): Whether the LLM response was served from the cache
+        repaired (bool): Whether invalid LLM output was fixed by a repair call
     """
     generated_json: GeneratedTicketData = Field(
         ...,
@@ -76,3 +94,109 @@ class TicketGenerateResponse(BaseModel):
         example="f47ac10b-58cc-4372-a567-0e02b2c3d479",
         description="The ID of the document processed to generate this ticket"
     )
+    cache_hit: bool = Field(
+        False,
+        description="True if the LLM response was served from the response cache"
+    )
+    repaired: bool = Field(
+        False,
+        description="True if the LLM output failed validation and was fixed by a one-shot repair call"
+    )
+
+class TicketEvaluation(BaseModel):
+    """
+    Schema for eval-service's verdict on a generated ticket.
+    
+    Attributes:
+        is_valid (bool): Whether the ticket meets the prompt's criteria
+        evaluation_reasoning (Optional[str]): The evaluator's explanation
+        cache_status (Optional[str]): eval-service's verdict cache status (HIT, MISS, BYPASS, or LOCAL when its pre-check rejected the ticket)
+    """
+    is_valid: bool = Field(..., description="The evaluator's verdict")
+    evaluation_reasoning: Optional[str] = Field(None, description="Why the evaluator reached its verdict")
+    cache_status: Optional[str] = Field(None, example="MISS", description="eval-service's verdict cache status")
+
+class TicketGenerateAndEvaluateResponse(TicketGenerateResponse):
+    """
+    Schema for a generated ticket together with its evaluation.
+    
+    Attributes:
+        evaluation (Optional[TicketEvaluation]): eval-service's verdict; None if the evaluation failed
+        evaluation_error (Optional[str]): Why the evaluation failed, if it did
+        evaluation_latency_ms (float): Time spent on the eval-service call
+    """
+    evaluation: Optional[TicketEvaluation] = Field(
+        None,
+        description="eval-service's verdict on `generated_json`; None if the evaluation failed, in which case the ticket is still returned"
+    )
+    evaluation_error: Optional[str] = Field(None, description="Why the evaluation failed, if it did")
+    evaluation_latency_ms: float = Field(0.0, description="Time spent on the eval-service call, in milliseconds")
+
+class MultiTicketGenerateRequest(TicketGenerateRequest):
+    """
+    Schema for chunked (map-reduce) ticket generation.
+    
+    Attributes:
+        max_chunk_tokens (Optional[int]): Token budget per chunk; the server default applies when omitted
+    """
+    max_chunk_tokens: Optional[int] = Field(
+        None,
+        ge=256,
+        le=100000,
+        description="Approximate token budget (characters / 4) of each document chunk sent to the LLM"
+    )
+
+class SourcePageRange(BaseModel):
+    """
+    Schema for the pages a ticket was generated from.
+    
+    Attributes:
+        start_page (int): First page, 1-based
+        end_page (int): Last page, 1-based and inclusive
+    """
+    start_page: int = Field(..., ge=1, example=3, description="First source page (1-based)")
+    end_page: int = Field(..., ge=1, example=5, description="Last source page (1-based, inclusive)")
+
+class SourcedTicket(BaseModel):
+    """
+    Schema for a ticket generated from part of a document.
+    
+    Attributes:
+        ticket (GeneratedTicketData): The validated ticket
+        source_pages (List[SourcePageRange]): Page ranges of the chunks the ticket was generated from
+    """
+    ticket: GeneratedTicketData = Field(..., description="The validated ticket data")
+    source_pages: List[SourcePageRange] = Field(
+        ...,
+        description="Page ranges the ticket was generated from; more than one if several chunks produced the same ticket"
+    )
+
+class ChunkFailure(BaseModel):
+    """
+    Schema for a document chunk whose LLM call produced no usable tickets.
+    
+    Attributes:
+        chunk_index (int): Position of the chunk in the document
+        source_pages (SourcePageRange): Pages covered by the chunk
+        error_message (str): Why the chunk failed
+    """
+    chunk_index: int = Field(..., description="Position of the chunk in the document, starting at 0")
+    source_pages: SourcePageRange = Field(..., description="Pages covered by the chunk")
+    error_message: str = Field(..., description="Why the chunk failed")
+
+class MultiTicketGenerateResponse(BaseModel):
+    """
+    Schema for chunked ticket generation response.
+    
+    Attributes:
+        document_id (UUID): ID of the processed document
+        tickets (List[SourcedTicket]): Merged, de-duplicated tickets in document order
+        chunk_count (int): Number of chunks the document was split into
+        cached_chunks (int): Chunks answered from the LLM response cache
+        failed_chunks (List[ChunkFailure]): Chunks that produced no usable output
+    """
+    document_id: UUID = Field(..., description="The ID of the processed document")
+    tickets: List[SourcedTicket] = Field(default_factory=list, description="Generated tickets in document order")
+    chunk_count: int = Field(..., description="Number of chunks the document was split into")
+    cached_chunks: int = Field(0, description="Chunks answered from the LLM response cache")
+    failed_chunks: List[ChunkFailure] = Field(default_factory=list, description="Chunks that produced no usable output")
@@ -0,0 +1,160 @@
+"""
+Document Chunker Module
+
+Splits extracted document text into chunks that fit a token budget, for
+map-reduce ticket generation over long requirement specs.
+
+Chunks are cut along page boundaries (the separator the PDF extractor puts
+between pages) and, when a single page is over budget, along section and
+paragraph boundaries within it. Each chunk remembers the pages it came from.
+
+Token counts are estimated as characters / 4, which is close enough for
+Gemini-style tokenizers on English prose and needs no tokenizer dependency.
+"""
+
+import math
+import re
+from typing import List, Tuple
+
+from app.services.pdf_parse_engine import PAGE_SEPARATOR
+
+CHARS_PER_TOKEN = 4
+
+# Numbered headings ("3.", "4.2 Login") and markdown-style headings start a new section.
+_SECTION_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+\S|#{1,6}\s+\S)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns a rough token count for `text` (characters / 4, rounded up)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_text_pages(text: str) -> int:
+    """Returns the number of pages with text in an extracted document."""
+    return sum(1 for page_text in text.split(PAGE_SEPARATOR) if page_text.strip())
+
+
+class DocumentChunk:
+    """
+    A contiguous part of a document's extracted text.
+
+    Attributes:
+        index (int): Position of the chunk in the document, starting at 0
+        text (str): The chunk's text
+        start_page (int): First source page, 1-based
+        end_page (int): Last source page, 1-based and inclusive
+    """
+
+    def __init__(self, index: int, text: str, start_page: int, end_page: int):
+        self.index = index
+        self.text = text
+        self.start_page = start_page
+        self.end_page = end_page
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+def _split_sections(page_text: str) -> List[str]:
+    """Splits a page into sections at headings, falling back to paragraphs."""
+    sections: List[str] = []
+    current: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", page_text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and _SECTION_HEADING.match(paragraph):
+            sections.append("\n\n".join(current))
+            current = []
+        current.append(paragraph)
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+
+def _hard_split(text: str, max_chars: int) -> List[str]:
+    """Splits text over `max_chars` at line breaks, or mid-line as a last resort."""
+    pieces: List[str] = []
+    current = ""
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _page_pieces(page_text: str, max_chars: int) -> List[str]:
+    """Returns the page whole if it fits, otherwise budget-sized runs of its sections."""
+    if len(page_text) <= max_chars:
+        return [page_text]
+
+    pieces: List[str] = []
+    current = ""
+    for section in _split_sections(page_text):
+        for part in ([section] if len(section) <= max_chars else _hard_split(section, max_chars)):
+            candidate = f"{current}\n\n{part}" if current else part
+            if len(candidate) > max_chars:
+                pieces.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_document(text: str, max_tokens: int) -> List[DocumentChunk]:
+    """
+    Packs whole pages into chunks of at most `max_tokens` estimated tokens.
+
+    Pages are never split unless a single page exceeds the budget, in which case
+    it is cut at section or paragraph boundaries. Page numbers count the pages
+    present in the extracted text; pages without any text are not part of it.
+
+    Args:
+        text (str): Extracted document text, pages joined with the page separator
+        max_tokens (int): Token budget per chunk
+
+    Returns:
+        List[DocumentChunk]: The chunks in document order; empty for blank text.
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    pieces: List[Tuple[int, str]] = []
+    for page_number, page_text in enumerate(text.split(PAGE_SEPARATOR), start=1):
+        page_text = page_text.strip()
+        if page_text:
+            pieces.extend((page_number, piece) for piece in _page_pieces(page_text, max_chars))
+
+    chunks: List[DocumentChunk] = []
+    parts: List[str] = []
+    size = 0
+    start_page = end_page = 0
+    for page_number, piece in pieces:
+        joiner = PAGE_SEPARATOR if page_number != end_page else "\n\n"
+        added = len(piece) + (len(joiner) if parts else 0)
+        if parts and size + added > max_chars:
+            chunks.append(DocumentChunk(len(chunks), "".join(parts), start_page, end_page))
+            parts, size = [], 0
+            added = len(piece)
+        if not parts:
+            start_page = page_number
+        else:
+            parts.append(joiner)
+        parts.append(piece)
+        size += added
+        end_page = page_number
+    if parts:
+        chunks.append(DocumentChunk(len(chunks), "".join(parts), start_page, end_page))
+    return chunks
@@ -0,0 +1,287 @@
+"""
+Document Session Module
+
+Lets a client register a document's extracted text once and then iterate on
+the system prompt against it, without resending the document on every call.
+
+Each session holds the document in one of two ways:
+- "provider": the document is Gemini cached content (LLM_PROVIDER=gemini,
+  DOCUMENT_SESSION_PROVIDER_CACHE and at least DOCUMENT_SESSION_CACHE_MIN_TOKENS
+  tokens). Each generation sends only the new instructions.
+- "prefix": every generation sends the same system message and document
+  message first, with the instructions last. The unchanged prefix is what
+  implicit prompt caching (and the synthetic model's prefix cache) reuses.
+
+Sessions expire DOCUMENT_SESSION_TTL_SECONDS after creation, together with
+their cached content, and each one counts the tokens it sent, the prompt
+tokens served from a cache and the latency of its generations.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import document_session_tokens
+from app.services.llm_provider import CHARS_PER_TOKEN, create_context_cache, delete_context_cache, supports_context_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODE_PROVIDER = "provider"
+CACHE_MODE_PREFIX = "prefix"
+
+# The stable head of every session prompt; the caller's instructions always come after the document.
+SESSION_SYSTEM_PROMPT = """You turn requirements documents into software tickets.
+The document is provided once in this conversation. Follow the instructions in the last message for every answer."""
+
+
+class DocumentSessionNotFoundError(LookupError):
+    """Raised when a session does not exist, has expired or belongs to another user."""
+    pass
+
+
+def document_message_text(text: str) -> str:
+    return f"Document content:\n\n---\n\n{text}\n\n---"
+
+
+def instructions_message_text(system_prompt: str) -> str:
+    return f"Instructions:\n{system_prompt}\n\nProcess the document above based on these instructions."
+
+
+class DocumentSession:
+    """
+    A registered document and the usage of the generations run against it.
+
+    Attributes:
+        session_id (UUID): Identifier returned to the client
+        owner (str): Subject of the JWT that created the session
+        document_id (UUID): The document the text was extracted from
+        text (str): The extracted text
+        prefix_messages (List[BaseMessage]): The system and document messages, built once
+        document_tokens (int): Estimated tokens of the document message
+        cache_mode (str): "provider" or "prefix"
+        cached_content (Optional[str]): Gemini cached-content name, in "provider" mode
+        created_at, expires_at (float): Epoch timestamps
+        generations (int): Generations run, including response-cache hits
+        prompt_tokens_sent (int): Prompt tokens sent and not served from a cache
+        cached_tokens (int): Prompt tokens served from the provider's cache
+        baseline_tokens (int): Prompt tokens the same prompts would have sent without a session
+        latency_seconds_total (float): Summed generation latency
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        document_id: UUID,
+        text: str,
+        ttl_seconds: float,
+        cache_mode: str = CACHE_MODE_PREFIX,
+        cached_content: Optional[str] = None,
+    ):
+        self.session_id = uuid4()
+        self.owner = owner
+        self.document_id = document_id
+        self.text = text
+        self.prefix_messages: List[BaseMessage] = [
+            SystemMessage(content=SESSION_SYSTEM_PROMPT),
+            HumanMessage(content=document_message_text(text)),
+        ]
+        self.document_tokens = math.ceil(len(self.prefix_messages[1].content) / CHARS_PER_TOKEN)
+        self.cache_mode = cache_mode
+        self.cached_content = cached_content
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl_seconds
+
+        self.generations = 0
+        self.prompt_tokens_sent = 0
+        self.cached_tokens = 0
+        self.baseline_tokens = 0
+        self.latency_seconds_total = 0.0
+        self.last_latency_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def request_messages(self, system_prompt: str) -> List[BaseMessage]:
+        """The messages a generation sends: only the instructions when the provider holds the prefix."""
+        instructions = HumanMessage(content=instructions_message_text(system_prompt))
+        if self.cache_mode == CACHE_MODE_PROVIDER:
+            return [instructions]
+        return self.prefix_messages + [instructions]
+
+    def record_generation(self, prompt_tokens: int, cached_tokens: int, baseline_tokens: int, latency_seconds: float) -> None:
+        """
+        Records one generation: its prompt tokens (`cached_tokens` of them served
+        from a cache), what the same prompt costs without a session, and its latency.
+        """
+        sent_tokens = max(0, prompt_tokens - cached_tokens)
+        with self._lock:
+            self.generations += 1
+            self.prompt_tokens_sent += sent_tokens
+            self.cached_tokens += cached_tokens
+            self.baseline_tokens += baseline_tokens
+            self.latency_seconds_total += latency_seconds
+            self.last_latency_seconds = latency_seconds
+        document_session_tokens.inc(sent_tokens, "sent")
+        document_session_tokens.inc(cached_tokens, "cached")
+
+    def stats(self) -> dict:
+        """Returns the session's usage; `tokens_saved` is the baseline minus the tokens sent."""
+        with self._lock:
+            return {
+                "session_id": self.session_id,
+                "document_id": self.document_id,
+                "cache_mode": self.cache_mode,
+                "document_tokens": self.document_tokens,
+                "created_at": self.created_at,
+                "expires_at": self.expires_at,
+                "generations": self.generations,
+                "prompt_tokens_sent": self.prompt_tokens_sent,
+                "cached_tokens": self.cached_tokens,
+                "baseline_tokens": self.baseline_tokens,
+                "tokens_saved": max(0, self.baseline_tokens - self.prompt_tokens_sent),
+                "latency_ms_avg": (self.latency_seconds_total / self.generations * 1000.0) if self.generations else 0.0,
+                "latency_ms_last": self.last_latency_seconds * 1000.0 if self.last_latency_seconds is not None else None,
+            }
+
+
+class DocumentSessionStore:
+    """
+    In-process table of document sessions, bounded by count and expired by age.
+
+    Attributes:
+        ttl_seconds (float): Session lifetime, also used as the cached-content TTL
+        max_sessions (int): The oldest session is closed when a new one would exceed this
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[UUID, DocumentSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.created_total = 0
+        self.provider_cached_total = 0
+        self.expired_total = 0
+        self.closed_total = 0
+
+    async def _cache_document(self, text: str) -> Optional[str]:
+        """Creates Gemini cached content for a document when enabled and large enough; None otherwise."""
+        if not (supports_context_cache() and settings.DOCUMENT_SESSION_PROVIDER_CACHE):
+            return None
+        tokens = math.ceil(len(document_message_text(text)) / CHARS_PER_TOKEN)
+        if tokens < settings.DOCUMENT_SESSION_CACHE_MIN_TOKENS:
+            logger.info(f"Document (~{tokens} tokens) is below DOCUMENT_SESSION_CACHE_MIN_TOKENS; using the cached-prefix layout.")
+            return None
+        try:
+            return await run_in_threadpool(
+                create_context_cache, SESSION_SYSTEM_PROMPT, [document_message_text(text)], self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Could not create cached content for a document session; using the cached-prefix layout: {e}")
+            return None
+
+    async def create(self, owner: str, document_id: UUID, text: str) -> DocumentSession:
+        """Registers a document's text for `owner` and returns the new session."""
+        cached_content = await self._cache_document(text)
+        session = DocumentSession(
+            owner=owner,
+            document_id=document_id,
+            text=text,
+            ttl_seconds=self.ttl_seconds,
+            cache_mode=CACHE_MODE_PROVIDER if cached_content else CACHE_MODE_PREFIX,
+            cached_content=cached_content,
+        )
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self.created_total += 1
+            self.provider_cached_total += int(cached_content is not None)
+            evicted = self._pop_expired(time.time())
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1])
+                self.closed_total += 1
+        await self._release(evicted)
+        logger.info(
+            f"Created document session {session.session_id} for document {document_id} "
+            f"(~{session.document_tokens} tokens, {session.cache_mode} mode)."
+        )
+        return session
+
+    def get(self, session_id: UUID, owner: str) -> DocumentSession:
+        """
+        Returns a live session of `owner`.
+
+        Raises:
+            DocumentSessionNotFoundError: If it does not exist, has expired or is someone else's.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.expires_at <= time.time():
+                del self._sessions[session_id]
+                self.expired_total += 1
+                session = None
+        if session is None or session.owner != owner:
+            raise DocumentSessionNotFoundError(f"Document session '{session_id}' not found or expired.")
+        return session
+
+    async def close(self, session_id: UUID, owner: str) -> None:
+        """Ends a session and deletes its cached content."""
+        session = self.get(session_id, owner)
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return
+            self.closed_total += 1
+        await self._release([session])
+        logger.info(f"Closed document session {session_id} after {session.generations} generations.")
+
+    async def close_all(self) -> None:
+        """Ends every session; called on shutdown so cached content does not outlive the process."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self.closed_total += len(sessions)
+        await self._release(sessions)
+
+    def _pop_expired(self, now: float) -> List[DocumentSession]:
+        # Caller must hold the lock. Sessions share one TTL, so the oldest expire first.
+        expired = []
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session_id]
+            expired.append(session)
+            self.expired_total += 1
+        return expired
+
+    async def _release(self, sessions: List[DocumentSession]) -> None:
+        names = [session.cached_content for session in sessions if session.cached_content]
+        if names:
+            await asyncio.gather(*[run_in_threadpool(delete_context_cache, name) for name in names])
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the store counters."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            snapshot = {
+                "active_sessions": len(sessions),
+                "max_sessions": self.max_sessions,
+                "created_total": self.created_total,
+                "provider_cached_total": self.provider_cached_total,
+                "expired_total": self.expired_total,
+                "closed_total": self.closed_total,
+            }
+        snapshot["active_generations"] = sum(session.generations for session in sessions)
+        return snapshot
+
+
+document_session_store = DocumentSessionStore(
+    ttl_seconds=settings.DOCUMENT_SESSION_TTL_SECONDS,
+    max_sessions=settings.DOCUMENT_SESSION_MAX_SESSIONS,
+)
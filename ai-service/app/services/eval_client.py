@@ -0,0 +1,174 @@
+"""
+Evaluation Service Client Module
+
+A long-lived HTTP client for eval-service, so ai-service can evaluate the
+tickets it generates without the front-end sending them back through the
+gateway.
+
+One `httpx.AsyncClient` is shared by all requests: connections are kept
+alive and pooled (EVAL_SERVICE_MAX_CONNECTIONS), and HTTP/2 is negotiated
+when EVAL_SERVICE_HTTP2 is on and the optional `h2` package is installed.
+Each evaluation gets EVAL_SERVICE_TIMEOUT_SECONDS end to end, of which
+EVAL_SERVICE_CONNECT_TIMEOUT_SECONDS may go to connecting.
+
+The caller's `Authorization` header is forwarded, as is the current trace
+context (`traceparent`), so eval-service authenticates the same user and its
+spans join the generation's trace.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import SPAN_KIND_CLIENT, TRACEPARENT_HEADER, current_traceparent, start_span
+
+logger = logging.getLogger(__name__)
+
+EVALUATE_TICKET_PATH = "/api/v1/evaluate/ticket"
+CACHE_STATUS_HEADER = "X-Cache"
+
+
+class EvalServiceError(Exception):
+    """Raised when eval-service cannot be reached or rejects an evaluation."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class EvalServiceClient:
+    """
+    Pooled async client for eval-service's evaluation route.
+
+    Attributes:
+        base_url (str): eval-service base URL, e.g. "http://localhost:8001"
+        http2 (bool): Whether HTTP/2 is offered to eval-service
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.http2 = settings.EVAL_SERVICE_HTTP2 and importlib.util.find_spec("h2") is not None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.http2_responses = 0
+        self._latency_total = 0.0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use, inside the running event loop.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.EVAL_SERVICE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.EVAL_SERVICE_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.EVAL_SERVICE_KEEPALIVE_SECONDS,
+                ),
+                timeout=httpx.Timeout(
+                    settings.EVAL_SERVICE_TIMEOUT_SECONDS,
+                    connect=settings.EVAL_SERVICE_CONNECT_TIMEOUT_SECONDS,
+                ),
+            )
+        return self._client
+
+    async def evaluate_ticket(
+        self,
+        generated_json: Dict[str, Any],
+        original_system_prompt: str,
+        authorization: Optional[str],
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Evaluates a generated ticket with eval-service.
+
+        Returns:
+            dict: eval-service's `EvaluateTicketResponse` body, plus its
+            verdict cache status under "cache_status".
+
+        Raises:
+            EvalServiceError: On a timeout, connection error or non-2xx response.
+        """
+        headers = {}
+        if authorization:
+            headers["Authorization"] = authorization
+        if bypass_cache:
+            headers["Cache-Control"] = "no-cache"
+
+        started = time.perf_counter()
+        with start_span("eval_service.evaluate_ticket", kind=SPAN_KIND_CLIENT,
+                        attributes={"http.url": self.base_url + EVALUATE_TICKET_PATH}) as span:
+            traceparent = current_traceparent()
+            if traceparent:
+                headers[TRACEPARENT_HEADER] = traceparent
+            try:
+                # httpx times each phase; the overall budget caps the whole exchange.
+                response = await asyncio.wait_for(
+                    self._get_client().post(
+                        EVALUATE_TICKET_PATH,
+                        json={"generated_json": generated_json, "original_system_prompt": original_system_prompt},
+                        headers=headers,
+                    ),
+                    timeout=settings.EVAL_SERVICE_TIMEOUT_SECONDS,
+                )
+            except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                self._record(started, failed=True)
+                raise EvalServiceError(
+                    f"eval-service did not answer within {settings.EVAL_SERVICE_TIMEOUT_SECONDS}s.",
+                    status_code=504,
+                ) from e
+            except httpx.HTTPError as e:
+                self._record(started, failed=True)
+                raise EvalServiceError(f"eval-service is unreachable: {e}", status_code=503) from e
+
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("http.flavor", response.http_version)
+            self._record(started, failed=response.is_error, http2=response.http_version == "HTTP/2")
+            if response.is_error:
+                detail = response.text[:500]
+                try:
+                    detail = response.json().get("detail", detail)
+                except ValueError:
+                    pass
+                raise EvalServiceError(f"eval-service returned {response.status_code}: {detail}", status_code=response.status_code)
+
+        result = response.json()
+        result["cache_status"] = response.headers.get(CACHE_STATUS_HEADER)
+        return result
+
+    def _record(self, started: float, failed: bool, http2: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.http2_responses += int(http2)
+            self._latency_total += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the client's counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "http2_responses": self.http2_responses,
+                "latency_ms_avg": (self._latency_total / self.requests * 1000.0) if self.requests else 0.0,
+                "http2_enabled": int(self.http2),
+                "max_connections": settings.EVAL_SERVICE_MAX_CONNECTIONS,
+            }
+
+    async def aclose(self) -> None:
+        """Closes the pooled connections; a later call opens a new pool."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+            logger.info("Closed eval-service HTTP client.")
+
+
+eval_service_client = EvalServiceClient(settings.EVAL_SERVICE_URL)
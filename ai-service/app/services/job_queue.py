@@ -0,0 +1,501 @@
+"""
+Generation Job Queue Module
+
+Runs ticket generation outside the HTTP request: clients enqueue a job, get a
+job ID back immediately and poll for the result, so throughput is no longer
+bound by how many requests uvicorn keeps open and a client disconnect does not
+throw the work away.
+
+A fixed pool of asyncio worker tasks, started with the application, claims
+queued jobs in FIFO order and runs them through a handler supplied at start-up.
+
+Backends:
+- "memory": an in-process queue. Jobs are lost on restart.
+- "sqlite": a durable SQLite table that several processes (uvicorn
+  workers, or old and new instances during a rolling restart) can share.
+  A claim records the claiming process and a lease of JOB_LEASE_SECONDS that
+  the process renews while it runs the job. Only jobs whose lease has expired,
+  because the process running them stopped, are put back in the queue.
+
+Finished jobs are kept for `JOB_RESULT_TTL_SECONDS` so their results can be
+polled, then purged.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+
+# Recent wait/run times kept for the percentile metrics.
+_TIMING_WINDOW = 1024
+
+
+class JobQueueFullError(Exception):
+    """Raised when enqueueing would exceed the configured queue depth."""
+    pass
+
+
+class JobError(Exception):
+    """
+    Raised by a job handler to fail a job with an HTTP-style status.
+
+    Attributes:
+        status_code (int): The status the synchronous endpoint would have returned
+        detail (str): Error description reported to the client
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class GenerationJob:
+    """
+    A queued ticket-generation request and, once finished, its outcome.
+
+    Attributes:
+        job_id (UUID): Identifier returned to the client
+        owner (str): Subject of the JWT that enqueued the job
+        payload (dict): The generation request (document ID, prompt, options)
+        status (str): One of queued, running, succeeded, failed
+        enqueued_at, started_at, finished_at (Optional[float]): Epoch timestamps
+        result (Optional[dict]): The generation response, when succeeded
+        error_status_code (Optional[int]) / error_detail (Optional[str]): Failure details
+    """
+
+    def __init__(
+        self,
+        job_id: UUID,
+        owner: str,
+        payload: Dict[str, Any],
+        status: str = JOB_STATUS_QUEUED,
+        enqueued_at: Optional[float] = None,
+        started_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error_status_code: Optional[int] = None,
+        error_detail: Optional[str] = None,
+    ):
+        self.job_id = job_id
+        self.owner = owner
+        self.payload = payload
+        self.status = status
+        self.enqueued_at = enqueued_at if enqueued_at is not None else time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.result = result
+        self.error_status_code = error_status_code
+        self.error_detail = error_detail
+
+
+class MemoryJobBackend:
+    """In-process FIFO queue plus a table of jobs by ID."""
+
+    def __init__(self, result_ttl_seconds: float):
+        self.result_ttl_seconds = result_ttl_seconds
+        self._jobs: "OrderedDict[UUID, GenerationJob]" = OrderedDict()
+        self._pending: Deque[UUID] = deque()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: GenerationJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._pending.append(job.job_id)
+
+    def claim_next(self) -> Optional[GenerationJob]:
+        with self._lock:
+            while self._pending:
+                job = self._jobs.get(self._pending.popleft())
+                if job is not None and job.status == JOB_STATUS_QUEUED:
+                    job.status = JOB_STATUS_RUNNING
+                    job.started_at = time.time()
+                    return job
+            return None
+
+    def finish(self, job: GenerationJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._purge_expired(time.time())
+
+    def get(self, job_id: UUID) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def renew_leases(self) -> None:
+        pass
+
+    def recover_running(self) -> int:
+        return 0
+
+    def _purge_expired(self, now: float) -> None:
+        # Caller must hold the lock.
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteJobBackend:
+    """
+    Durable job table in SQLite, shareable by several processes.
+
+    Claims are atomic and stamp the job with this backend's `worker_id` and a
+    lease expiry; `renew_leases` extends the leases of the jobs it holds, and
+    `recover_running` requeues only jobs whose lease has lapsed.
+    """
+
+    def __init__(self, path: str, result_ttl_seconds: float, lease_seconds: float):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generation_jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " result TEXT,"
+            " error_status_code INTEGER,"
+            " error_detail TEXT,"
+            " worker_id TEXT,"
+            " lease_expires_at REAL)"
+        )
+        # Tables created before leases existed get the columns appended.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(generation_jobs)")}
+        for column, column_type in (("worker_id", "TEXT"), ("lease_expires_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE generation_jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_generation_jobs_queue ON generation_jobs (status, enqueued_at)"
+        )
+
+    @staticmethod
+    def _from_row(row) -> GenerationJob:
+        return GenerationJob(
+            job_id=UUID(row[0]),
+            owner=row[1],
+            payload=json.loads(row[2]),
+            status=row[3],
+            enqueued_at=row[4],
+            started_at=row[5],
+            finished_at=row[6],
+            result=json.loads(row[7]) if row[7] is not None else None,
+            error_status_code=row[8],
+            error_detail=row[9],
+        )
+
+    def enqueue(self, job: GenerationJob) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO generation_jobs (job_id, owner, payload, status, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (str(job.job_id), job.owner, json.dumps(job.payload), job.status, job.enqueued_at),
+            )
+
+    def claim_next(self) -> Optional[GenerationJob]:
+        now = time.time()
+        with self._lock:
+            # fetchall() steps the statement to completion so the UPDATE is committed.
+            rows = self._conn.execute(
+                "UPDATE generation_jobs SET status = ?, started_at = ?, worker_id = ?, lease_expires_at = ?"
+                " WHERE job_id = ("
+                " SELECT job_id FROM generation_jobs WHERE status = ? ORDER BY enqueued_at LIMIT 1)"
+                " RETURNING *",
+                (JOB_STATUS_RUNNING, now, self.worker_id, now + self.lease_seconds, JOB_STATUS_QUEUED),
+            ).fetchall()
+        return self._from_row(rows[0]) if rows else None
+
+    def finish(self, job: GenerationJob) -> None:
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE generation_jobs SET status = ?, finished_at = ?, result = ?,"
+                " error_status_code = ?, error_detail = ?, lease_expires_at = NULL"
+                " WHERE job_id = ? AND worker_id = ?",
+                (
+                    job.status,
+                    job.finished_at,
+                    json.dumps(job.result) if job.result is not None else None,
+                    job.error_status_code,
+                    job.error_detail,
+                    str(job.job_id),
+                    self.worker_id,
+                ),
+            ).rowcount
+            if not updated:
+                logger.warning(
+                    f"Generation job {job.job_id} was requeued after its lease lapsed; discarding this outcome."
+                )
+            self._conn.execute(
+                "DELETE FROM generation_jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - self.result_ttl_seconds,),
+            )
+
+    def get(self, job_id: UUID) -> Optional[GenerationJob]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM generation_jobs WHERE job_id = ?", (str(job_id),)
+            ).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM generation_jobs WHERE status = ?", (JOB_STATUS_QUEUED,)
+            ).fetchone()[0]
+
+    def renew_leases(self) -> None:
+        """Extends the lease of every job this process is running."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE generation_jobs SET lease_expires_at = ? WHERE status = ? AND worker_id = ?",
+                (time.time() + self.lease_seconds, JOB_STATUS_RUNNING, self.worker_id),
+            )
+
+    def recover_running(self) -> int:
+        """
+        Requeues running jobs whose lease has expired, i.e. whose process
+        stopped without finishing them. Returns how many were requeued.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE generation_jobs SET status = ?, started_at = NULL, worker_id = NULL, lease_expires_at = NULL"
+                " WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, time.time()),
+            ).rowcount
+
+
+JobHandler = Callable[[GenerationJob], Awaitable[Dict[str, Any]]]
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class JobQueue:
+    """
+    Front for the configured backend plus the worker pool that drains it.
+
+    Attributes:
+        max_depth (int): Maximum number of queued (not yet running) jobs
+        poll_interval (float): Seconds an idle worker waits before re-checking the backend
+    """
+
+    def __init__(self, backend, max_depth: int, poll_interval: float):
+        self.backend = backend
+        self.max_depth = max_depth
+        self.poll_interval = poll_interval
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self.enqueued_total = 0
+        self.succeeded_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+        self._wait_seconds: Deque[float] = deque(maxlen=_TIMING_WINDOW)
+        self._run_seconds: Deque[float] = deque(maxlen=_TIMING_WINDOW)
+
+    async def enqueue(self, owner: str, payload: Dict[str, Any]) -> GenerationJob:
+        """
+        Queues a generation job.
+
+        Raises:
+            JobQueueFullError: If `max_depth` jobs are already waiting.
+        """
+        depth = await run_in_threadpool(self.backend.depth)
+        if depth >= self.max_depth:
+            with self._lock:
+                self.rejected_total += 1
+            raise JobQueueFullError(f"The job queue is full ({depth} jobs waiting).")
+
+        job = GenerationJob(job_id=uuid4(), owner=owner, payload=payload)
+        await run_in_threadpool(self.backend.enqueue, job)
+        with self._lock:
+            self.enqueued_total += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"Enqueued generation job {job.job_id} (queue depth {depth + 1}).")
+        return job
+
+    async def get(self, job_id: UUID) -> Optional[GenerationJob]:
+        return await run_in_threadpool(self.backend.get, job_id)
+
+    def start(self, worker_count: int, handler: JobHandler) -> None:
+        """Starts `worker_count` worker tasks on the running event loop."""
+        if self._workers:
+            return
+        recovered = self.backend.recover_running()
+        if recovered:
+            logger.warning(f"Requeued {recovered} generation jobs whose lease expired.")
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(index, handler), name=f"generation-job-worker-{index}")
+            for index in range(worker_count)
+        ]
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop(), name="generation-job-heartbeat")
+        logger.info(f"Started {worker_count} generation job workers ({settings.JOB_QUEUE_BACKEND} backend).")
+
+    async def stop(self) -> None:
+        """
+        Cancels the workers. Jobs they were running stay 'running' and, with
+        SQLite, are requeued once their lease expires.
+        """
+        workers, self._workers = self._workers, []
+        if self._heartbeat is not None:
+            workers.append(self._heartbeat)
+            self._heartbeat = None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if workers:
+            logger.info("Generation job workers stopped.")
+
+    async def _heartbeat_loop(self) -> None:
+        # Renews this process's leases and requeues jobs of processes that stopped.
+        interval = max(settings.JOB_LEASE_SECONDS / 3.0, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(self.backend.renew_leases)
+                recovered = await run_in_threadpool(self.backend.recover_running)
+            except Exception:
+                logger.exception("Failed to renew generation job leases.")
+                continue
+            if recovered:
+                logger.warning(f"Requeued {recovered} generation jobs whose lease expired.")
+                self._wakeup.set()
+
+    async def _worker_loop(self, index: int, handler: JobHandler) -> None:
+        while True:
+            try:
+                job = await run_in_threadpool(self.backend.claim_next)
+            except Exception:
+                logger.exception(f"Job worker {index} failed to claim a job.")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(index, job, handler)
+
+    async def _run_job(self, index: int, job: GenerationJob, handler: JobHandler) -> None:
+        wait_seconds = job.started_at - job.enqueued_at
+        logger.info(f"Worker {index} picked up job {job.job_id} after waiting {wait_seconds:.3f}s.")
+        with self._lock:
+            self._running += 1
+            self._wait_seconds.append(wait_seconds)
+
+        try:
+            job.result = await handler(job)
+            job.status = JOB_STATUS_SUCCEEDED
+        except asyncio.CancelledError:
+            raise
+        except JobError as e:
+            job.status = JOB_STATUS_FAILED
+            job.error_status_code = e.status_code
+            job.error_detail = e.detail
+            logger.warning(f"Generation job {job.job_id} failed ({e.status_code}): {e.detail}")
+        except Exception as e:
+            job.status = JOB_STATUS_FAILED
+            job.error_status_code = 500
+            job.error_detail = "An unexpected error occurred during ticket generation."
+            logger.exception(f"Unexpected error in generation job {job.job_id}: {e}")
+        finally:
+            with self._lock:
+                self._running -= 1
+
+        job.finished_at = time.time()
+        with self._lock:
+            self._run_seconds.append(job.finished_at - job.started_at)
+            if job.status == JOB_STATUS_SUCCEEDED:
+                self.succeeded_total += 1
+            else:
+                self.failed_total += 1
+        try:
+            await run_in_threadpool(self.backend.finish, job)
+        except Exception:
+            logger.exception(f"Failed to record the outcome of generation job {job.job_id}.")
+
+    def stats(self) -> dict:
+        """Returns queue depth, throughput counters and wait/run time percentiles."""
+        depth = self.backend.depth()
+        with self._lock:
+            waits = list(self._wait_seconds)
+            runs = list(self._run_seconds)
+            return {
+                "backend": settings.JOB_QUEUE_BACKEND,
+                "workers": len(self._workers),
+                "queue_depth": depth,
+                "running": self._running,
+                "enqueued_total": self.enqueued_total,
+                "succeeded_total": self.succeeded_total,
+                "failed_total": self.failed_total,
+                "rejected_total": self.rejected_total,
+                "wait_seconds_avg": (sum(waits) / len(waits)) if waits else 0.0,
+                "wait_seconds_p95": _percentile(waits, 0.95),
+                "wait_seconds_max": max(waits, default=0.0),
+                "run_seconds_avg": (sum(runs) / len(runs)) if runs else 0.0,
+                "run_seconds_p95": _percentile(runs, 0.95),
+            }
+
+
+def _build_backend():
+    backend = settings.JOB_QUEUE_BACKEND.lower()
+    if backend == "sqlite":
+        return SQLiteJobBackend(
+            path=settings.JOB_QUEUE_SQLITE_PATH,
+            result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+        )
+    if backend != "memory":
+        logger.warning(f"Unknown JOB_QUEUE_BACKEND '{settings.JOB_QUEUE_BACKEND}'; using the in-memory queue.")
+    return MemoryJobBackend(result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS)
+
+
+generation_job_queue = JobQueue(
+    _build_backend(),
+    max_depth=settings.JOB_QUEUE_MAX_DEPTH,
+    poll_interval=settings.JOB_QUEUE_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,265 @@
+"""
+LLM Response Cache Module
+
+Caches validated ticket-generation responses so identical (model, temperature,
+system prompt, document text) requests - retries, page reloads, demos - are
+answered without another LLM call.
+
+Backends:
+- "memory": an in-process LRU with TTL.
+- "sqlite": an on-disk SQLite table with TTL and size-based eviction, which
+  survives restarts.
+- "none": caching disabled.
+
+Only responses that passed `GeneratedTicketData` validation are stored.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_name: str, temperature: float, system_prompt: str, extracted_text: str) -> str:
+    """Returns a SHA-256 key over the inputs that determine an LLM response."""
+    digest = hashlib.sha256()
+    for part in (model_name, repr(float(temperature)), system_prompt, extracted_text):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so boundaries cannot be shifted between fields.
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class CachedLLMResponse:
+    """
+    A validated LLM response as stored in the cache.
+
+    Attributes:
+        raw_llm_output (str): The raw string the model returned
+        structured_output (dict): The validated `GeneratedTicketData` as a dict
+    """
+
+    def __init__(self, raw_llm_output: str, structured_output: dict):
+        self.raw_llm_output = raw_llm_output
+        self.structured_output = structured_output
+
+    def to_json(self) -> str:
+        return json.dumps({"raw_llm_output": self.raw_llm_output, "structured_output": self.structured_output})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "CachedLLMResponse":
+        data = json.loads(payload)
+        return cls(data["raw_llm_output"], data["structured_output"])
+
+
+class MemoryLLMCacheBackend:
+    """In-process LRU with TTL. Entries are bounded by count."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, payload = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._entries), sum(len(payload) for _, payload in self._entries.values())
+
+
+class SQLiteLLMCacheBackend:
+    """
+    On-disk cache in a single SQLite table. Expired rows are dropped on read and
+    least-recently-used rows are evicted once the stored payloads exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            return payload
+
+    def put(self, key: str, payload: str) -> None:
+        now = time.time()
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, payload, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Caller must hold the lock.
+        expired = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self.evictions += max(expired, 0)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        while total > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.evictions += 1
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            return count, total
+
+
+class LLMResponseCache:
+    """
+    Front for the configured backend that keeps hit/miss counters.
+
+    Backend calls run in the threadpool since the SQLite backend blocks.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bypassed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> Optional[CachedLLMResponse]:
+        if self.backend is None:
+            return None
+        try:
+            payload = await run_in_threadpool(self.backend.get, key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed; treating as a miss: {e}")
+            payload = None
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedLLMResponse.from_json(payload)
+
+    async def put(self, key: str, entry: CachedLLMResponse) -> None:
+        if self.backend is None:
+            return
+        try:
+            await run_in_threadpool(self.backend.put, key, entry.to_json())
+            with self._lock:
+                self.stores += 1
+        except Exception as e:
+            logger.warning(f"Failed to store LLM response in cache: {e}")
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> dict:
+        entries, size_bytes = self.backend.size() if self.backend is not None else (0, 0)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": settings.LLM_CACHE_BACKEND,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "stores": self.stores,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": getattr(self.backend, "evictions", 0),
+                "entries": entries,
+                "size_bytes": size_bytes,
+            }
+
+
+def _build_backend():
+    backend = settings.LLM_CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryLLMCacheBackend(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        )
+    if backend == "sqlite":
+        return SQLiteLLMCacheBackend(
+            path=settings.LLM_CACHE_SQLITE_PATH,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        )
+    if backend != "none":
+        logger.warning(f"Unknown LLM_CACHE_BACKEND '{settings.LLM_CACHE_BACKEND}'; LLM response caching disabled.")
+    return None
+
+
+llm_response_cache = LLMResponseCache(_build_backend())
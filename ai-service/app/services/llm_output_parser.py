@@ -0,0 +1,211 @@
+"""
+LLM Output Parser Module
+
+Turns raw LLM text into validated tickets without letting cosmetic defects
+fail an otherwise good (and expensive) LLM call.
+
+- Fast path: the output, minus any Markdown code fence, is validated straight
+  from the string by a precompiled TypeAdapter (pydantic-core parses the JSON
+  and builds the model in one step, with no intermediate dict).
+- Slow path: a single scan locates the first balanced JSON value, skipping
+  leading prose and trailing commentary, and repairs common defects on the
+  way: trailing commas, typographic (smart) quotes used as string delimiters
+  and raw newlines/tabs inside strings. Up to MAX_CANDIDATES values are tried
+  in order, so a stray brace in the prose does not hide the real payload.
+
+Every outcome is counted in `llm_output_parse_total{mode,outcome}`. Under a
+response schema (mode "json_schema") the fast path should take nearly all
+responses; the text-mode counts show what the extractor and repairs save.
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.metrics import llm_output_parse
+from app.schemas.ticket import GeneratedTicketData
+
+logger = logging.getLogger(__name__)
+
+MAX_CANDIDATES = 3
+
+_TICKET_ADAPTER = TypeAdapter(GeneratedTicketData)
+_CHUNK_ADAPTER = TypeAdapter(Union[List[Any], Dict[str, Any]])
+
+# Characters the scanner has to look at; everything between them is copied as-is.
+_SPECIAL = re.compile('["\\\\{}\\[\\],“”„‟\n\r\t]')
+_SMART_QUOTES = "“”„‟"
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _scan_value(text: str, start: int) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """
+    Copies the JSON value opening at `text[start]` up to its balancing
+    bracket, repairing defects as it goes.
+
+    Returns:
+        (repaired JSON text, names of the repairs applied), or None if the
+        value is never closed (e.g. truncated output).
+    """
+    out: List[str] = []
+    repairs = set()
+    stack: List[str] = []
+    in_string = False
+    smart_string = False
+    comma_index: Optional[int] = None  # Index in `out` of a comma not yet followed by a value
+    pos = start
+
+    while True:
+        match = _SPECIAL.search(text, pos)
+        if match is None:
+            return None
+        index = match.start()
+        char = text[index]
+        segment = text[pos:index]
+        out.append(segment)
+        pos = index + 1
+
+        if in_string:
+            if char == "\\":
+                out.append(text[index:index + 2])
+                pos = index + 2
+            elif char == '"' or (smart_string and char in _SMART_QUOTES):
+                out.append('"')
+                in_string = False
+            elif char in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[char])
+                repairs.add("control_characters")
+            else:
+                out.append(char)
+            continue
+
+        if comma_index is not None and segment.strip():
+            comma_index = None
+        if char == '"' or char in _SMART_QUOTES:
+            if char != '"':
+                repairs.add("smart_quotes")
+            out.append('"')
+            in_string = True
+            smart_string = char != '"'
+            comma_index = None
+        elif char in _CLOSERS:
+            out.append(char)
+            stack.append(_CLOSERS[char])
+            comma_index = None
+        elif char in "}]":
+            if not stack or char != stack[-1]:
+                return None
+            if comma_index is not None:
+                out[comma_index] = ""
+                repairs.add("trailing_commas")
+                comma_index = None
+            out.append(stack.pop())
+            if not stack:
+                return "".join(out), tuple(sorted(repairs))
+        elif char == ",":
+            out.append(char)
+            comma_index = len(out) - 1
+        else:
+            out.append(char)
+
+
+def iter_json_candidates(text: str, openers: str = "{") -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    """Yields up to MAX_CANDIDATES balanced (and repaired) JSON values found in `text`, in order."""
+    pattern = re.compile("[" + re.escape(openers) + "]")
+    found = 0
+    pos = 0
+    while found < MAX_CANDIDATES:
+        match = pattern.search(text, pos)
+        if match is None:
+            return
+        scanned = _scan_value(text, match.start())
+        pos = match.start() + 1
+        if scanned is not None:
+            found += 1
+            yield scanned
+
+
+def strip_code_fence(text: str) -> str:
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[len("```json"):].strip()
+    elif cleaned.startswith("```"):
+        cleaned = cleaned[len("```"):].strip()
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-len("```")].strip()
+    return cleaned
+
+
+def _is_json_error(error: ValidationError) -> bool:
+    return any(item["type"] == "json_invalid" for item in error.errors())
+
+
+def _parse(adapter: TypeAdapter, raw_output: str, openers: str, mode: str) -> Tuple[Any, Optional[str]]:
+    fenced = strip_code_fence(raw_output)
+    if fenced and fenced[0] in openers:
+        try:
+            value = adapter.validate_json(fenced)
+            llm_output_parse.inc(1, mode, "fast_path")
+            return value, None
+        except ValidationError as e:
+            if not _is_json_error(e):
+                llm_output_parse.inc(1, mode, "schema_mismatch")
+                return None, f"LLM output is valid JSON but does not match the required schema. Validation Errors: {e.errors()}"
+
+    for candidate, repairs in iter_json_candidates(raw_output, openers):
+        try:
+            value = adapter.validate_json(candidate)
+        except ValidationError as e:
+            if _is_json_error(e):
+                continue
+            llm_output_parse.inc(1, mode, "schema_mismatch")
+            return None, f"LLM output is valid JSON but does not match the required schema. Validation Errors: {e.errors()}"
+        if repairs:
+            logger.info(f"Repaired LLM output before parsing: {', '.join(repairs)}.")
+        llm_output_parse.inc(1, mode, "repaired" if repairs else "extracted")
+        return value, None
+
+    llm_output_parse.inc(1, mode, "invalid_json")
+    return None, f"LLM response did not contain a valid JSON value. Output start: '{fenced[:100]}...'"
+
+
+def parse_ticket(raw_output: str, mode: str = "text") -> Tuple[Optional[GeneratedTicketData], Optional[str]]:
+    """
+    Parses a single-ticket response produced in output `mode` ("text" or
+    "json_schema"). Returns (ticket, None) or (None, error message).
+    """
+    return _parse(_TICKET_ADAPTER, raw_output, "{", mode)
+
+
+def parse_chunk_payload(raw_output: str, mode: str = "text") -> Tuple[Optional[Union[List[Any], Dict[str, Any]]], Optional[str]]:
+    """Parses a chunk response into its JSON array or object; items are validated by the caller."""
+    return _parse(_CHUNK_ADAPTER, raw_output, "[{", mode)
+
+
+def _format_validation_errors(errors: List[dict]) -> str:
+    lines = []
+    for error in errors:
+        location = ".".join(str(part) for part in error.get("loc", ())) or "(root)"
+        line = f"- {location}: {error['msg']}"
+        if error["type"] not in ("missing", "json_invalid") and not isinstance(error.get("input"), (dict, list)):
+            line += f" (got {str(error.get('input'))[:80]!r})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def describe_ticket_failure(raw_output: str) -> Tuple[str, str]:
+    """
+    For an output `parse_ticket` rejected, returns the JSON text to repair (the
+    first balanced object, with the cheap repairs applied, or else the output
+    itself) and its validation errors, one per line.
+    """
+    candidate = next(iter_json_candidates(raw_output, "{"), None)
+    json_text = candidate[0] if candidate is not None else strip_code_fence(raw_output)
+    try:
+        _TICKET_ADAPTER.validate_json(json_text)
+    except ValidationError as e:
+        return json_text, _format_validation_errors(e.errors(include_url=False, include_context=False))
+    return json_text, ""
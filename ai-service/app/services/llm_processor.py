@@ -1,14 +1,24 @@
-import logging
+import asyncio
 import json
-from typing import Optional
+import logging
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import ValidationError
 
 from app.core.config import settings
-from app.schemas.llm import AIProcessingResponse
-from app.schemas.ticket import GeneratedTicketData
+from app.core.metrics import llm_repair, llm_repair_tokens, stage_timer
+from app.core.tracing import set_span_attribute, traced
+from app.schemas.llm import AIProcessingResponse, MultiTicketProcessingResponse
+from app.schemas.ticket import ChunkFailure, GeneratedTicketData, SourcedTicket, SourcePageRange
+from app.services.document_chunker import DocumentChunk
+from app.services.document_session import CACHE_MODE_PROVIDER, DocumentSession
+from app.services.llm_output_parser import describe_ticket_failure, parse_chunk_payload, parse_ticket
+from app.services.llm_provider import create_chat_model, model_identity, response_json_schema
+from app.services.llm_scheduler import CHARS_PER_TOKEN, estimate_message_tokens, estimate_prompt_tokens, llm_scheduler
+from app.services.llm_cache import CachedLLMResponse, llm_response_cache, make_cache_key
 
 class LLMConfigurationError(Exception):
     pass
@@ -18,107 +28,503 @@ class LLMProcessingError(Exception):
 
 logger = logging.getLogger(__name__)
 
+# Appended to the caller's system prompt for each chunk in multi-ticket mode.
+MULTI_TICKET_CHUNK_INSTRUCTIONS = """
+
+The content below is one part of a larger document. Create one ticket for each distinct requirement it contains, following the instructions above for every ticket.
+Respond with ONLY a JSON array of ticket objects. Respond with [] if this part contains no requirements."""
+
+# The repair call sees only the invalid JSON, its validation errors and this schema, never the document.
+REPAIR_SYSTEM_PROMPT = """You correct JSON so that it validates against a JSON schema.
+Keep every value that is already valid and change only what the validation errors require.
+Respond with ONLY the corrected JSON object."""
+TICKET_SCHEMA_TEXT = json.dumps(response_json_schema(GeneratedTicketData), separators=(",", ":"))
+
+def _cache_read_tokens(response) -> Optional[int]:
+    """Prompt tokens the provider reports serving from its cache, if it reports usage at all."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return (usage.get("input_token_details") or {}).get("cache_read")
+
 class LLMProcessorService:
     def __init__(self):
-        if not settings.GOOGLE_API_KEY:
-            logger.critical("GOOGLE_API_KEY is missing. LLM Service cannot be initialized.")
-            raise LLMConfigurationError("GOOGLE_API_KEY environment variable not set.")
-
         try:
-            self.llm = ChatGoogleGenerativeAI(
-                model=settings.AI_MODEL_NAME,
-                google_api_key=settings.GOOGLE_API_KEY,
-                temperature=settings.AI_TEMPERATURE,
-                convert_system_message_to_human=True
+            # In "json_schema" mode the model is given the ticket schema as its response schema.
+            self.output_mode = "json_schema" if settings.LLM_STRUCTURED_OUTPUT else "text"
+            if settings.LLM_STRUCTURED_OUTPUT:
+                self.llm = create_chat_model(response_schema=GeneratedTicketData)
+                self.chunk_llm = create_chat_model(response_schema=List[GeneratedTicketData])
+            else:
+                self.llm = self.chunk_llm = create_chat_model()
+            self.repair_llm = create_chat_model(
+                response_schema=GeneratedTicketData if settings.LLM_STRUCTURED_OUTPUT else None,
+                max_output_tokens=settings.LLM_REPAIR_MAX_OUTPUT_TOKENS
+            )
+            self.model_name = model_identity()
+            logger.info(
+                f"LLM Processor Service initialized successfully with provider '{settings.LLM_PROVIDER}', "
+                f"model: {self.model_name}, output mode: {self.output_mode}"
             )
-            logger.info(f"LLM Processor Service initialized successfully with model: {settings.AI_MODEL_NAME}")
+        except ValueError as e:
+            logger.critical(f"LLM Service cannot be initialized: {e}")
+            raise LLMConfigurationError(str(e)) from e
         except Exception as e:
-            logger.exception(f"Failed to initialize ChatGoogleGenerativeAI: {e}")
+            logger.exception(f"Failed to initialize the '{settings.LLM_PROVIDER}' LLM provider: {e}")
             raise LLMConfigurationError(f"Failed to configure the LLM client: {e}") from e
 
-    def _clean_json_string(self, raw_string: Optional[str]) -> Optional[str]:
-        if raw_string is None:
+    @staticmethod
+    def _build_ticket_messages(extracted_text: str, system_prompt: str) -> list:
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Please process the following document content based on the instructions above:\n\n---\n\n{extracted_text}\n\n---")
+        ]
+
+    async def _get_cached_ticket(self, cache_key: str, bypass_cache: bool) -> Optional[AIProcessingResponse]:
+        if bypass_cache:
+            llm_response_cache.record_bypass()
             return None
+        cached = await llm_response_cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.info("LLM response cache hit; skipping LLM invocation.")
+        return AIProcessingResponse(
+            status="success",
+            ai_structured_output=GeneratedTicketData.model_validate(cached.structured_output),
+            model_used=self.model_name,
+            raw_llm_output=cached.raw_llm_output,
+            cache_hit=True
+        )
+
+    def _validate_ticket_output(self, raw_ai_output: Optional[str], mode: Optional[str] = None) -> Tuple[Optional[GeneratedTicketData], Optional[str]]:
+        """
+        Extracts, parses and validates a raw LLM response against GeneratedTicketData.
+
+        Returns:
+            A tuple of (validated data, None) on success or (None, error message) on failure.
+        """
+        if not raw_ai_output:
+            logger.warning("LLM returned an empty response.")
+            return None, "LLM returned an empty response."
+
+        logger.debug(f"Received raw response from LLM (length: {len(raw_ai_output)} chars)")
+        validated_data, error_message = parse_ticket(raw_ai_output, mode or self.output_mode)
+        if error_message is not None:
+            logger.warning(f"Failed to parse LLM output as a ticket: {error_message}")
+            return None, error_message
+
+        logger.info("Successfully parsed and validated LLM output against GeneratedTicketData schema.")
+        return validated_data, None
+
+    async def _finish_ticket_response(
+        self,
+        cache_key: str,
+        raw_ai_output: Optional[str],
+        validated_data: Optional[GeneratedTicketData],
+        error_message: Optional[str],
+        repaired: bool = False
+    ) -> AIProcessingResponse:
+        status = "success" if validated_data is not None else "error"
+        response_payload = AIProcessingResponse(
+            status=status,
+            ai_structured_output=validated_data,
+            model_used=self.model_name,
+            error_message=error_message,
+            raw_llm_output=raw_ai_output,
+            repaired=repaired
+        )
+
+        if status == "success":
+            await llm_response_cache.put(
+                cache_key,
+                CachedLLMResponse(raw_ai_output, validated_data.model_dump(mode="json"))
+            )
+
+        return response_payload
+
+    @staticmethod
+    def _build_repair_messages(invalid_json: str, validation_errors: str) -> list:
+        return [
+            SystemMessage(content=REPAIR_SYSTEM_PROMPT),
+            HumanMessage(content=f"JSON schema:\n{TICKET_SCHEMA_TEXT}\n\nInvalid JSON:\n{invalid_json}\n\nValidation errors:\n{validation_errors}")
+        ]
+
+    @traced("llm_processor.repair_ticket_json")
+    async def _repair_ticket_output(
+        self,
+        raw_ai_output: str,
+        error_message: str,
+        request_messages: list
+    ) -> Tuple[Optional[GeneratedTicketData], Optional[str]]:
+        """
+        Makes one capped LLM call to fix output that failed validation, sending
+        only the invalid JSON, its errors and the ticket schema.
+
+        Returns:
+            (repaired ticket, None), or (None, the original error message plus
+            why the repair did not help).
+        """
+        invalid_json, validation_errors = describe_ticket_failure(raw_ai_output)
+        messages = self._build_repair_messages(invalid_json, validation_errors)
+        repair_input_tokens = estimate_prompt_tokens(messages)
+        if repair_input_tokens > settings.LLM_REPAIR_MAX_INPUT_TOKENS:
+            logger.info(f"Skipping repair: the prompt (~{repair_input_tokens} tokens) exceeds LLM_REPAIR_MAX_INPUT_TOKENS.")
+            llm_repair.inc(1, "skipped")
+            return None, error_message
+
+        logger.info(f"Attempting a one-shot repair of invalid LLM output (~{repair_input_tokens} input tokens).")
+        try:
+            response = await llm_scheduler.run(
+                lambda: self.repair_llm.ainvoke(messages),
+                repair_input_tokens + settings.LLM_REPAIR_MAX_OUTPUT_TOKENS
+            )
+            repaired_output = response.content
+        except Exception as e:
+            logger.warning(f"Repair call failed: {e}")
+            llm_repair.inc(1, "failed")
+            return None, f"{error_message} Repair attempt failed: {e}"
 
-        cleaned = raw_string.strip()
-        if cleaned.startswith("```json"):
-            cleaned = cleaned[len("```json"):].strip()
-        elif cleaned.startswith("```"):
-             cleaned = cleaned[len("```"):].strip()
+        spent_tokens = repair_input_tokens + len(repaired_output or "") // CHARS_PER_TOKEN
+        llm_repair_tokens.inc(spent_tokens, "spent")
+        with stage_timer("validation"):
+            validated_data, repair_error = self._validate_ticket_output(repaired_output, mode="repair")
+        set_span_attribute("llm.repair_succeeded", validated_data is not None)
+        if validated_data is None:
+            llm_repair.inc(1, "failed")
+            return None, f"{error_message} Repair attempt failed: {repair_error}"
 
-        if cleaned.endswith("```"):
-            cleaned = cleaned[:-len("```")].strip()
+        # A user-initiated retry would resend the whole prompt and get a similar-sized answer back.
+        regeneration_tokens = estimate_prompt_tokens(request_messages) + len(raw_ai_output) // CHARS_PER_TOKEN
+        llm_repair.inc(1, "repaired")
+        llm_repair_tokens.inc(max(0, regeneration_tokens - spent_tokens), "saved")
+        logger.info(f"Repaired invalid LLM output with ~{spent_tokens} tokens instead of ~{regeneration_tokens} for a regeneration.")
+        return validated_data, None
 
-        return cleaned
+    async def _validate_or_repair(
+        self,
+        raw_ai_output: Optional[str],
+        request_messages: list
+    ) -> Tuple[Optional[GeneratedTicketData], Optional[str], bool]:
+        """Validates the output and, if that fails and repair is enabled, tries one repair. The bool is True if repaired."""
+        with stage_timer("validation"):
+            validated_data, error_message = self._validate_ticket_output(raw_ai_output)
+        if validated_data is not None or not raw_ai_output or not settings.LLM_REPAIR_ENABLED:
+            return validated_data, error_message, False
+        validated_data, error_message = await self._repair_ticket_output(raw_ai_output, error_message, request_messages)
+        return validated_data, error_message, validated_data is not None
 
+    @traced("llm_processor.generate_ticket_json")
     async def generate_ticket_json(
         self,
         extracted_text: str,
-        system_prompt: str
+        system_prompt: str,
+        bypass_cache: bool = False
     ) -> AIProcessingResponse:
         logger.info("Starting LLM processing to generate ticket JSON...")
+        cache_key = make_cache_key(self.model_name, settings.AI_TEMPERATURE, system_prompt, extracted_text)
+        cached_response = await self._get_cached_ticket(cache_key, bypass_cache)
+        set_span_attribute("llm.cache_hit", cached_response is not None)
+        if cached_response is not None:
+            return cached_response
+
         raw_ai_output: Optional[str] = None
-        cleaned_output: Optional[str] = None
-        structured_output_dict: Optional[dict] = None
         validated_data: Optional[GeneratedTicketData] = None
         error_message: Optional[str] = None
-        status = "error"
+        repaired = False
 
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Please process the following document content based on the instructions above:\n\n---\n\n{extracted_text}\n\n---")
-        ]
+        try:
+            logger.debug(f"Invoking LLM model '{self.model_name}' asynchronously...")
+            messages = self._build_ticket_messages(extracted_text, system_prompt)
+            response = await llm_scheduler.run(
+                lambda: self.llm.ainvoke(messages),
+                estimate_message_tokens(messages)
+            )
+            raw_ai_output = response.content
+            validated_data, error_message, repaired = await self._validate_or_repair(raw_ai_output, messages)
+
+        except Exception as e:
+            logger.exception(f"Error during LLM model invocation or processing.")
+            error_message = f"Failed during LLM interaction: {str(e)}"
 
+        return await self._finish_ticket_response(cache_key, raw_ai_output, validated_data, error_message, repaired)
+
+    @traced("llm_processor.generate_session_ticket_json")
+    async def generate_session_ticket_json(
+        self,
+        session: DocumentSession,
+        system_prompt: str,
+        bypass_cache: bool = False
+    ) -> AIProcessingResponse:
+        """
+        Variant of `generate_ticket_json` for a document session. Sends the
+        session's prefix-stable messages, or only the instructions when the
+        provider holds the document as cached content, and records the prompt
+        tokens, cached tokens and latency on the session.
+        """
+        logger.info(f"Starting LLM processing for document session {session.session_id}...")
+        started = time.perf_counter()
+        cache_key = make_cache_key(self.model_name, settings.AI_TEMPERATURE, system_prompt, session.text)
+        cached_response = await self._get_cached_ticket(cache_key, bypass_cache)
+        set_span_attribute("llm.cache_hit", cached_response is not None)
+        if cached_response is not None:
+            # The same request without a session would have hit the cache too, so nothing is saved.
+            latency_seconds = time.perf_counter() - started
+            session.record_generation(0, 0, 0, latency_seconds)
+            return cached_response.model_copy(update={"prompt_tokens": 0, "cached_prompt_tokens": 0, "latency_ms": latency_seconds * 1000.0})
+
+        raw_ai_output: Optional[str] = None
+        validated_data: Optional[GeneratedTicketData] = None
+        error_message: Optional[str] = None
+        repaired = False
+        prompt_tokens: Optional[int] = None
+        cached_tokens: Optional[int] = None
+
+        messages = session.request_messages(system_prompt)
+        full_messages = session.prefix_messages + messages[-1:]
+        invoke_kwargs = {"cached_content": session.cached_content} if session.cache_mode == CACHE_MODE_PROVIDER else {}
         try:
-            logger.debug(f"Invoking LLM model '{settings.AI_MODEL_NAME}' asynchronously...")
-            response = await self.llm.ainvoke(messages)
+            response = await llm_scheduler.run(
+                lambda: self.llm.ainvoke(messages, **invoke_kwargs),
+                estimate_message_tokens(full_messages)
+            )
             raw_ai_output = response.content
+            prompt_tokens = estimate_prompt_tokens(full_messages)
+            cached_tokens = _cache_read_tokens(response)
+            if cached_tokens is None:
+                cached_tokens = estimate_prompt_tokens(session.prefix_messages) if invoke_kwargs else 0
+            cached_tokens = min(cached_tokens, prompt_tokens)
+            validated_data, error_message, repaired = await self._validate_or_repair(raw_ai_output, full_messages)
 
-            if not raw_ai_output:
-                 logger.warning("LLM returned an empty response.")
-                 error_message = "LLM returned an empty response."
+        except Exception as e:
+            logger.exception(f"Error during LLM model invocation or processing for document session {session.session_id}.")
+            error_message = f"Failed during LLM interaction: {str(e)}"
 
-            else:
-                logger.debug(f"Received raw response from LLM (length: {len(raw_ai_output)} chars)")
-                cleaned_output = self._clean_json_string(raw_ai_output)
-                if not cleaned_output:
-                    logger.warning("LLM response content was empty after cleaning.")
-                    error_message = "LLM response content was empty after cleaning."
-                else:
-                    try:
-                        structured_output_dict = json.loads(cleaned_output)
+        latency_seconds = time.perf_counter() - started
+        if prompt_tokens is not None:
+            baseline_tokens = estimate_prompt_tokens(self._build_ticket_messages(session.text, system_prompt))
+            session.record_generation(prompt_tokens, cached_tokens, baseline_tokens, latency_seconds)
+            set_span_attribute("llm.cached_prompt_tokens", cached_tokens)
 
-                        try:
-                            validated_data = GeneratedTicketData.model_validate(structured_output_dict)
-                            status = "success"
-                            logger.info("Successfully parsed and validated LLM output against GeneratedTicketData schema.")
+        ai_response = await self._finish_ticket_response(cache_key, raw_ai_output, validated_data, error_message, repaired)
+        return ai_response.model_copy(update={
+            "prompt_tokens": prompt_tokens,
+            "cached_prompt_tokens": cached_tokens,
+            "latency_ms": latency_seconds * 1000.0
+        })
 
-                        except ValidationError as e:
-                            logger.warning(f"LLM output parsed as JSON but failed Pydantic validation. Errors: {e.errors()}", exc_info=False)
-                            error_message = f"LLM output is valid JSON but does not match the required schema. Validation Errors: {e.errors()}"
+    async def stream_ticket_json(
+        self,
+        extracted_text: str,
+        system_prompt: str,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Union[str, AIProcessingResponse]]:
+        """
+        Streaming variant of `generate_ticket_json` built on the model's `astream`.
+
+        Yields each text fragment as the model produces it, then the final
+        AIProcessingResponse once the full output has been validated. A cache hit
+        yields only the final response.
+        """
+        logger.info("Starting streaming LLM processing to generate ticket JSON...")
+        cache_key = make_cache_key(self.model_name, settings.AI_TEMPERATURE, system_prompt, extracted_text)
+        cached_response = await self._get_cached_ticket(cache_key, bypass_cache)
+        if cached_response is not None:
+            yield cached_response
+            return
+
+        fragments: List[str] = []
+        validated_data: Optional[GeneratedTicketData] = None
+        error_message: Optional[str] = None
+        repaired = False
+
+        messages = self._build_ticket_messages(extracted_text, system_prompt)
+        estimated_tokens = estimate_message_tokens(messages)
+        attempt = 0
+        while True:
+            try:
+                logger.debug(f"Streaming from LLM model '{self.model_name}'...")
+                await llm_scheduler.acquire(estimated_tokens)
+                with stage_timer("llm_invoke"):
+                    async for message_chunk in self.llm.astream(messages):
+                        fragment = message_chunk.content
+                        if fragment:
+                            fragments.append(fragment)
+                            yield fragment
+                break
+            except Exception as e:
+                # Only retry before anything has been streamed to the client.
+                delay = None if fragments else llm_scheduler.retry_delay(e, attempt)
+                if delay is None:
+                    logger.exception(f"Error during streaming LLM invocation.")
+                    error_message = f"Failed during LLM interaction: {str(e)}"
+                    break
+                attempt += 1
+                logger.warning(f"Streaming LLM call failed before the first token; retry {attempt} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
 
-                        except Exception as e:
-                            logger.exception(f"Unexpected error during Pydantic validation of LLM output.")
-                            error_message = f"Unexpected error validating LLM output structure: {str(e)}"
+        raw_ai_output = "".join(fragments) or None
+        if error_message is None:
+            validated_data, error_message, repaired = await self._validate_or_repair(raw_ai_output, messages)
 
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Failed to parse LLM response as JSON. Error: {e}", exc_info=False)
-                        logger.warning(f"Cleaned LLM Output that failed parsing (start): {cleaned_output[:200]}...")
-                        error_message = f"LLM response was not valid JSON. Parse Error: {e}. Cleaned output start: '{cleaned_output[:100]}...'"
+        yield await self._finish_ticket_response(cache_key, raw_ai_output, validated_data, error_message, repaired)
 
+    def _parse_chunk_tickets(self, raw_output: Optional[str]) -> Tuple[List[GeneratedTicketData], Optional[str]]:
+        """
+        Parses a chunk response into validated tickets.
+
+        Accepts a JSON array, a single ticket object, or an object with a "tickets" array.
+        Items that fail validation are skipped as long as at least one is valid.
+
+        Returns:
+            A tuple of (validated tickets, error message or None).
+        """
+        if not raw_output:
+            return [], "LLM returned an empty response."
+        parsed, error_message = parse_chunk_payload(raw_output, self.output_mode)
+        if error_message is not None:
+            return [], error_message
+
+        if isinstance(parsed, dict):
+            parsed = parsed["tickets"] if "tickets" in parsed else [parsed]
+        if not isinstance(parsed, list):
+            return [], f"Expected a JSON array of tickets, got {type(parsed).__name__}."
+
+        tickets: List[GeneratedTicketData] = []
+        errors = []
+        for item in parsed:
+            try:
+                tickets.append(GeneratedTicketData.model_validate(item))
+            except ValidationError as e:
+                errors.append(e.errors())
+        if errors:
+            logger.warning(f"{len(errors)} of {len(parsed)} tickets in a chunk response failed validation.")
+            if not tickets:
+                return [], f"No ticket in the LLM output matches the required schema. Validation Errors: {errors[0]}"
+        return tickets, None
+
+    async def _generate_chunk_tickets(
+        self,
+        chunk: DocumentChunk,
+        system_prompt: str,
+        bypass_cache: bool
+    ) -> Tuple[List[GeneratedTicketData], bool, Optional[str]]:
+        """
+        Runs one map step: generates the tickets for a single chunk.
+
+        Returns:
+            A tuple of (tickets, cache_hit, error message or None).
+        """
+        chunk_prompt = system_prompt + MULTI_TICKET_CHUNK_INSTRUCTIONS
+        cache_key = make_cache_key(self.model_name, settings.AI_TEMPERATURE, chunk_prompt, chunk.text)
+        if bypass_cache:
+            llm_response_cache.record_bypass()
+        else:
+            cached = await llm_response_cache.get(cache_key)
+            if cached is not None:
+                tickets = [GeneratedTicketData.model_validate(t) for t in cached.structured_output["tickets"]]
+                return tickets, True, None
+
+        messages = self._build_ticket_messages(chunk.text, chunk_prompt)
+        try:
+            logger.debug(f"Invoking LLM for chunk {chunk.index} (pages {chunk.start_page}-{chunk.end_page}, ~{chunk.estimated_tokens} tokens).")
+            response = await llm_scheduler.run(
+                lambda: self.chunk_llm.ainvoke(messages),
+                estimate_message_tokens(messages)
+            )
         except Exception as e:
-            logger.exception(f"Error during LLM model invocation or processing.")
-            error_message = f"Failed during LLM interaction: {str(e)}"
+            logger.exception(f"Error during LLM invocation for chunk {chunk.index}.")
+            return [], False, f"Failed during LLM interaction: {str(e)}"
 
-        response_payload = AIProcessingResponse(
-            status=status,
-            ai_structured_output=validated_data,
-            model_used=settings.AI_MODEL_NAME,
-            error_message=error_message,
-            raw_llm_output=raw_ai_output
-        )
+        with stage_timer("validation"):
+            tickets, error_message = self._parse_chunk_tickets(response.content)
+        if error_message is None:
+            await llm_response_cache.put(
+                cache_key,
+                CachedLLMResponse(response.content, {"tickets": [t.model_dump(mode="json") for t in tickets]})
+            )
+        return tickets, False, error_message
 
-        return response_payload
+    @staticmethod
+    def _merge_chunk_tickets(
+        chunk_results: List[Tuple[DocumentChunk, List[GeneratedTicketData]]]
+    ) -> List[SourcedTicket]:
+        """
+        Reduce step: concatenates chunk tickets in document order. Tickets whose
+        titles match (ignoring case and whitespace) are merged into the first
+        occurrence, which collects the page ranges of every chunk that produced it.
+        """
+        merged: Dict[str, SourcedTicket] = {}
+        for chunk, tickets in chunk_results:
+            for ticket in tickets:
+                title_key = re.sub(r"\s+", " ", ticket.title).strip().lower()
+                existing = merged.get(title_key)
+                if existing is None:
+                    merged[title_key] = SourcedTicket(
+                        ticket=ticket,
+                        source_pages=[SourcePageRange(start_page=chunk.start_page, end_page=chunk.end_page)]
+                    )
+                    continue
+                last_range = existing.source_pages[-1]
+                if chunk.start_page <= last_range.end_page + 1:
+                    last_range.end_page = max(last_range.end_page, chunk.end_page)
+                else:
+                    existing.source_pages.append(SourcePageRange(start_page=chunk.start_page, end_page=chunk.end_page))
+        return list(merged.values())
+
+    @traced("llm_processor.generate_tickets_from_chunks")
+    async def generate_tickets_from_chunks(
+        self,
+        chunks: List[DocumentChunk],
+        system_prompt: str,
+        concurrency: int,
+        bypass_cache: bool = False
+    ) -> MultiTicketProcessingResponse:
+        """
+        Generates tickets for each chunk concurrently (map) and merges them (reduce).
+
+        Args:
+            chunks (List[DocumentChunk]): The document chunks, in document order
+            system_prompt (str): The caller's ticket instructions
+            concurrency (int): Maximum number of chunk LLM calls in flight
+            bypass_cache (bool): Skip the LLM response cache
+
+        Returns:
+            MultiTicketProcessingResponse: Merged tickets plus per-chunk failures.
+        """
+        logger.info(f"Starting multi-ticket generation over {len(chunks)} chunks (concurrency {concurrency}).")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _run(chunk: DocumentChunk):
+            async with semaphore:
+                return await self._generate_chunk_tickets(chunk, system_prompt, bypass_cache)
+
+        results = await asyncio.gather(*[_run(chunk) for chunk in chunks])
+
+        successes: List[Tuple[DocumentChunk, List[GeneratedTicketData]]] = []
+        failures: List[ChunkFailure] = []
+        cached_chunks = 0
+        for chunk, (tickets, cache_hit, error_message) in zip(chunks, results):
+            cached_chunks += int(cache_hit)
+            if error_message is not None:
+                logger.warning(f"Chunk {chunk.index} (pages {chunk.start_page}-{chunk.end_page}) failed: {error_message}")
+                failures.append(ChunkFailure(
+                    chunk_index=chunk.index,
+                    source_pages=SourcePageRange(start_page=chunk.start_page, end_page=chunk.end_page),
+                    error_message=error_message
+                ))
+            else:
+                successes.append((chunk, tickets))
+
+        tickets = self._merge_chunk_tickets(successes)
+        logger.info(
+            f"Multi-ticket generation produced {len(tickets)} tickets from {len(chunks)} chunks "
+            f"({cached_chunks} cached, {len(failures)} failed)."
+        )
+        return MultiTicketProcessingResponse(
+            tickets=tickets,
+            chunk_count=len(chunks),
+            cached_chunks=cached_chunks,
+            failed_chunks=failures,
+            model_used=self.model_name
+        )
 
 try:
     llm_processor_service = LLMProcessorService()
@@ -0,0 +1,491 @@
+"""
+LLM Provider Module
+
+Builds the chat model used for ticket generation from LLM_PROVIDER, so the
+service can run against Gemini, against responses captured on disk, or
+against a synthetic model that needs no network access or API key.
+
+- gemini: ChatGoogleGenerativeAI (requires GOOGLE_API_KEY).
+- record: Gemini, with every response also written to LLM_REPLAY_DIR.
+- replay: serves the responses captured by "record". A prompt that was never
+  recorded fails with ReplayMissError instead of reaching the network.
+- synthetic: answers every prompt with a well-formed ticket (or ticket array
+  for chunk prompts) after a log-normally distributed time to first token,
+  then emits the output at LLM_SYNTHETIC_TOKENS_PER_SECOND. It keeps a
+  small prefix cache, like a provider's implicit prompt caching: when every
+  message but the last has been seen before, those tokens are reported as
+  cache reads and skip the LLM_SYNTHETIC_PREFILL_TOKENS_PER_SECOND cost.
+
+Every backend is a LangChain chat model, so `ainvoke`, `astream` and the
+LLM scheduler work unchanged whichever one is selected.
+
+`create_chat_model(response_schema=...)` asks for JSON constrained to a
+schema (LLM_STRUCTURED_OUTPUT): Gemini receives it as its response schema with the JSON
+mime type, the synthetic model answers with bare JSON, and recordings are
+keyed by response format so text and JSON captures never mix.
+
+`create_context_cache` stores a document as Gemini cached content for
+document sessions; calls then pass `cached_content=<name>` and send only
+their new messages.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from google.generativeai import caching
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import PrivateAttr, TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("gemini", "record", "replay", "synthetic")
+CHARS_PER_TOKEN = 4
+STREAM_FRAGMENT_TOKENS = 4
+SYNTHETIC_PREFIX_CACHE_ENTRIES = 256
+
+
+class ReplayMissError(LookupError):
+    """No recorded response exists for the prompt (not retryable)."""
+
+
+def _message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return json.dumps(message.content, sort_keys=True, ensure_ascii=False)
+
+
+def make_replay_key(model: str, temperature: float, messages: List[BaseMessage], response_format: str = "text") -> str:
+    """Hashes the model settings, response format and every message (type and content) into a capture key."""
+    digest = hashlib.sha256()
+    for part in [model, repr(float(temperature)), response_format] + [f"{m.type}\x01{_message_text(m)}" for m in messages]:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ReplayStore:
+    """One JSON file per captured response, named by its replay key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as capture_file:
+                return json.load(capture_file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, model: str, content: str, latency_seconds: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        capture = {
+            "model": model,
+            "content": content,
+            "latency_seconds": round(latency_seconds, 4),
+            "recorded_at": time.time(),
+        }
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as capture_file:
+            json.dump(capture, capture_file, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+
+def _fragments(text: str) -> List[str]:
+    size = CHARS_PER_TOKEN * STREAM_FRAGMENT_TOKENS
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _result(text: str, usage_metadata: Optional[dict] = None) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage_metadata))])
+
+
+class RecordingChatModel(BaseChatModel):
+    """Delegates to `inner` and writes each completed response to the replay store."""
+
+    inner: BaseChatModel
+    model: str
+    temperature: float
+    store: ReplayStore
+    response_format: str = "text"
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "record"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        result.generations[0].message.content, time.perf_counter() - started)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        result.generations[0].message.content, time.perf_counter() - started)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        parts = []
+        async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+            if isinstance(chunk.message.content, str):
+                parts.append(chunk.message.content)
+            yield chunk
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        "".join(parts), time.perf_counter() - started)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded responses; optionally waits as long as the recorded call took."""
+
+    model: str
+    temperature: float
+    store: ReplayStore
+    response_format: str = "text"
+    simulate_latency: bool = False
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _lookup(self, messages: List[BaseMessage]) -> dict:
+        key = make_replay_key(self.model, self.temperature, messages, self.response_format)
+        capture = self.store.load(key)
+        if capture is None:
+            raise ReplayMissError(
+                f"No recorded response for this prompt (replay key {key}) in '{self.store.directory}'. "
+                "Run once with LLM_PROVIDER=record to capture it."
+            )
+        return capture
+
+    def _delay(self, capture: dict) -> float:
+        return float(capture.get("latency_seconds", 0.0)) if self.simulate_latency else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        capture = self._lookup(messages)
+        time.sleep(self._delay(capture))
+        return _result(capture["content"])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        capture = self._lookup(messages)
+        await asyncio.sleep(self._delay(capture))
+        return _result(capture["content"])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        capture = self._lookup(messages)
+        fragments = _fragments(capture["content"])
+        step = self._delay(capture) / len(fragments)
+        for fragment in fragments:
+            await asyncio.sleep(step)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+
+_REQUIREMENT_LINE = re.compile(r"[A-Za-z].{23,}")
+_PRIORITIES = ("High", "Medium", "Low")
+
+
+def _synthetic_ticket(line: str) -> dict:
+    requirement = line.strip().rstrip(".")
+    digest = hashlib.sha256(requirement.encode("utf-8")).digest()
+    return {
+        "title": requirement[:80],
+        "description": (
+            f"As a user, I want the system to satisfy: {requirement}. "
+            "AC: 1. The behaviour is implemented as specified. "
+            "2. Invalid input is rejected with a clear error. "
+            "3. The change is covered by automated tests."
+        ),
+        "priority": _PRIORITIES[digest[0] % len(_PRIORITIES)],
+    }
+
+
+def _synthetic_repair(document: str) -> str:
+    """Answers a repair prompt: the invalid ticket with missing fields filled in and the priority made valid."""
+    invalid_json = document.split("Invalid JSON:", 1)[1].split("Validation errors:", 1)[0].strip()
+    try:
+        ticket = json.loads(invalid_json)
+    except ValueError:
+        ticket = {}
+    if not isinstance(ticket, dict):
+        ticket = {}
+    repaired = {
+        "title": str(ticket.get("title") or "Review the uploaded requirements document"),
+        "description": str(ticket.get("description") or "As a user, I want the documented requirement implemented."),
+        "priority": ticket.get("priority") if ticket.get("priority") in _PRIORITIES else "Medium",
+    }
+    return json.dumps(repaired)
+
+
+def synthetic_ticket_response(messages: List[BaseMessage], json_mode: bool = False) -> str:
+    """
+    Builds a JSON ticket from requirement-like lines of the user messages: one
+    ticket for a single-ticket prompt, up to three in an array for a chunk
+    prompt (an empty array when the chunk has no such lines). Fenced as
+    Markdown unless `json_mode` is set.
+    """
+    document = "\n".join(_message_text(message) for message in messages if message.type == "human")
+    if "Invalid JSON:" in document:
+        return _synthetic_repair(document)
+    lines = [
+        line.strip() for line in document.splitlines()
+        if _REQUIREMENT_LINE.search(line) and not line.startswith("Please process")
+    ]
+    if any("JSON array" in _message_text(message) for message in messages[:-1]):
+        payload: Any = [_synthetic_ticket(line) for line in list(dict.fromkeys(lines))[:3]]
+    else:
+        payload = _synthetic_ticket(lines[0] if lines else "Review the uploaded requirements document")
+    if json_mode:
+        return json.dumps(payload)
+    return "```json\n" + json.dumps(payload, indent=2) + "\n```"
+
+
+class SyntheticChatModel(BaseChatModel):
+    """
+    Answers with `responder(messages, json_mode)` after a log-normal time to first token
+    (median `latency_ms`, spread `latency_sigma`) plus the prompt tokens outside
+    the prefix cache at `prefill_tokens_per_second`, then emits the output at
+    `tokens_per_second`.
+    """
+
+    model: str = "synthetic"
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 150.0
+    prefill_tokens_per_second: float = 0.0
+    json_mode: bool = False  # Answer with bare JSON, as under a response schema
+    max_output_tokens: Optional[int] = None  # Longer answers are cut off, as a real model would
+    responder: Callable[[List[BaseMessage], bool], str] = synthetic_ticket_response
+
+    _prefix_cache: "OrderedDict[str, None]" = PrivateAttr(default_factory=OrderedDict)
+    _prefix_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "synthetic"
+
+    def _read_prompt(self, messages: List[BaseMessage]) -> Tuple[int, int]:
+        """
+        Returns (prompt tokens, of which cache reads). Every message but the last
+        is a cacheable prefix; it is a cache read if the same prefix came before.
+        """
+        prefix_chars = sum(len(_message_text(message)) for message in messages[:-1])
+        prompt_tokens = (prefix_chars + len(_message_text(messages[-1]))) // CHARS_PER_TOKEN
+        if not messages[:-1]:
+            return prompt_tokens, 0
+        prefix_key = make_replay_key(self.model, 0.0, messages[:-1])
+        with self._prefix_lock:
+            cached = prefix_key in self._prefix_cache
+            self._prefix_cache[prefix_key] = None
+            self._prefix_cache.move_to_end(prefix_key)
+            while len(self._prefix_cache) > SYNTHETIC_PREFIX_CACHE_ENTRIES:
+                self._prefix_cache.popitem(last=False)
+        return prompt_tokens, (prefix_chars // CHARS_PER_TOKEN if cached else 0)
+
+    def _prefill_seconds(self, prompt_tokens: int, cached_tokens: int) -> float:
+        if self.prefill_tokens_per_second <= 0:
+            return 0.0
+        return (prompt_tokens - cached_tokens) / self.prefill_tokens_per_second
+
+    def _usage(self, prompt_tokens: int, cached_tokens: int, text: str) -> dict:
+        output_tokens = len(text) // CHARS_PER_TOKEN
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        }
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        text = self.responder(messages, self.json_mode)
+        if self.max_output_tokens:
+            text = text[:self.max_output_tokens * CHARS_PER_TOKEN]
+        return text
+
+    def _first_token_delay(self) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000.0
+        return self.latency_ms / 1000.0 * random.lognormvariate(0.0, self.latency_sigma)
+
+    def _output_seconds(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return max(1, len(text) // CHARS_PER_TOKEN) / self.tokens_per_second
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        prompt_tokens, cached_tokens = self._read_prompt(messages)
+        time.sleep(self._first_token_delay() + self._prefill_seconds(prompt_tokens, cached_tokens) + self._output_seconds(text))
+        return _result(text, self._usage(prompt_tokens, cached_tokens, text))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        prompt_tokens, cached_tokens = self._read_prompt(messages)
+        await asyncio.sleep(self._first_token_delay() + self._prefill_seconds(prompt_tokens, cached_tokens) + self._output_seconds(text))
+        return _result(text, self._usage(prompt_tokens, cached_tokens, text))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        fragments = _fragments(text)
+        time.sleep(self._first_token_delay() + self._prefill_seconds(*self._read_prompt(messages)))
+        for fragment in fragments:
+            time.sleep(self._output_seconds(text) / len(fragments))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        fragments = _fragments(text)
+        await asyncio.sleep(self._first_token_delay() + self._prefill_seconds(*self._read_prompt(messages)))
+        for fragment in fragments:
+            await asyncio.sleep(self._output_seconds(text) / len(fragments))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+
+_GEMINI_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "items", "properties", "required")
+
+
+def response_json_schema(schema: Any) -> dict:
+    """
+    The JSON schema of `schema` (a Pydantic model or any type TypeAdapter
+    accepts) with `$ref`s inlined and only the keywords Gemini's response
+    schema supports.
+    """
+    full_schema = TypeAdapter(schema).json_schema()
+    definitions = full_schema.get("$defs", {})
+
+    def simplify(node: dict) -> dict:
+        if "$ref" in node:
+            node = {**definitions[node["$ref"].rsplit("/", 1)[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+        simplified = {}
+        for key in _GEMINI_SCHEMA_KEYS:
+            if key not in node:
+                continue
+            value = node[key]
+            if key == "properties":
+                value = {name: simplify(property_schema) for name, property_schema in value.items()}
+            elif key == "items":
+                value = simplify(value)
+            simplified[key] = value
+        return simplified
+
+    return simplify(full_schema)
+
+
+def model_identity() -> str:
+    """
+    The model name used in response-cache keys and `model_used`. Replayed and
+    synthetic responses are namespaced so they never share a persistent cache
+    entry with real Gemini output.
+    """
+    if settings.LLM_PROVIDER in ("gemini", "record"):
+        return settings.AI_MODEL_NAME
+    return f"{settings.LLM_PROVIDER}/{settings.AI_MODEL_NAME}"
+
+
+def create_chat_model(response_schema: Any = None, max_output_tokens: Optional[int] = None) -> BaseChatModel:
+    """
+    Builds the chat model selected by LLM_PROVIDER. With `response_schema`
+    (a Pydantic model or type), the model is asked for JSON matching it;
+    `max_output_tokens` caps the length of each answer. Raises ValueError on
+    bad configuration.
+    """
+    provider = settings.LLM_PROVIDER
+    response_format = "text" if response_schema is None else "json_schema"
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER '{provider}'; expected one of {', '.join(PROVIDERS)}.")
+
+    if provider == "synthetic":
+        return SyntheticChatModel(
+            model=model_identity(),
+            latency_ms=settings.LLM_SYNTHETIC_LATENCY_MS,
+            latency_sigma=settings.LLM_SYNTHETIC_LATENCY_SIGMA,
+            tokens_per_second=settings.LLM_SYNTHETIC_TOKENS_PER_SECOND,
+            prefill_tokens_per_second=settings.LLM_SYNTHETIC_PREFILL_TOKENS_PER_SECOND,
+            json_mode=response_schema is not None,
+            max_output_tokens=max_output_tokens,
+        )
+
+    store = ReplayStore(settings.LLM_REPLAY_DIR)
+    if provider == "replay":
+        return ReplayChatModel(
+            model=settings.AI_MODEL_NAME,
+            temperature=settings.AI_TEMPERATURE,
+            store=store,
+            response_format=response_format,
+            simulate_latency=settings.LLM_REPLAY_SIMULATE_LATENCY,
+        )
+
+    if not settings.GOOGLE_API_KEY:
+        raise ValueError(f"GOOGLE_API_KEY environment variable not set (required by LLM_PROVIDER={provider}).")
+
+    model_options = {}
+    if response_schema is not None:
+        model_options = {"response_mime_type": "application/json", "response_schema": response_json_schema(response_schema)}
+    if max_output_tokens:
+        model_options["max_output_tokens"] = max_output_tokens
+    gemini = ChatGoogleGenerativeAI(
+        model=settings.AI_MODEL_NAME,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=settings.AI_TEMPERATURE,
+        convert_system_message_to_human=True,
+        max_retries=1,  # Retries are handled by llm_scheduler
+        **model_options
+    )
+    if provider == "gemini":
+        return gemini
+    return RecordingChatModel(
+        inner=gemini, model=settings.AI_MODEL_NAME, temperature=settings.AI_TEMPERATURE, store=store,
+        response_format=response_format
+    )
+
+
+def supports_context_cache() -> bool:
+    """Whether the provider can hold a document as cached content (Gemini, except while recording)."""
+    return settings.LLM_PROVIDER == "gemini"
+
+
+def create_context_cache(system_instruction: str, contents: List[str], ttl_seconds: float) -> str:
+    """
+    Stores `system_instruction` and `contents` (user turns) as Gemini cached
+    content that expires after `ttl_seconds`, and returns its resource name.
+    Blocking; run it in a threadpool. Raises on API errors, including content
+    below the model's minimum cacheable size.
+    """
+    cached_content = caching.CachedContent.create(
+        model=settings.AI_MODEL_NAME if settings.AI_MODEL_NAME.startswith("models/") else f"models/{settings.AI_MODEL_NAME}",
+        system_instruction=system_instruction,
+        contents=contents,
+        ttl=datetime.timedelta(seconds=ttl_seconds),
+    )
+    return cached_content.name
+
+
+def delete_context_cache(name: str) -> None:
+    """Deletes Gemini cached content early. Blocking; failures are logged, not raised."""
+    try:
+        caching.CachedContent.get(name).delete()
+    except Exception as e:
+        logger.warning(f"Could not delete cached content '{name}': {e}")
@@ -0,0 +1,364 @@
+"""
+LLM Call Scheduler Module
+
+Process-wide admission control for Gemini calls, so load above the provider
+quota queues up in-process instead of turning into 429s and retry storms.
+
+- Two token buckets cap requests per minute and (estimated) tokens per minute.
+  Both limits are off unless configured; retries and priorities always apply.
+- Waiting callers are admitted by priority: interactive requests (a user is
+  waiting on the HTTP response) go before batch work (queued jobs, batch
+  evaluations). Callers of the same priority are admitted in arrival order.
+- Retryable failures (429, 5xx, timeouts) are retried up to `max_retries`
+  times with exponential backoff and full jitter. A provider-supplied retry
+  delay (Retry-After / RetryInfo) is honoured, and a 429 pauses admission for
+  every caller until that delay has passed.
+
+The LangChain clients are created with `max_retries=1` so this scheduler is
+the only layer that retries.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import stage_duration, stage_timer
+from app.core.tracing import SPAN_KIND_CLIENT, start_span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+_PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+# Tokens reserved per call for the model's output, on top of the prompt estimate.
+OUTPUT_TOKEN_RESERVE = 1024
+CHARS_PER_TOKEN = 4
+
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "ServerError",
+    "TimeoutError",
+    "ConnectError",
+    "ReadTimeout",
+}
+_RATE_LIMIT_ERROR_NAMES = {"ResourceExhausted", "TooManyRequests", "RateLimitError"}
+# Only for errors without a status code: the provider's wording, with "429" as a whole number next to it.
+_RATE_LIMIT_MESSAGE = re.compile(
+    r"\b429\b\W*(?:too many requests|resource[ _]?(?:has been )?exhausted|rate[ _-]?limit|quota)"
+    r"|\bresource_exhausted\b|\btoo many requests\b",
+    re.IGNORECASE,
+)
+_RETRY_DELAY_PATTERNS = [
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"['\"]retryDelay['\"]\s*:\s*['\"](\d+(?:\.\d+)?)s['\"]", re.IGNORECASE),
+]
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "llm_call_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Runs LLM calls made inside the block (and tasks started from it) at `priority`."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def estimate_prompt_tokens(messages: Iterable[Any]) -> int:
+    """Estimates the prompt tokens of a call: prompt characters / 4."""
+    chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: Iterable[Any]) -> int:
+    """Estimates the tokens of a call: prompt characters / 4 plus the output reserve."""
+    return estimate_prompt_tokens(messages) + OUTPUT_TOKEN_RESERVE
+
+
+def _status_code_of(error: BaseException) -> Optional[int]:
+    for attribute in ("code", "status_code"):
+        value = getattr(error, attribute, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) if response is not None else None
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extracts a provider-requested retry delay from a Retry-After header or the error text."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        retry_after = headers.get("Retry-After") or headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+    message = str(error)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for a 429 / quota-exhausted error, judged by status code, exception type, then provider wording."""
+    if isinstance(error, LookupError):
+        return False
+    status_code = _status_code_of(error)
+    if status_code is not None:
+        return status_code == 429
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & _RATE_LIMIT_ERROR_NAMES) or bool(_RATE_LIMIT_MESSAGE.search(str(error)))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for rate limiting, server-side and transport failures; False for bad requests and replay misses."""
+    # ReplayMissError and other lookups fail the same way on every attempt.
+    if isinstance(error, LookupError):
+        return False
+    status_code = _status_code_of(error)
+    if status_code is not None:
+        return status_code in _RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & _RETRYABLE_ERROR_NAMES) or is_rate_limited(error)
+
+
+class _TokenBucket:
+    """A refilling bucket; capacity 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def shortfall_seconds(self, amount: float) -> float:
+        if self.capacity <= 0 or self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.level -= amount
+
+
+class LLMCallScheduler:
+    """
+    Rate limiter, priority queue and retry policy for LLM calls.
+
+    Attributes:
+        requests_per_minute (int): Request quota; 0 disables the request bucket
+        tokens_per_minute (int): Token quota; 0 disables the token bucket
+        max_retries (int): Retries after the first attempt for retryable failures
+        base_delay (float): Backoff ceiling for the first retry, doubled per attempt
+        max_delay (float): Upper bound on the backoff ceiling
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._blocked_until = 0.0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._waiters = []
+        return self._condition
+
+    def _reserve(self, tokens: float) -> float:
+        """Takes capacity for one call and returns 0, or returns the seconds until it would fit."""
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        delay = max(
+            self._blocked_until - now,
+            self._requests.shortfall_seconds(1),
+            self._tokens.shortfall_seconds(tokens),
+        )
+        if delay > 0:
+            return delay
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        return 0.0
+
+    async def acquire(self, estimated_tokens: int, priority: Optional[str] = None) -> None:
+        """Waits until the call can be made within the quotas, ahead of lower-priority waiters."""
+        priority = priority or _current_priority.get()
+        tokens = float(estimated_tokens)
+        if self._tokens.capacity > 0:
+            tokens = min(tokens, self._tokens.capacity)
+
+        condition = self._get_condition()
+        entry = [_PRIORITY_RANK.get(priority, 0), next(self._sequence), tokens]
+        started = time.monotonic()
+        async with condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] is entry:
+                        delay = self._reserve(tokens)
+                        if delay <= 0:
+                            heapq.heappop(self._waiters)
+                            condition.notify_all()
+                            break
+                        try:
+                            await asyncio.wait_for(condition.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await condition.wait()
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    condition.notify_all()
+                raise
+
+        waited = time.monotonic() - started
+        stage_duration.observe(waited, "llm_rate_limit_wait")
+        with self._stats_lock:
+            self.calls += 1
+            self.throttled_seconds += waited
+        if waited > 1.0:
+            logger.info(f"LLM call ({priority}) waited {waited:.1f}s for rate limit capacity.")
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Decides whether a failed call should be retried.
+
+        Args:
+            error: The exception raised by the call
+            attempt (int): Number of retries already made
+
+        Returns:
+            Seconds to wait before retrying, or None if the error should be raised.
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after_seconds(error)
+        delay = max(backoff, retry_after or 0.0)
+        with self._stats_lock:
+            self.retries += 1
+            if is_rate_limited(error):
+                self.rate_limited += 1
+                # Hold back every caller, not only this one, until the quota recovers.
+                self._blocked_until = max(self._blocked_until, time.monotonic() + (retry_after or backoff))
+        return delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        priority: Optional[str] = None,
+    ) -> T:
+        """
+        Runs `call` within the quotas, retrying retryable failures.
+
+        Raises:
+            The last exception from `call` once retries are exhausted or it is not retryable.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens, priority)
+            try:
+                with stage_timer("llm_invoke"), start_span(
+                    "llm.invoke",
+                    kind=SPAN_KIND_CLIENT,
+                    attributes={"llm.attempt": attempt, "llm.estimated_tokens": estimated_tokens},
+                ):
+                    return await call()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    with self._stats_lock:
+                        self.failures += 1
+                    raise
+                attempt += 1
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}: {str(e)[:200]}); "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s."
+                )
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+                "throttled_seconds": self.throttled_seconds,
+                "waiting": len(self._waiters),
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+            }
+
+
+llm_scheduler = LLMCallScheduler(
+    requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+    tokens_per_minute=settings.LLM_RATE_LIMIT_TPM,
+    max_retries=settings.AI_MAX_RETRIES,
+    base_delay=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+    max_delay=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+)
@@ -1,10 +1,26 @@
+import asyncio
+import hashlib
 import logging
-import fitz
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, BinaryIO, Callable, Iterable, Optional
 from uuid import UUID
 from minio import Minio
 from minio.error import S3Error
 from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings as app_settings
+from app.core.metrics import stage_timer
+from app.core.tracing import set_span_attribute, traced
+from app.services.pdf_parse_engine import PDFParseEngine, PDFSource, PageLimitExceededError
+from app.services.text_cache import (
+    ExtractedTextCache,
+    extracted_text_cache,
+)
+
 class Settings:
     MINIO_BUCKET_NAME: str = "pdf-documents"
 
@@ -19,45 +35,368 @@ class DocumentNotFoundError(ServiceError):
 class PDFParsingError(ServiceError):
     pass
 
+class DocumentTooLargeError(ServiceError):
+    pass
+
 logger = logging.getLogger(__name__)
 
-def _fetch_object_bytes(minio_client: Minio, bucket_name: str, object_name: str) -> bytes:
+pdf_parse_engine = PDFParseEngine(
+    pool_size=app_settings.PDF_PARSE_POOL_SIZE,
+    inline_max_pages=app_settings.PDF_PARSE_INLINE_MAX_PAGES,
+    min_pages_per_task=app_settings.PDF_PARSE_MIN_PAGES_PER_TASK,
+    max_tasks_per_child=app_settings.PDF_PARSE_MAX_TASKS_PER_CHILD,
+)
+
+FETCH_CHUNK_SIZE = 64 * 1024
+
+def _current_rss_bytes() -> Optional[int]:
+    """Returns the resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class FetchedPDF:
+    """
+    A downloaded PDF held in memory when small, or in a local temporary file
+    once it passes the spool threshold. fitz opens the file by path and reads
+    pages on demand, so large documents are never fully resident in Python.
+    """
+
+    def __init__(self, size: int, content_hash: str, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.size = size
+        self.content_hash = content_hash
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self) -> PDFSource:
+        return self.path if self.path is not None else self.data
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes of the document held in process memory."""
+        return 0 if self.path is not None else self.size
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError as e:
+                logger.warning(f"Could not remove temporary PDF file {self.path}: {e}")
+            self.path = None
+        self.data = None
+
+def _spool_chunks(chunks: Iterable[bytes], name: str, max_bytes: int, spool_threshold: int) -> FetchedPDF:
+    """
+    Collects a PDF from `chunks`, hashing it on the way and spilling it to a
+    temporary file once it exceeds `spool_threshold` bytes.
+
+    Raises:
+        DocumentTooLargeError: If the content is larger than `max_bytes`.
+    """
+    temp_file = None
+    try:
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise DocumentTooLargeError(
+                    f"Document '{name}' exceeds the limit of {max_bytes} bytes."
+                )
+            digest.update(chunk)
+            if temp_file is None and size > spool_threshold:
+                temp_file = tempfile.NamedTemporaryFile(prefix="ai-service-", suffix=".pdf", delete=False)
+                temp_file.write(buffer)
+                buffer = bytearray()
+            if temp_file is not None:
+                temp_file.write(chunk)
+            else:
+                buffer.extend(chunk)
+
+        if temp_file is not None:
+            temp_file.close()
+            return FetchedPDF(size, digest.hexdigest(), path=temp_file.name)
+        return FetchedPDF(size, digest.hexdigest(), data=bytes(buffer))
+
+    except BaseException:
+        if temp_file is not None:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        raise
+
+@traced("pdf_extractor.fetch_object")
+def _fetch_object_to_local(
+    minio_client: Minio, bucket_name: str, object_name: str, max_bytes: int, spool_threshold: int
+) -> FetchedPDF:
+    """
+    Streams an object from MinIO in chunks into a `FetchedPDF` (see `_spool_chunks`).
+
+    Raises:
+        DocumentTooLargeError: If the object is larger than `max_bytes`.
+    """
+    response = None
     try:
         response = minio_client.get_object(bucket_name, object_name)
-        pdf_bytes = response.read()
-        return pdf_bytes
+        declared_size = int(response.headers.get("Content-Length") or 0)
+        if declared_size > max_bytes:
+            raise DocumentTooLargeError(
+                f"Document '{object_name}' is {declared_size} bytes; the limit is {max_bytes} bytes."
+            )
+        return _spool_chunks(response.stream(FETCH_CHUNK_SIZE), object_name, max_bytes, spool_threshold)
     finally:
-        if 'response' in locals() and response:
+        if response is not None:
             response.close()
             response.release_conn()
 
-def _parse_pdf_bytes_with_fitz(pdf_bytes: bytes, document_id: UUID) -> str:
+def spool_upload(file: BinaryIO, name: str) -> FetchedPDF:
+    """
+    Copies an uploaded PDF from its start into a `FetchedPDF` under the same
+    limits as a fetch from MinIO: MAX_UPLOAD_SIZE and PDF_FETCH_SPOOL_THRESHOLD.
+    Blocking; run it in a threadpool.
+
+    Raises:
+        DocumentTooLargeError: If the upload is larger than MAX_UPLOAD_SIZE.
+    """
+    file.seek(0)
+    return _spool_chunks(
+        iter(lambda: file.read(FETCH_CHUNK_SIZE), b""),
+        name,
+        app_settings.MAX_UPLOAD_SIZE,
+        app_settings.PDF_FETCH_SPOOL_THRESHOLD,
+    )
+
+@traced("pdf_extractor.parse_pdf")
+async def _parse_pdf_bytes_with_fitz(pdf_source: PDFSource, document_id: UUID) -> str:
     try:
-        text_parts = []
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            for page_num, page in enumerate(doc):
-                page_text = page.get_text("text", sort=True).strip()
-                if page_text:
-                   text_parts.append(page_text)
-        full_text = "\n\n---\n\n".join(text_parts)
+        with stage_timer("pdf_parse"):
+            full_text, page_count = await pdf_parse_engine.parse(
+                pdf_source, max_pages=app_settings.MAX_DOCUMENT_PAGES
+            )
+        logger.debug(f"Parsed {page_count} pages for document {document_id}.")
+        set_span_attribute("pdf.page_count", page_count)
         return full_text
+    except PageLimitExceededError as e:
+        raise DocumentTooLargeError(f"Document {document_id} is too large to process: {e}") from e
     except Exception as e:
         raise PDFParsingError(f"Failed to parse PDF content for document {document_id}: {e}") from e
 
+class ExtractionMemoryStats:
+    """
+    Per-extraction memory figures for documents fetched from MinIO.
+
+    `buffered_bytes` is the per-request figure: how much of the PDF this
+    extraction held in process memory (0 once it is spooled to disk).
+    `rss_delta_bytes` is only a process-wide indicator. It is the change in this
+    process's RSS between the start of the fetch and the end of the parse, so
+    it includes other requests' allocations. It excludes parses that run in the
+    parse engine's worker processes, and it is not a peak.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.extractions = 0
+        self.spooled_to_disk = 0
+        self.last_buffered_bytes = 0
+        self.max_buffered_bytes = 0
+        self.last_rss_delta_bytes: Optional[int] = None
+        self.max_rss_delta_bytes: Optional[int] = None
+
+    def record(self, fetched: FetchedPDF, rss_delta: Optional[int]) -> None:
+        with self._lock:
+            self.extractions += 1
+            if fetched.path is not None:
+                self.spooled_to_disk += 1
+            self.last_buffered_bytes = fetched.buffered_bytes
+            self.max_buffered_bytes = max(self.max_buffered_bytes, fetched.buffered_bytes)
+            if rss_delta is not None:
+                self.last_rss_delta_bytes = rss_delta
+                self.max_rss_delta_bytes = max(self.max_rss_delta_bytes or 0, rss_delta)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "extractions": self.extractions,
+                "spooled_to_disk": self.spooled_to_disk,
+                "last_buffered_bytes": self.last_buffered_bytes,
+                "max_buffered_bytes": self.max_buffered_bytes,
+                "last_rss_delta_bytes": self.last_rss_delta_bytes,
+                "max_rss_delta_bytes": self.max_rss_delta_bytes,
+            }
+
+class ExtractionJob:
+    """
+    Tracks an eager text extraction started right after a document upload.
+
+    Attributes:
+        document_id (UUID): The document being extracted
+        status (str): One of "running", "completed" or "failed"
+        started_at (datetime): When the job was scheduled
+        finished_at (Optional[datetime]): When the job completed or failed
+        error (Optional[str]): Failure details, if any
+    """
+
+    def __init__(self, document_id: UUID):
+        self.document_id = document_id
+        self.status = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds() * 1000
+
+
 class PDFExtractorService:
+    def __init__(self, text_cache: Optional[ExtractedTextCache] = None):
+        self.text_cache = text_cache or extracted_text_cache
+        self.memory_stats = ExtractionMemoryStats()
+        self._jobs: "OrderedDict[UUID, ExtractionJob]" = OrderedDict()
+
+    def start_background_extraction(
+        self, document_id: UUID, upload: FetchedPDF, minio_client: Minio
+    ) -> ExtractionJob:
+        """
+        Schedules text extraction for a freshly uploaded PDF (see `spool_upload`)
+        on the running event loop. The job takes ownership of `upload` and closes
+        it, removing any temporary file, when it finishes.
+
+        The upload request returns immediately; a later generation for the same
+        document awaits this job instead of downloading and parsing the PDF again.
+        """
+        existing = self._jobs.get(document_id)
+        if existing is not None and existing.status == "running":
+            upload.close()
+            return existing
+
+        job = ExtractionJob(document_id)
+        job.task = asyncio.create_task(self._run_background_extraction(job, upload, minio_client))
+        self._jobs[document_id] = job
+        self._trim_job_history()
+        logger.info(f"Scheduled background text extraction for document {document_id}.")
+        return job
+
+    def get_extraction_job(self, document_id: UUID) -> Optional[ExtractionJob]:
+        return self._jobs.get(document_id)
+
+    async def _run_background_extraction(
+        self, job: ExtractionJob, upload: FetchedPDF, minio_client: Minio
+    ) -> None:
+        try:
+            text = await self._extract_and_cache(job.document_id, upload.source, upload.content_hash, minio_client)
+            self.memory_stats.record(upload, None)
+            job.status = "completed"
+            job.finished_at = datetime.now(timezone.utc)
+            logger.info(
+                f"Background text extraction for document {job.document_id} completed "
+                f"in {job.duration_ms:.0f} ms (length: {len(text)})."
+            )
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.now(timezone.utc)
+            logger.warning(f"Background text extraction for document {job.document_id} failed: {e}")
+        finally:
+            upload.close()
+
+    def _trim_job_history(self) -> None:
+        overflow = len(self._jobs) - app_settings.PDF_EXTRACTION_JOB_HISTORY
+        for document_id in list(self._jobs):
+            if overflow <= 0:
+                break
+            if self._jobs[document_id].status != "running":
+                del self._jobs[document_id]
+                overflow -= 1
+
+    async def _extract_and_cache(
+        self, document_id: UUID, pdf_source: PDFSource, content_hash: str, minio_client: Minio
+    ) -> str:
+        bucket_name = settings.MINIO_BUCKET_NAME
+        cached_text = self.text_cache.get_for_content(document_id, content_hash)
+        if cached_text is None:
+            self.text_cache.record_miss()
+            try:
+                cached_text = await _parse_pdf_bytes_with_fitz(pdf_source, document_id)
+
+            except (PDFParsingError, DocumentTooLargeError) as e:
+                 raise e
+            except Exception as e:
+                raise ServiceError(f"An unexpected error occurred during text extraction: {e}") from e
+
+            self.text_cache.put(document_id, content_hash, cached_text)
+        else:
+            logger.debug(f"Extracted text cache hit (content hash) for document {document_id}.")
+
+        await run_in_threadpool(
+            self.text_cache.store_sidecar, minio_client, bucket_name, document_id, content_hash, cached_text
+        )
+        return cached_text
+
+    @traced("pdf_extractor.extract_text")
     async def extract_text_from_document(
-        self, document_id: UUID, minio_client: Minio
+        self,
+        document_id: UUID,
+        minio_client: Minio,
+        on_fetched: Optional[Callable[[dict], Awaitable[None]]] = None
     ) -> str:
+        """
+        Returns the extracted text of a document, from the cheapest tier that has it.
+
+        Args:
+            document_id (UUID): The document to extract
+            minio_client (Minio): Client for the document bucket
+            on_fetched: Optional callback awaited once the document content is
+                available, with {"source": "memory" | "sidecar" | "storage"} and,
+                for storage fetches, "size_bytes". Used for progress reporting.
+        """
         bucket_name = settings.MINIO_BUCKET_NAME
         object_name = f"{document_id}.pdf"
+        set_span_attribute("document.id", str(document_id))
+
+        job = self._jobs.get(document_id)
+        if job is not None and job.task is not None and not job.task.done():
+            logger.info(f"Waiting on in-flight background extraction for document {document_id}.")
+            await asyncio.shield(job.task)
+
+        cached_text = self.text_cache.get_for_document(document_id)
+        if cached_text is not None:
+            logger.debug(f"Extracted text cache hit (memory) for document {document_id}.")
+            set_span_attribute("document.source", "memory")
+            if on_fetched is not None:
+                await on_fetched({"source": "memory"})
+            return cached_text
 
+        cached_text = await run_in_threadpool(
+            self.text_cache.load_sidecar, minio_client, bucket_name, document_id
+        )
+        if cached_text is not None:
+            logger.debug(f"Extracted text cache hit (sidecar) for document {document_id}.")
+            set_span_attribute("document.source", "sidecar")
+            if on_fetched is not None:
+                await on_fetched({"source": "sidecar"})
+            return cached_text
+
+        rss_before = _current_rss_bytes()
         try:
-            pdf_bytes = await run_in_threadpool(
-                _fetch_object_bytes, minio_client, bucket_name, object_name
-            )
-            if not pdf_bytes:
-                 return ""
+            with stage_timer("minio_fetch"):
+                fetched = await run_in_threadpool(
+                    _fetch_object_to_local,
+                    minio_client,
+                    bucket_name,
+                    object_name,
+                    app_settings.MAX_UPLOAD_SIZE,
+                    app_settings.PDF_FETCH_SPOOL_THRESHOLD,
+                )
             
+        except DocumentTooLargeError as e:
+            raise e
         except S3Error as e:
             if e.code == "NoSuchKey":
                 raise DocumentNotFoundError(f"Document with ID {document_id} not found in storage.") from e
@@ -66,13 +405,25 @@ class PDFExtractorService:
         except Exception as e:
             raise ServiceError(f"An unexpected error occurred retrieving the document: {e}") from e
 
+        set_span_attribute("document.source", "storage")
+        set_span_attribute("document.size_bytes", fetched.size)
         try:
-            full_text = await run_in_threadpool(
-                _parse_pdf_bytes_with_fitz, pdf_bytes, document_id
+            if on_fetched is not None:
+                await on_fetched({"source": "storage", "size_bytes": fetched.size})
+            if fetched.size == 0:
+                 return ""
+            text = await self._extract_and_cache(document_id, fetched.source, fetched.content_hash, minio_client)
+            rss_after = _current_rss_bytes()
+
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self.memory_stats.record(fetched, rss_delta)
+            logger.info(
+                f"Extraction memory for document {document_id}: size={fetched.size} bytes, "
+                f"buffered={fetched.buffered_bytes} bytes, process rss_delta={rss_delta} bytes."
             )
-            return full_text
+            return text
+        finally:
+            await run_in_threadpool(fetched.close)
 
-        except PDFParsingError as e:
-             raise e
-        except Exception as e:
-            raise ServiceError(f"An unexpected error occurred during text extraction: {e}") from e
+
+pdf_extractor_service = PDFExtractorService()
@@ -0,0 +1,178 @@
+"""
+PDF Parsing Engine Module
+
+Runs fitz text extraction in a dedicated process pool so large documents do not
+hold the GIL (and Starlette's threadpool) while concurrent requests wait.
+
+Documents above a page-count threshold are split into page ranges that are
+parsed by separate worker processes and reassembled in page order. Smaller
+documents are parsed inline in the threadpool, where process start-up and
+pickling costs would outweigh the gain.
+
+This module deliberately avoids importing the application settings so that
+spawned workers only pay for importing fitz.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple, Union
+
+import fitz
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PAGE_SEPARATOR = "\n\n---\n\n"
+
+# Raw PDF bytes, or the path of a local file holding them.
+PDFSource = Union[bytes, str]
+
+
+class PageLimitExceededError(Exception):
+    """Raised when a document has more pages than the configured cap."""
+    pass
+
+
+def _check_page_limit(page_count: int, max_pages: Optional[int]) -> None:
+    if max_pages is not None and page_count > max_pages:
+        raise PageLimitExceededError(f"Document has {page_count} pages; the limit is {max_pages}.")
+
+
+def _open_document(source: PDFSource) -> fitz.Document:
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _extract_page_texts(doc: fitz.Document, start: int, stop: int) -> List[str]:
+    text_parts = []
+    for page_num in range(start, stop):
+        page_text = doc[page_num].get_text("text", sort=True).strip()
+        if page_text:
+            text_parts.append(page_text)
+    return text_parts
+
+
+def parse_page_range(source: PDFSource, start: int, stop: int) -> List[str]:
+    """Returns the non-empty texts of pages [start, stop). Runs inside pool workers."""
+    with _open_document(source) as doc:
+        return _extract_page_texts(doc, start, min(stop, doc.page_count))
+
+
+def parse_document_inline(source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+    """Parses every page in the calling thread. Returns (text, page count)."""
+    with _open_document(source) as doc:
+        _check_page_limit(doc.page_count, max_pages)
+        return PAGE_SEPARATOR.join(_extract_page_texts(doc, 0, doc.page_count)), doc.page_count
+
+
+def count_pages(source: PDFSource) -> int:
+    with _open_document(source) as doc:
+        return doc.page_count
+
+
+def split_page_ranges(page_count: int, workers: int, min_pages_per_task: int) -> List[Tuple[int, int]]:
+    """Splits [0, page_count) into at most `workers` contiguous ranges of at least `min_pages_per_task` pages."""
+    if page_count <= 0:
+        return []
+    tasks = max(1, min(workers, page_count // max(1, min_pages_per_task)))
+    base, extra = divmod(page_count, tasks)
+    ranges = []
+    start = 0
+    for i in range(tasks):
+        stop = start + base + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class PDFParseEngine:
+    """
+    Process-pool backed fitz parser with page-level fan-out.
+
+    Attributes:
+        pool_size (int): Number of worker processes; 0 disables the pool entirely.
+        inline_max_pages (int): Documents with at most this many pages are parsed inline.
+        min_pages_per_task (int): Lower bound on the size of each page range sent to a worker.
+        max_tasks_per_child (int): Jobs a worker handles before being recycled to release memory.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        inline_max_pages: int,
+        min_pages_per_task: int,
+        max_tasks_per_child: int,
+    ):
+        self.pool_size = pool_size
+        self.inline_max_pages = inline_max_pages
+        self.min_pages_per_task = min_pages_per_task
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # max_tasks_per_child requires a non-fork start method.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+            logger.info(
+                f"Started PDF parse pool with {self.pool_size} workers "
+                f"(recycled every {self.max_tasks_per_child} jobs)."
+            )
+        return self._executor
+
+    async def parse(self, source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Extracts the text of a PDF, fanning page ranges out to the pool when it is large.
+
+        Passing a file path rather than bytes spares pickling the whole document
+        to every worker: each one opens the file and reads only what it needs.
+
+        Returns:
+            A tuple of the page texts joined with the page separator, and the page count.
+
+        Raises:
+            PageLimitExceededError: If the document has more than `max_pages` pages.
+        """
+        if self.pool_size <= 0:
+            return await run_in_threadpool(parse_document_inline, source, max_pages)
+
+        page_count = await run_in_threadpool(count_pages, source)
+        _check_page_limit(page_count, max_pages)
+        if page_count <= self.inline_max_pages:
+            return await run_in_threadpool(parse_document_inline, source)
+
+        ranges = split_page_ranges(page_count, self.pool_size, self.min_pages_per_task)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        logger.debug(f"Fanning out {page_count} pages across {len(ranges)} parse workers.")
+        try:
+            range_texts = await asyncio.gather(*[
+                loop.run_in_executor(executor, parse_page_range, source, start, stop)
+                for start, stop in ranges
+            ])
+        except BrokenProcessPool:
+            logger.error("PDF parse pool broke (worker crashed); restarting it and parsing inline.")
+            self._reset_executor()
+            return await run_in_threadpool(parse_document_inline, source)
+
+        text_parts = [text for texts in range_texts for text in texts]
+        return PAGE_SEPARATOR.join(text_parts), page_count
+
+    def _reset_executor(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stops the worker processes. Called on application shutdown."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("PDF parse pool shut down.")
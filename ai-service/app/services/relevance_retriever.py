@@ -0,0 +1,227 @@
+"""
+Relevance Retriever Module
+
+Selects the parts of a document that matter to a narrow system prompt, so
+a request such as "extract the authentication requirement" does not send
+the whole document to the LLM.
+
+The extracted text is split into page and section chunks of about
+RETRIEVAL_CHUNK_TOKENS tokens (the same splitter multi-ticket generation
+uses) and indexed with Okapi BM25. Ranking is purely lexical and runs
+in-process, with no embedding model or external service. Indexes are cached
+per document text in an LRU of RETRIEVAL_INDEX_CACHE_ENTRIES, so iterating
+on the prompt only pays for scoring.
+
+The top RETRIEVAL_TOP_K chunks that fit in RETRIEVAL_MAX_TOKENS are sent in
+document order. The full document is used instead when it already fits the
+budget or when no chunk shares a term with the prompt.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import retrieval_tokens
+from app.core.tracing import set_span_attribute
+from app.services.document_chunker import DocumentChunk, chunk_document, estimate_tokens
+from app.services.pdf_parse_engine import PAGE_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"[^\W_]+")
+_SUFFIXES = ("ations", "ation", "ings", "ing", "ies", "ed", "es", "s")
+# Function words, plus the vocabulary every ticket prompt uses for its output format.
+_STOPWORDS = frozenset("""
+a an and any are as at be been by can for from has have if in into is it its of on or per so such than that the their
+them then there these this those to was were when where which while who will with within without you your
+all also each must shall should would could may might not no only other our we us
+extract generate create produce return respond format json key keys value title description priority assign
+detailed detail including include acceptance criteria ticket tickets main following based instructions document
+high medium low please use using given
+""".split())
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 4 else word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, crudely stemmed words of `text` without stopwords."""
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in _STOPWORDS and not word.isdigit()]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a document's chunks.
+
+    Attributes:
+        chunks (List[DocumentChunk]): The indexed chunks, in document order
+    """
+
+    def __init__(self, chunks: List[DocumentChunk]):
+        self.chunks = chunks
+        self._term_frequencies: List[Counter] = [Counter(tokenize(chunk.text)) for chunk in chunks]
+        self._lengths = [sum(frequencies.values()) for frequencies in self._term_frequencies]
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequencies: Counter = Counter()
+        for frequencies in self._term_frequencies:
+            document_frequencies.update(frequencies.keys())
+        count = len(chunks)
+        self._idf: Dict[str, float] = {
+            term: math.log(1.0 + (count - df + 0.5) / (df + 0.5)) for term, df in document_frequencies.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 score of every chunk against `query`; 0 for chunks sharing no term with it."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        results = []
+        for frequencies, length in zip(self._term_frequencies, self._lengths):
+            score = 0.0
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * length / self._average_length) if self._average_length else BM25_K1
+            for term in terms:
+                tf = frequencies.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (BM25_K1 + 1.0) / (tf + norm)
+            results.append(score)
+        return results
+
+
+class RetrievalIndexCache:
+    """Thread-safe LRU of BM25 indexes keyed by the SHA-256 of the document text and the chunk size."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, BM25Index]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, text: str, chunk_tokens: int) -> BM25Index:
+        key = f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}:{chunk_tokens}"
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        # Built outside the lock; a concurrent build of the same document just wins or loses the put.
+        index = BM25Index(chunk_document(text, chunk_tokens))
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = index
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return index
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+class RetrievalResult:
+    """
+    The context chosen for a prompt.
+
+    Attributes:
+        text (str): The selected chunks in document order, or the full document
+        selected_chunks (List[DocumentChunk]): The chunks sent; empty when the full document is sent
+        total_chunks (int): Chunks in the document's index
+        tokens_before (int): Estimated tokens of the full document
+        tokens_after (int): Estimated tokens of `text`
+    """
+
+    def __init__(self, text: str, selected_chunks: List[DocumentChunk], total_chunks: int, tokens_before: int, tokens_after: int):
+        self.text = text
+        self.selected_chunks = selected_chunks
+        self.total_chunks = total_chunks
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+
+
+def select_relevant_chunks(
+    query: str,
+    index: BM25Index,
+    top_k: int,
+    max_tokens: int,
+) -> Optional[List[DocumentChunk]]:
+    """
+    Picks up to `top_k` of the best-scoring chunks whose combined size fits
+    `max_tokens`, in document order. Returns None when no chunk matches the query.
+    """
+    scores = index.scores(query)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True)
+    if not ranked:
+        return None
+    selected: List[int] = []
+    used_tokens = 0
+    for i in ranked:
+        if len(selected) >= top_k:
+            break
+        tokens = index.chunks[i].estimated_tokens
+        if used_tokens + tokens > max_tokens:
+            continue
+        selected.append(i)
+        used_tokens += tokens
+    return [index.chunks[i] for i in sorted(selected)]
+
+
+def _format_chunk(chunk: DocumentChunk) -> str:
+    pages = f"page {chunk.start_page}" if chunk.start_page == chunk.end_page else f"pages {chunk.start_page}-{chunk.end_page}"
+    return f"[Excerpt from {pages}]\n{chunk.text}"
+
+
+def retrieve_context(document_id: object, text: str, system_prompt: str) -> RetrievalResult:
+    """
+    Returns the part of a document to send for `system_prompt`, with the
+    RETRIEVAL_* settings, and records how many tokens it saved. CPU-bound on
+    an index miss; run it in a threadpool.
+    """
+    tokens_before = estimate_tokens(text)
+    if tokens_before <= settings.RETRIEVAL_MAX_TOKENS:
+        return RetrievalResult(text, [], 0, tokens_before, tokens_before)
+
+    index = retrieval_index_cache.get_or_build(text, settings.RETRIEVAL_CHUNK_TOKENS)
+    selected = select_relevant_chunks(system_prompt, index, settings.RETRIEVAL_TOP_K, settings.RETRIEVAL_MAX_TOKENS)
+    if not selected:
+        logger.info(f"No chunk of document {document_id} matches the prompt's terms; sending the full document.")
+        return RetrievalResult(text, [], len(index.chunks), tokens_before, tokens_before)
+
+    selected_text = PAGE_SEPARATOR.join(_format_chunk(chunk) for chunk in selected)
+    result = RetrievalResult(selected_text, selected, len(index.chunks), tokens_before, estimate_tokens(selected_text))
+    retrieval_tokens.inc(result.tokens_before, "document")
+    retrieval_tokens.inc(result.tokens_after, "selected")
+    set_span_attribute("retrieval.selected_chunks", len(selected))
+    set_span_attribute("retrieval.tokens_after", result.tokens_after)
+    logger.info(
+        f"Selected {len(selected)} of {result.total_chunks} chunks of document {document_id} for the prompt: "
+        f"~{result.tokens_before} -> ~{result.tokens_after} tokens."
+    )
+    return result
+
+
+retrieval_index_cache = RetrievalIndexCache(max_entries=settings.RETRIEVAL_INDEX_CACHE_ENTRIES)
@@ -2,11 +2,20 @@ import os
 import uuid 
 from uuid import UUID
 import logging 
+from typing import Optional
 from fastapi import UploadFile
 from minio import Minio
 from minio.error import S3Error
 from starlette.concurrency import run_in_threadpool  
 
+from app.core.config import settings as app_settings
+from app.services.pdf_extractor import (
+    DocumentTooLargeError,
+    PDFExtractorService,
+    pdf_extractor_service,
+    spool_upload,
+)
+
 class Settings:
     """Configuration settings for MinIO storage"""
     MINIO_BUCKET_NAME: str = "pdf-documents"
@@ -24,6 +33,49 @@ class StorageService:
     Service class for interacting with MinIO storage.
     """
 
+    def __init__(self, extractor: Optional[PDFExtractorService] = None):
+        """
+        Args:
+            extractor: When provided (and eager extraction is enabled), text
+                       extraction is started in the background right after
+                       each document is stored.
+        """
+        self.extractor = extractor
+        self._bucket_verified = False
+
+    async def ensure_bucket(self, minio_client: Minio) -> None:
+        """
+        Verifies that the configured bucket exists. The result is remembered, so
+        uploads skip the `bucket_exists` round-trip until an upload fails.
+
+        Raises:
+            StorageError: If the bucket doesn't exist or cannot be checked.
+        """
+        if self._bucket_verified:
+            return
+
+        bucket_name = settings.MINIO_BUCKET_NAME
+        try:
+            exists = await run_in_threadpool(minio_client.bucket_exists, bucket_name)
+            if not exists:
+                error_msg = (
+                    f"MinIO bucket '{bucket_name}' does not exist. "
+                    f"Please create it (e.g., via MinIO UI at http://localhost:9001)."
+                )
+                logger.error(error_msg)
+                raise StorageError(error_msg)
+        except StorageError:
+            raise
+        except S3Error as e:
+            logger.exception(f"Error checking MinIO bucket: '{bucket_name}'")
+            raise StorageError(f"Error checking MinIO bucket: {e}") from e
+        except Exception as e:  # Handle unexpected errors like connection issues
+            logger.exception(f"Unexpected error checking MinIO bucket '{bucket_name}'.")
+            raise StorageError(f"Connection error or unexpected issue checking MinIO bucket: {e}") from e
+
+        self._bucket_verified = True
+        logger.info(f"MinIO bucket '{bucket_name}' verified.")
+
     async def save_document(
         self, file: UploadFile, minio_client: Minio
     ) -> tuple[UUID, str]:
@@ -50,22 +102,8 @@ class StorageService:
             logger.error("Attempted to upload a file with no filename.")
             raise ValueError("Uploaded file has no filename.")
         
-        # Verify if the MinIO bucket exists
-        try:
-            exists = await run_in_threadpool(minio_client.bucket_exists, bucket_name)
-            if not exists:
-                error_msg = (
-                    f"MinIO bucket '{bucket_name}' does not exist. "
-                    f"Please create it (e.g., via MinIO UI at http://localhost:9001)."
-                )
-                logger.error(error_msg)
-                raise StorageError(error_msg)
-        except S3Error as e:
-            logger.exception(f"Error checking MinIO bucket: '{bucket_name}'")
-            raise StorageError(f"Error checking MinIO bucket: {e}") from e
-        except Exception as e:  # Handle unexpected errors like connection issues
-            logger.exception(f"Unexpected error checking MinIO bucket '{bucket_name}'.")
-            raise StorageError(f"Connection error or unexpected issue checking MinIO bucket: {e}") from e
+        # Verify the MinIO bucket exists (once; re-checked only after an error)
+        await self.ensure_bucket(minio_client)
         
         # let's generate Unique identifier 
         file_uuid = uuid.uuid4()
@@ -94,18 +132,48 @@ class StorageService:
                 f"to bucket '{bucket_name}'"
             )
 
-        # 5. Error Handling
+        # 5. Error Handling (the bucket is re-verified on the next upload)
         except S3Error as e:
+            self._bucket_verified = False
             logger.exception(
                 f"MinIO S3 Error uploading '{object_name}' to bucket '{bucket_name}'."
             )
             raise StorageError(f"Failed to upload document to MinIO: {e}") from e
         except Exception as e:
             # Catch other potential errors (network, etc.) during upload
+            self._bucket_verified = False
             logger.exception(
                 f"Unexpected error uploading '{object_name}' to bucket '{bucket_name}'."
             )
             raise StorageError(f"An unexpected error occurred during document upload: {e}") from e
 
-        # 6. Return Value
+        # 6. Eager text extraction from the already spooled upload
+        await self._schedule_extraction(file_uuid, file, minio_client)
+
+        # 7. Return Value
         return file_uuid, file.filename
+
+    async def _schedule_extraction(
+        self, document_id: UUID, file: UploadFile, minio_client: Minio
+    ) -> None:
+        """
+        Starts background text extraction from the local upload buffer, so the
+        PDF never has to be downloaded back from MinIO for its first generation.
+        The upload is copied under the fetch path's limits: in memory up to
+        PDF_FETCH_SPOOL_THRESHOLD, in a temporary file beyond it, and not at all
+        past MAX_UPLOAD_SIZE. Failures are logged only: the upload itself has
+        already succeeded.
+        """
+        if self.extractor is None or not app_settings.PDF_EAGER_EXTRACTION_ENABLED:
+            return
+
+        try:
+            upload = await run_in_threadpool(spool_upload, file.file, str(document_id))
+            self.extractor.start_background_extraction(document_id, upload, minio_client)
+        except DocumentTooLargeError as e:
+            logger.info(f"Skipping background extraction for document {document_id}: {e}")
+        except Exception as e:
+            logger.warning(f"Could not schedule background extraction for document {document_id}: {e}")
+
+
+storage_service = StorageService(extractor=pdf_extractor_service)
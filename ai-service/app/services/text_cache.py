@@ -0,0 +1,216 @@
+"""
+Extracted Text Cache Module
+
+Caches the text extracted from uploaded PDFs so repeated ticket generations
+against the same document skip both the MinIO download and the fitz parse.
+
+Two tiers are used:
+- An in-process LRU keyed by the SHA-256 of the PDF content, evicted by size.
+- A persistent sidecar object (`<uuid>.txt`) stored next to the PDF in MinIO,
+  carrying the content hash as object metadata.
+
+Uploaded documents are stored under a fresh UUID and never overwritten, so the
+document ID -> content hash mapping is stable once it has been learned.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+from minio import Minio
+from minio.error import S3Error
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_HASH_METADATA_KEY = "content-sha256"
+SIDECAR_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+
+def compute_content_hash(pdf_bytes: bytes) -> str:
+    """Returns the hex SHA-256 digest used as the cache key for a PDF's content."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def sidecar_object_name(document_id: UUID) -> str:
+    """Returns the MinIO object name of the extracted-text sidecar for a document."""
+    return f"{document_id}.txt"
+
+
+class ExtractedTextCache:
+    """
+    Thread-safe, size-bounded LRU of extracted text with a MinIO sidecar tier.
+
+    Attributes:
+        max_bytes (int): Upper bound on the UTF-8 size of the texts held in memory.
+        sidecar_enabled (bool): Whether `<uuid>.txt` sidecars are read and written.
+    """
+
+    def __init__(self, max_bytes: int, sidecar_enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.sidecar_enabled = sidecar_enabled
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._document_hashes: Dict[UUID, str] = {}
+        self._hash_documents: Dict[str, Set[UUID]] = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.content_hits = 0
+        self.sidecar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- In-process LRU tier ---
+
+    def get_for_document(self, document_id: UUID) -> Optional[str]:
+        """Returns the cached text for a document ID already seen, or None."""
+        with self._lock:
+            content_hash = self._document_hashes.get(document_id)
+            if content_hash is None or content_hash not in self._entries:
+                return None
+            self._entries.move_to_end(content_hash)
+            self.memory_hits += 1
+            return self._entries[content_hash][0]
+
+    def get_for_content(self, document_id: UUID, content_hash: str) -> Optional[str]:
+        """
+        Returns the cached text for already downloaded content, or None.
+
+        Used when a different upload of identical bytes has been parsed before;
+        the document ID is linked to the hash so its next lookup is a memory hit.
+        """
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(content_hash)
+            self._link(document_id, content_hash)
+            self.content_hits += 1
+            return entry[0]
+
+    def put(self, document_id: UUID, content_hash: str, text: str) -> None:
+        """Stores extracted text in the LRU tier, evicting older entries as needed."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.info(
+                f"Extracted text for document {document_id} ({size} bytes) exceeds the "
+                f"cache capacity ({self.max_bytes} bytes); not caching in memory."
+            )
+            return
+
+        with self._lock:
+            previous = self._entries.pop(content_hash, None)
+            if previous is not None:
+                self._current_bytes -= previous[1]
+            self._entries[content_hash] = (text, size)
+            self._current_bytes += size
+            self._link(document_id, content_hash)
+
+            while self._current_bytes > self.max_bytes and self._entries:
+                evicted_hash, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                for evicted_document in self._hash_documents.pop(evicted_hash, set()):
+                    self._document_hashes.pop(evicted_document, None)
+                self.evictions += 1
+                logger.debug(f"Evicted extracted text {evicted_hash[:12]}... ({evicted_size} bytes) from cache.")
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _link(self, document_id: UUID, content_hash: str) -> None:
+        # Caller must hold the lock.
+        self._document_hashes[document_id] = content_hash
+        self._hash_documents.setdefault(content_hash, set()).add(document_id)
+
+    # --- MinIO sidecar tier (blocking; run in a threadpool) ---
+
+    def load_sidecar(
+        self, minio_client: Minio, bucket_name: str, document_id: UUID
+    ) -> Optional[str]:
+        """
+        Reads the `<uuid>.txt` sidecar, promoting it into the LRU tier on success.
+
+        Returns:
+            The extracted text, or None if sidecars are disabled or none exists.
+        """
+        if not self.sidecar_enabled:
+            return None
+
+        response = None
+        try:
+            response = minio_client.get_object(bucket_name, sidecar_object_name(document_id))
+            content_hash = response.headers.get(f"x-amz-meta-{SIDECAR_HASH_METADATA_KEY}")
+            text = response.read().decode("utf-8")
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                logger.warning(f"Could not read text sidecar for document {document_id}: {e.code}")
+            return None
+        except Exception as e:
+            logger.warning(f"Unexpected error reading text sidecar for document {document_id}: {e}")
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+        if not content_hash:
+            logger.warning(f"Text sidecar for document {document_id} has no content hash; ignoring it.")
+            return None
+
+        with self._lock:
+            self.sidecar_hits += 1
+        self.put(document_id, content_hash, text)
+        return text
+
+    def store_sidecar(
+        self, minio_client: Minio, bucket_name: str, document_id: UUID, content_hash: str, text: str
+    ) -> None:
+        """Persists extracted text as a `<uuid>.txt` sidecar. Failures are logged, not raised."""
+        if not self.sidecar_enabled:
+            return
+
+        data = text.encode("utf-8")
+        try:
+            minio_client.put_object(
+                bucket_name=bucket_name,
+                object_name=sidecar_object_name(document_id),
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type=SIDECAR_CONTENT_TYPE,
+                metadata={SIDECAR_HASH_METADATA_KEY: content_hash},
+            )
+            logger.debug(f"Stored text sidecar for document {document_id} ({len(data)} bytes).")
+        except Exception as e:
+            logger.warning(f"Failed to store text sidecar for document {document_id}: {e}")
+
+    # --- Introspection ---
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters."""
+        with self._lock:
+            hits = self.memory_hits + self.content_hits + self.sidecar_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "content_hits": self.content_hits,
+                "sidecar_hits": self.sidecar_hits,
+                "misses": self.misses,
+                "hit_ratio": (hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+extracted_text_cache = ExtractedTextCache(
+    max_bytes=settings.PDF_TEXT_CACHE_MAX_BYTES,
+    sidecar_enabled=settings.PDF_TEXT_CACHE_SIDECAR_ENABLED,
+)
@@ -0,0 +1,325 @@
+"""
+Text Compaction Module
+
+Removes text that costs prompt tokens but carries no requirements, between
+PDF extraction and the LLM:
+
+- Running headers and footers: lines at the top or bottom of a page that
+  repeat on at least TEXT_COMPACTION_REPEATED_LINE_MIN_PAGES pages and
+  TEXT_COMPACTION_REPEATED_LINE_MIN_SHARE of all pages. Digits are ignored
+  only in a first or last line that carries a page reference, so "ACME Spec -
+  Page 3" matches "ACME Spec - Page 4"; other lines, including per-page
+  headings such as "Section 3", must repeat exactly.
+- Page numbers at the top or bottom of a page. Labelled ones ("Page 12",
+  "12 of 40", "12 / 40") always go. A bare number or numeral ("12", "- 12 -",
+  "xii") goes only as the outermost line of a page end where such lines
+  appear on as many pages as a running header needs, so a lone "500", "CV"
+  or "XL" that ends one page is kept.
+- Tables of contents (TEXT_COMPACTION_DROP_TOC, off by default): pages with
+  at least MIN_TOC_ENTRIES entries ending in a dot leader and a page number
+  lose those entries and their heading. Plain column layouts such as
+  "1   Max concurrent users      500" are never treated as entries.
+- Boilerplate sections (TEXT_COMPACTION_DROP_BOILERPLATE): from a heading in
+  TEXT_COMPACTION_BOILERPLATE_HEADINGS (revision history, copyright, ...) to
+  the next heading or the end of the page.
+- Whitespace: runs of spaces and tabs, trailing spaces and blank-line runs.
+
+Pages keep their separators, even when emptied, so chunk page numbers still
+match the extracted text. Each run reports its token counts before and after.
+
+Compacted texts are cached per document ID and compaction options in an LRU
+of TEXT_COMPACTION_CACHE_MAX_BYTES, separate from the extracted text cache,
+so a document is compacted once even when its extracted text is too large to
+stay in memory.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import text_compaction_tokens
+from app.core.tracing import set_span_attribute
+from app.services.document_chunker import estimate_tokens
+from app.services.pdf_parse_engine import PAGE_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+# Non-empty lines at each end of a page that can be a running header or footer.
+EDGE_LINES = 3
+# A table of contents needs this many entries on a page before any are dropped.
+MIN_TOC_ENTRIES = 3
+
+_DIGITS = re.compile(r"\d+")
+_INLINE_WHITESPACE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PAGE_REF = r"(?:\d{1,4}|(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3}))"
+# A page number with a "page" prefix or an "of N" / "/ N" suffix.
+_PAGE_LABEL = re.compile(
+    rf"^[-–—\s]*(?:page\s*{_PAGE_REF}(?:\s*(?:of|/)\s*\d{{1,4}})?|{_PAGE_REF}\s*(?:of|/)\s*\d{{1,4}})[-–—\s]*$",
+    re.IGNORECASE,
+)
+# A bare number or roman numeral: a page number only if page ends carry one consistently.
+_BARE_PAGE_REF = re.compile(rf"^[-–—\s]*{_PAGE_REF}[-–—\s]*$", re.IGNORECASE)
+# An entry ends in a page reference after a dot leader, ellipsis or rule. A plain
+# wide gap is not enough: requirement tables look the same.
+_TOC_ENTRY = re.compile(
+    rf"^\S.*?(?:\s*(?:\.\s*){{3,}}|\s*…+\s*|\s*_{{3,}}\s*){_PAGE_REF}$",
+    re.IGNORECASE,
+)
+# A page reference in a running header or footer ("Page 3", "3 of 40", "3 / 40").
+_PAGE_TOKEN = re.compile(r"\bpage\s*\d+|\b\d+\s*(?:of|/)\s*\d+\b", re.IGNORECASE)
+_TOC_HEADING = re.compile(r"^(?:table\s+of\s+contents|contents)$", re.IGNORECASE)
+# "3. Scope", "4.2 Login" or "## Login", but not a version row such as "1.1  2024-03-02  Analyst".
+_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+[A-Z][^.!?]*|#{1,6}\s+\S.*)$")
+
+
+class CompactionResult:
+    """
+    Compacted text and what was removed from it.
+
+    Attributes:
+        text (str): The compacted text
+        tokens_before (int): Estimated tokens of the input
+        tokens_after (int): Estimated tokens of the output
+        removed_lines (Dict[str, int]): Lines dropped per rule
+    """
+
+    def __init__(self, text: str, tokens_before: int, tokens_after: int, removed_lines: Dict[str, int]):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.removed_lines = removed_lines
+
+    @property
+    def reduction(self) -> float:
+        """Share of the input tokens removed."""
+        return 1.0 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def _edge_keys(lines: List[str]) -> Dict[int, str]:
+    """
+    Comparison keys of the first and last EDGE_LINES non-empty lines of a page,
+    by line index. The outermost line at each end is compared without its
+    digits if it carries a page reference.
+    """
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    keys = {}
+    for i in non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]:
+        key = _INLINE_WHITESPACE.sub(" ", lines[i]).strip().lower()
+        outermost = i in (non_empty[0], non_empty[-1])
+        keys[i] = "#" + _DIGITS.sub("#", key) if outermost and _PAGE_TOKEN.search(key) else key
+    return keys
+
+
+def _repeated_edge_lines(pages: List[List[str]], min_pages: int, min_share: float) -> Set[str]:
+    """Edge-line keys that repeat on enough pages to be running headers or footers."""
+    page_counts: Dict[str, int] = {}
+    for lines in pages:
+        for key in set(_edge_keys(lines).values()):
+            page_counts[key] = page_counts.get(key, 0) + 1
+    threshold = max(min_pages, min_share * len(pages))
+    return {key for key, count in page_counts.items() if count >= threshold and key}
+
+
+def _outermost_lines(lines: List[str]) -> Dict[str, int]:
+    """Indices of the first and last non-empty lines of a page, by page end."""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    return {"top": non_empty[0], "bottom": non_empty[-1]} if non_empty else {}
+
+
+def _numbered_page_ends(pages: List[List[str]], min_pages: int, min_share: float) -> Set[str]:
+    """Page ends ("top", "bottom") whose outermost line is a bare page number on enough pages."""
+    counts = {"top": 0, "bottom": 0}
+    for lines in pages:
+        for end, i in _outermost_lines(lines).items():
+            if _BARE_PAGE_REF.match(lines[i].strip()):
+                counts[end] += 1
+    threshold = max(min_pages, min_share * len(pages))
+    return {end for end, count in counts.items() if count >= threshold}
+
+
+def _is_toc_entry(line: str) -> bool:
+    # Cheap checks first: the regex backtracks on long lines.
+    if not line or not (line[-1].isdigit() or line[-1] in "ivxlcIVXLC"):
+        return False
+    if not ("..." in line or "…" in line or "___" in line or ". ." in line):
+        return False
+    return _TOC_ENTRY.match(line) is not None
+
+
+def _drop_toc(lines: List[str], removed: Set[int]) -> int:
+    entries = [i for i, line in enumerate(lines) if i not in removed and _is_toc_entry(line.strip())]
+    if len(entries) < MIN_TOC_ENTRIES:
+        return 0
+    dropped = set(entries)
+    dropped.update(i for i, line in enumerate(lines) if _TOC_HEADING.match(line.strip()))
+    dropped -= removed
+    removed.update(dropped)
+    return len(dropped)
+
+
+def _drop_boilerplate(lines: List[str], removed: Set[int], headings: Iterable[str]) -> int:
+    dropped = 0
+    in_section = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        # Headings are short; a sentence that merely mentions "copyright" is not one.
+        heading = re.sub(r"^[\d.\s#]+", "", stripped).rstrip(":").lower()
+        if len(stripped) <= 60 and heading in headings:
+            in_section = True
+        elif in_section and _HEADING.match(stripped):
+            in_section = False
+        if in_section and i not in removed:
+            removed.add(i)
+            dropped += 1
+    return dropped
+
+
+def compact_text(
+    text: str,
+    repeated_line_min_pages: int = 3,
+    repeated_line_min_share: float = 0.5,
+    drop_toc: bool = False,
+    drop_boilerplate: bool = False,
+    boilerplate_headings: Iterable[str] = (),
+) -> CompactionResult:
+    """
+    Compacts extracted document text (pages joined by PAGE_SEPARATOR).
+
+    Returns:
+        CompactionResult: The compacted text, token counts and removal counts.
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_SEPARATOR)]
+    headings = {heading.strip().lower() for heading in boilerplate_headings if heading.strip()}
+    repeated: Set[str] = set()
+    numbered_ends: Set[str] = set()
+    if len(pages) > 1:
+        repeated = _repeated_edge_lines(pages, repeated_line_min_pages, repeated_line_min_share)
+        numbered_ends = _numbered_page_ends(pages, repeated_line_min_pages, repeated_line_min_share)
+    removed_lines = {"repeated": 0, "page_number": 0, "toc": 0, "boilerplate": 0}
+
+    compacted_pages = []
+    for lines in pages:
+        removed: Set[int] = set()
+        page_number_lines = {i for end, i in _outermost_lines(lines).items()
+                             if end in numbered_ends and _BARE_PAGE_REF.match(lines[i].strip())}
+        for i, key in _edge_keys(lines).items():
+            if i in page_number_lines or _PAGE_LABEL.match(lines[i].strip()):
+                removed.add(i)
+                removed_lines["page_number"] += 1
+            elif key in repeated:
+                removed.add(i)
+                removed_lines["repeated"] += 1
+        if drop_toc:
+            removed_lines["toc"] += _drop_toc(lines, removed)
+        if drop_boilerplate and headings:
+            removed_lines["boilerplate"] += _drop_boilerplate(lines, removed, headings)
+
+        kept = [_INLINE_WHITESPACE.sub(" ", line).strip() for i, line in enumerate(lines) if i not in removed]
+        compacted_pages.append(_BLANK_LINES.sub("\n\n", "\n".join(kept)).strip())
+
+    compacted = PAGE_SEPARATOR.join(compacted_pages)
+    return CompactionResult(compacted, estimate_tokens(text), estimate_tokens(compacted), removed_lines)
+
+
+def compact_document_text(document_id: object, text: str) -> str:
+    """
+    Compacts a document's extracted text with the TEXT_COMPACTION_* settings,
+    recording the token counts before and after. Returns the text unchanged
+    when compaction is disabled. CPU-bound; run it in a threadpool.
+    """
+    if not settings.TEXT_COMPACTION_ENABLED or not text:
+        return text
+    result = compact_text(
+        text,
+        repeated_line_min_pages=settings.TEXT_COMPACTION_REPEATED_LINE_MIN_PAGES,
+        repeated_line_min_share=settings.TEXT_COMPACTION_REPEATED_LINE_MIN_SHARE,
+        drop_toc=settings.TEXT_COMPACTION_DROP_TOC,
+        drop_boilerplate=settings.TEXT_COMPACTION_DROP_BOILERPLATE,
+        boilerplate_headings=settings.TEXT_COMPACTION_BOILERPLATE_HEADINGS.split(","),
+    )
+    text_compaction_tokens.inc(result.tokens_before, "before")
+    text_compaction_tokens.inc(result.tokens_after, "after")
+    set_span_attribute("document.tokens_before_compaction", result.tokens_before)
+    set_span_attribute("document.tokens_after_compaction", result.tokens_after)
+    logger.info(
+        f"Compacted text of document {document_id}: ~{result.tokens_before} -> ~{result.tokens_after} tokens "
+        f"({result.reduction:.1%} removed; lines dropped: {result.removed_lines})."
+    )
+    return result.text
+
+
+def _compaction_options() -> Tuple:
+    return (
+        settings.TEXT_COMPACTION_REPEATED_LINE_MIN_PAGES,
+        settings.TEXT_COMPACTION_REPEATED_LINE_MIN_SHARE,
+        settings.TEXT_COMPACTION_DROP_TOC,
+        settings.TEXT_COMPACTION_DROP_BOILERPLATE,
+        settings.TEXT_COMPACTION_BOILERPLATE_HEADINGS,
+    )
+
+
+class CompactedTextCache:
+    """
+    Thread-safe LRU of compacted texts keyed by document ID and the compaction
+    options in effect, bounded by their UTF-8 size. Document IDs are never
+    reused for other content, so an entry stays valid until it is evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[str, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, document_id: object) -> Optional[str]:
+        """Returns the document's compacted text for the current options, or None."""
+        key = (str(document_id), _compaction_options())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, document_id: object, text: str) -> None:
+        """Stores a compacted text, evicting the least recently used entries as needed."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = (str(document_id), _compaction_options())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= previous[1]
+            self._entries[key] = (text, size)
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+compacted_text_cache = CompactedTextCache(max_bytes=settings.TEXT_COMPACTION_CACHE_MAX_BYTES)
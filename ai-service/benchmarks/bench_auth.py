@@ -0,0 +1,77 @@
+# ai-service/benchmarks/bench_auth.py
+"""
+Measures per-request authentication overhead of `get_current_user_claims`
+with and without the verified-JWT cache, for a gateway-style HS512 token.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_auth --requests 20000 --tokens 1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core.security import VerifiedTokenCache, get_current_user_claims
+import app.core.security as security
+
+
+def make_tokens(count: int) -> list:
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {
+                "sub": f"user-{index}",
+                "email": f"user-{index}@example.com",
+                "roles": ["USER"],
+                "iat": now,
+                "exp": now + 3600,
+                **({"iss": settings.JWT_ISSUER} if settings.JWT_ISSUER else {}),
+            },
+            settings.JWT_SECRET_KEY,
+            algorithm=settings.JWT_ALGORITHM,
+        )
+        for index in range(count)
+    ]
+
+
+async def run(tokens: list, requests: int) -> float:
+    start = time.perf_counter()
+    for index in range(requests):
+        await get_current_user_claims(tokens[index % len(tokens)])
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    tokens = make_tokens(args.tokens)
+    print(f"{args.requests} authenticated requests over {args.tokens} distinct token(s), {settings.JWT_ALGORITHM}.")
+
+    results = []
+    for mode, max_entries in (("uncached", 0), ("cached", max(args.tokens, settings.JWT_CACHE_MAX_ENTRIES))):
+        security.verified_token_cache = VerifiedTokenCache(max_entries, settings.JWT_CACHE_MAX_TTL_SECONDS)
+        await run(tokens, min(args.requests, 1000))  # Warm up
+        elapsed = await run(tokens, args.requests)
+        results.append({
+            "mode": mode,
+            "requests": args.requests,
+            "seconds": elapsed,
+            "us_per_request": elapsed / args.requests * 1e6,
+            "hit_ratio": security.verified_token_cache.hits / max(1, security.verified_token_cache.hits + security.verified_token_cache.misses),
+        })
+
+    for result in results:
+        print(f"{result['mode']:>8} {result['us_per_request']:8.1f} us/request  hit ratio {result['hit_ratio']:.2f}")
+    print(f"Speed-up: {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Authenticated requests to time per mode.")
+    parser.add_argument("--tokens", type=int, default=1, help="Distinct tokens (users) cycled through.")
+    parser.add_argument("--json", action="store_true", help="Also print machine-readable results.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+# ai-service/benchmarks/bench_document_session.py
+"""
+Compares iterating on the system prompt against one document with
+`generate_ticket_json` (the document is resent with every prompt) and with a
+document session (the document is registered once and sent as a stable,
+cacheable prefix). Runs in-process against the synthetic provider, whose
+prefix cache stands in for a provider's prompt cache; prompt processing is
+charged at --prefill-tokens-per-second for tokens outside that cache.
+
+Reports prompt tokens sent, tokens served from the cache and latency per
+generation for both approaches.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_document_session --document-tokens 20000 --prompts 8
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from uuid import uuid4
+
+
+def build_document(tokens: int) -> str:
+    lines = []
+    page = 1
+    while sum(len(line) + 1 for line in lines) < tokens * 4:
+        lines.append(f"--- Page {page} ---")
+        for item in range(12):
+            lines.append(
+                f"REQ-{page}.{item}: The system shall record every change to customer record {page * 100 + item} "
+                "in the audit log, including the user, the timestamp and the previous value."
+            )
+        page += 1
+    return "\n".join(lines)
+
+
+PROMPT = (
+    "Extract the main requirement title, a detailed description including acceptance criteria, "
+    "and assign a priority (High, Medium, Low). Format as JSON with keys 'title', 'description', 'priority'. "
+    "Prompt revision {revision}."
+)
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.services.document_session import document_session_store
+    from app.services.llm_processor import llm_processor_service
+    from app.services.llm_scheduler import estimate_prompt_tokens
+
+    document = build_document(args.document_tokens)
+
+    full_latencies = []
+    full_tokens = 0
+    for revision in range(args.prompts):
+        prompt = PROMPT.format(revision=f"full-{revision}")
+        started = time.perf_counter()
+        response = await llm_processor_service.generate_ticket_json(document, prompt, bypass_cache=True)
+        full_latencies.append((time.perf_counter() - started) * 1000.0)
+        assert response.status == "success", response.error_message
+        full_tokens += estimate_prompt_tokens(llm_processor_service._build_ticket_messages(document, prompt))
+
+    session = await document_session_store.create("bench", uuid4(), document)
+    session_latencies = []
+    for revision in range(args.prompts):
+        response = await llm_processor_service.generate_session_ticket_json(
+            session, PROMPT.format(revision=f"session-{revision}"), bypass_cache=True
+        )
+        assert response.status == "success", response.error_message
+        session_latencies.append(response.latency_ms)
+    stats = session.stats()
+
+    print(f"Document: ~{session.document_tokens} tokens, {args.prompts} prompt revisions, session mode '{session.cache_mode}'")
+    print(f"{'approach':<10} {'tokens sent':>12} {'cached':>10} {'mean ms':>10} {'first ms':>10} {'rest ms':>10}")
+    print(
+        f"{'full':<10} {full_tokens:>12} {0:>10} {statistics.mean(full_latencies):>10.1f} "
+        f"{full_latencies[0]:>10.1f} {statistics.mean(full_latencies[1:] or full_latencies):>10.1f}"
+    )
+    print(
+        f"{'session':<10} {stats['prompt_tokens_sent']:>12} {stats['cached_tokens']:>10} {stats['latency_ms_avg']:>10.1f} "
+        f"{session_latencies[0]:>10.1f} {statistics.mean(session_latencies[1:] or session_latencies):>10.1f}"
+    )
+    print(f"Session tokens saved: {stats['tokens_saved']} of {stats['baseline_tokens']}")
+    await document_session_store.close_all()
+
+
+def main(args: argparse.Namespace) -> None:
+    # The settings are read at import time, so configure the synthetic provider first.
+    os.environ["LLM_PROVIDER"] = "synthetic"
+    os.environ["LLM_CACHE_BACKEND"] = "none"
+    os.environ["LLM_SYNTHETIC_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["LLM_SYNTHETIC_LATENCY_SIGMA"] = "0"
+    os.environ["LLM_SYNTHETIC_PREFILL_TOKENS_PER_SECOND"] = str(args.prefill_tokens_per_second)
+    os.environ["LLM_SYNTHETIC_TOKENS_PER_SECOND"] = "0"
+    os.environ["LLM_RATE_LIMIT_TPM"] = "0"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--document-tokens", type=int, default=20000, help="Approximate size of the generated document.")
+    parser.add_argument("--prompts", type=int, default=8, help="Prompt revisions to run with each approach.")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Synthetic time to first token.")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=20000.0,
+                        help="Synthetic prompt processing rate for tokens outside the prefix cache.")
+    main(parser.parse_args())
@@ -0,0 +1,412 @@
+# ai-service/benchmarks/bench_e2e.py
+"""
+End-to-end load test of the upload -> generate -> evaluate flow.
+
+Starts a MinIO stand-in, ai-service and eval-service as local subprocesses
+(both services with LLM_PROVIDER=synthetic, so no API key or network is needed), then runs `--iterations` user
+flows with `--concurrency` flows in flight. Each flow uploads a synthetic PDF
+(page count drawn from `--pages`, content unique per flow), generates a ticket
+from it and evaluates the ticket.
+
+Reports, as JSON:
+- throughput and p50/p95/p99 latency per endpoint, measured by the client;
+- p50/p95/p99 per pipeline stage, from the services' /metrics histograms
+  (bucket-interpolated, so approximate);
+- peak RSS of each service process and of its child processes.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_e2e --iterations 200 --concurrency 16 --pages 5,20,80 --output e2e.json
+    python -m benchmarks.bench_e2e --compare e2e.json   # print deltas against an earlier run
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+from benchmarks.synthetic_pdf import make_requirements_pdf, with_revision
+
+AI_SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVAL_SERVICE_DIR = os.path.join(os.path.dirname(AI_SERVICE_DIR), "eval-service")
+
+JWT_SECRET = "benchmark-secret"
+JWT_ISSUER = "api-gateway-service"
+SYSTEM_PROMPT = (
+    "Extract the most important requirement as a ticket. Respond with a JSON object with "
+    "'title', 'description' (a user story with acceptance criteria) and 'priority' (High, Medium or Low)."
+)
+
+_BUCKET_LINE = re.compile(r'^pipeline_stage_duration_seconds_bucket\{stage="([^"]+)",le="([^"]+)"\} (\S+)$')
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def histogram_quantile(buckets: List[tuple], fraction: float) -> Optional[float]:
+    """Estimates a quantile from cumulative (upper bound, count) buckets, as Prometheus does."""
+    total = buckets[-1][1] if buckets else 0
+    if total <= 0:
+        return None
+    rank = fraction * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if math.isinf(bound):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def parse_stage_buckets(metrics_text: str) -> Dict[str, Dict[float, float]]:
+    stages: Dict[str, Dict[float, float]] = defaultdict(dict)
+    for line in metrics_text.splitlines():
+        match = _BUCKET_LINE.match(line)
+        if match:
+            stages[match.group(1)][float(match.group(2))] = float(match.group(3))
+    return stages
+
+
+def stage_summary(before: Dict[str, Dict[float, float]], after: Dict[str, Dict[float, float]]) -> dict:
+    """Per-stage count and quantiles of the observations made between two scrapes."""
+    summary = {}
+    for stage, counts in after.items():
+        buckets = sorted((bound, count - before.get(stage, {}).get(bound, 0.0)) for bound, count in counts.items())
+        if not buckets or buckets[-1][1] <= 0:
+            continue
+        summary[stage] = {
+            "count": int(buckets[-1][1]),
+            **{
+                f"p{int(fraction * 100)}_ms": round(histogram_quantile(buckets, fraction) * 1000, 2)
+                for fraction in (0.5, 0.95, 0.99)
+            },
+        }
+    return summary
+
+
+def peak_rss_bytes(pid: int) -> dict:
+    """VmHWM (peak RSS) of a process and the sum over its children, from /proc."""
+    def vm_hwm(process_id: int) -> int:
+        try:
+            with open(f"/proc/{process_id}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    children = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == pid:
+            children += vm_hwm(int(entry))
+    return {"server": vm_hwm(pid), "children": children}
+
+
+class LocalStack:
+    """The MinIO stand-in and both services, as subprocesses on local ports."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.processes: Dict[str, subprocess.Popen] = {}
+        self.ai_url = f"http://127.0.0.1:{args.ai_port}"
+        self.eval_url = f"http://127.0.0.1:{args.eval_port}"
+
+    def _spawn(self, name: str, command: List[str], cwd: str, env: dict) -> None:
+        os.makedirs(self.args.log_dir, exist_ok=True)
+        log_file = open(os.path.join(self.args.log_dir, f"{name}.log"), "w")
+        self.processes[name] = subprocess.Popen(
+            command, cwd=cwd, env={**os.environ, **env}, stdout=log_file, stderr=subprocess.STDOUT
+        )
+
+    @staticmethod
+    def _uvicorn_command(port: int) -> List[str]:
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+
+    def start(self) -> None:
+        args = self.args
+        common_env = {
+            "JWT_SECRET_KEY": JWT_SECRET,
+            "JWT_ALGORITHM": "HS512",
+            "JWT_ISSUER": JWT_ISSUER,
+            "METRICS_ENABLED": "True",
+            "TRACING_ENABLED": "False",
+        }
+        self._spawn(
+            "minio-standin",
+            [sys.executable, "-m", "benchmarks.minio_standin", "--port", str(args.minio_port)],
+            AI_SERVICE_DIR,
+            {"PYTHONPATH": AI_SERVICE_DIR},
+        )
+        self._spawn(
+            "ai-service",
+            self._uvicorn_command(args.ai_port),
+            AI_SERVICE_DIR,
+            {
+                **common_env,
+                "PYTHONPATH": AI_SERVICE_DIR,
+                "LLM_PROVIDER": "synthetic",
+                "LLM_SYNTHETIC_LATENCY_MS": str(args.llm_latency_ms),
+                "LLM_SYNTHETIC_LATENCY_SIGMA": str(args.llm_latency_sigma),
+                "LLM_SYNTHETIC_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+                "LLM_STRUCTURED_OUTPUT": str(args.structured_output),
+                "MINIO_ENDPOINT": f"127.0.0.1:{args.minio_port}",
+                "MINIO_SECURE": "False",
+                "LLM_RATE_LIMIT_RPM": "0",
+                "LLM_RATE_LIMIT_TPM": "0",
+            },
+        )
+        self._spawn(
+            "eval-service",
+            self._uvicorn_command(args.eval_port),
+            EVAL_SERVICE_DIR,
+            {
+                **common_env,
+                "PYTHONPATH": EVAL_SERVICE_DIR,
+                "EVAL_LLM_PROVIDER": "synthetic",
+                "EVAL_LLM_SYNTHETIC_LATENCY_MS": str(args.llm_latency_ms),
+                "EVAL_LLM_SYNTHETIC_LATENCY_SIGMA": str(args.llm_latency_sigma),
+                "EVAL_LLM_SYNTHETIC_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+                "EVAL_STRUCTURED_OUTPUT": str(args.structured_output),
+                "EVAL_LLM_RATE_LIMIT_RPM": "0",
+                "EVAL_LLM_RATE_LIMIT_TPM": "0",
+            },
+        )
+
+    async def wait_until_ready(self, client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        for url in (self.ai_url, self.eval_url):
+            while True:
+                for name, process in self.processes.items():
+                    if process.poll() is not None:
+                        raise RuntimeError(f"{name} exited with code {process.returncode}; see {self.args.log_dir}/{name}.log")
+                try:
+                    if (await client.get(f"{url}/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not become healthy within {timeout:.0f}s")
+                await asyncio.sleep(0.25)
+
+    def stop(self) -> None:
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+class LoadRunner:
+    def __init__(self, args: argparse.Namespace, stack: LocalStack, documents: List[bytes]):
+        self.args = args
+        self.stack = stack
+        self.documents = documents
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.flows_completed = 0
+
+    def _token(self, user_index: int) -> str:
+        now = int(time.time())
+        claims = {"sub": f"bench-user-{user_index}", "email": f"bench-user-{user_index}@example.com",
+                  "iss": JWT_ISSUER, "iat": now, "exp": now + 3600}
+        return jwt.encode(claims, JWT_SECRET, algorithm="HS512")
+
+    async def _timed(self, endpoint: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+    async def run_flow(self, client: httpx.AsyncClient, flow_index: int) -> None:
+        headers = {"Authorization": f"Bearer {self._token(flow_index % self.args.concurrency)}"}
+        pdf_bytes = self.documents[flow_index % len(self.documents)]
+
+        uploaded = await self._timed("upload", client.post(
+            f"{self.stack.ai_url}/api/v1/documents/upload/",
+            files={"file": (f"spec-{flow_index}.pdf", pdf_bytes, "application/pdf")},
+            headers=headers,
+        ))
+        if uploaded is None:
+            return
+        generated = await self._timed("generate", client.post(
+            f"{self.stack.ai_url}/api/v1/tickets/generate-from-document",
+            json={"document_id": uploaded.json()["document_id"], "system_prompt": SYSTEM_PROMPT,
+                  "bypass_cache": not self.args.use_cache},
+            headers=headers,
+        ))
+        if generated is None:
+            return
+        evaluate_headers = headers if self.args.use_cache else {**headers, "Cache-Control": "no-cache"}
+        evaluated = await self._timed("evaluate", client.post(
+            f"{self.stack.eval_url}/api/v1/evaluate/ticket",
+            json={"generated_json": generated.json()["generated_json"], "original_system_prompt": SYSTEM_PROMPT},
+            headers=evaluate_headers,
+        ))
+        if evaluated is not None:
+            self.flows_completed += 1
+
+    async def run(self, client: httpx.AsyncClient, iterations: int, start_index: int = 0) -> float:
+        queue: asyncio.Queue = asyncio.Queue()
+        for flow_index in range(start_index, start_index + iterations):
+            queue.put_nowait(flow_index)
+
+        async def worker():
+            while not queue.empty():
+                await self.run_flow(client, queue.get_nowait())
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(self.args.concurrency)])
+        return time.perf_counter() - started
+
+
+def build_documents(page_counts: List[int], count: int) -> List[bytes]:
+    bases = {pages: make_requirements_pdf(pages) for pages in set(page_counts)}
+    rng = random.Random(42)
+    return [with_revision(bases[rng.choice(page_counts)], revision) for revision in range(count)]
+
+
+async def main(args: argparse.Namespace) -> dict:
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    warmup = args.concurrency
+    print(f"Building {args.iterations + warmup} synthetic PDFs ({args.pages} pages)...")
+    documents = build_documents(page_counts, args.iterations + warmup)
+
+    stack = LocalStack(args)
+    stack.start()
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            await stack.wait_until_ready(client)
+
+            runner = LoadRunner(args, stack, documents)
+            await runner.run(client, warmup)
+            runner.latencies.clear()
+            runner.errors.clear()
+            runner.flows_completed = 0
+
+            before = {name: parse_stage_buckets((await client.get(f"{url}/metrics")).text)
+                      for name, url in (("ai-service", stack.ai_url), ("eval-service", stack.eval_url))}
+            print(f"Running {args.iterations} flows with concurrency {args.concurrency}...")
+            elapsed = await runner.run(client, args.iterations, start_index=warmup)
+            after = {name: parse_stage_buckets((await client.get(f"{url}/metrics")).text)
+                     for name, url in (("ai-service", stack.ai_url), ("eval-service", stack.eval_url))}
+    finally:
+        rss = {name: peak_rss_bytes(process.pid) for name, process in stack.processes.items()}
+        stack.stop()
+
+    endpoints = {}
+    for endpoint in ("upload", "generate", "evaluate"):
+        values = runner.latencies.get(endpoint, [])
+        endpoints[endpoint] = {
+            "count": len(values),
+            "errors": runner.errors.get(endpoint, 0),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            **{
+                f"p{int(fraction * 100)}_ms": round(percentile(values, fraction) * 1000, 2) if values else None
+                for fraction in (0.5, 0.95, 0.99)
+            },
+        }
+
+    return {
+        "commit": _git_commit(),
+        "config": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "pages": page_counts,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_latency_sigma": args.llm_latency_sigma,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "structured_output": args.structured_output,
+            "use_cache": args.use_cache,
+        },
+        "duration_seconds": round(elapsed, 3),
+        "flows_completed": runner.flows_completed,
+        "flows_per_second": round(runner.flows_completed / elapsed, 2),
+        "endpoints": endpoints,
+        "stages": {name: stage_summary(before[name], after[name]) for name in after},
+        "peak_rss_bytes": rss,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=AI_SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    print(f"Compared with {baseline.get('commit')} (baseline) -> {current.get('commit')}:")
+    for endpoint, stats in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint, {})
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if stats.get(key) is not None and base.get(key):
+                cells.append(f"{key}={stats[key]} ({(stats[key] - base[key]) / base[key] * 100:+.1f}%)")
+        print(f"  {endpoint:>8}: " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100, help="Measured upload->generate->evaluate flows.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Flows in flight at once.")
+    parser.add_argument("--pages", default="5,20,80", help="Comma-separated page counts to draw documents from.")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Median time to first token of the synthetic LLM.")
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.3, help="Log-normal spread of that latency; 0 makes it fixed.")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=150.0, help="Synthetic LLM output rate; 0 emits instantly.")
+    parser.add_argument("--structured-output", action="store_true", help="Run both services with schema-constrained JSON output.")
+    parser.add_argument("--use-cache", action="store_true", help="Allow LLM/verdict cache hits (bypassed by default).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--ai-port", type=int, default=18000)
+    parser.add_argument("--eval-port", type=int, default=18001)
+    parser.add_argument("--minio-port", type=int, default=19000)
+    parser.add_argument("--log-dir", default="./.cache/bench-logs", help="Where the subprocesses' output goes.")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--compare", help="A previous JSON report to compare this run against.")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print_comparison(json.load(baseline_file), report)
@@ -0,0 +1,78 @@
+# ai-service/benchmarks/bench_output_parse.py
+"""
+Compares the previous LLM output handling (strip code fences, `json.loads`,
+then `GeneratedTicketData.model_validate`) with `llm_output_parser.parse_ticket`
+on a corpus of realistic responses: clean, fenced, wrapped in prose, and with
+common defects. Reports the share of responses each approach accepts and the
+time per parse.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_output_parse --iterations 20000
+"""
+
+import argparse
+import json
+import time
+
+from pydantic import ValidationError
+
+from app.schemas.ticket import GeneratedTicketData
+from app.services.llm_output_parser import parse_ticket, strip_code_fence
+
+TICKET = {
+    "title": "Lock accounts after repeated failed logins",
+    "description": (
+        "As a security officer, I want accounts locked after five failed logins so that brute-force attacks fail. "
+        "AC: 1. The fifth failed attempt locks the account for 15 minutes. 2. The user is told the account is locked. "
+        "3. Administrators can unlock the account."
+    ),
+    "priority": "High",
+}
+PRETTY = json.dumps(TICKET, indent=2)
+
+CORPUS = {
+    "clean": PRETTY,
+    "fenced": f"```json\n{PRETTY}\n```",
+    "prose_before_and_after": f"Here is the ticket you asked for:\n\n```json\n{PRETTY}\n```\n\nLet me know if you need changes.",
+    "trailing_comma": PRETTY.replace('"High"', '"High",'),
+    "smart_quotes": PRETTY.replace('"title"', "“title”").replace('"priority": "High"', "“priority”: “High”"),
+    "raw_newline_in_string": PRETTY.replace("AC: 1.", "AC:\n1."),
+    "brace_in_prose": "Ticket {draft}:\n" + PRETTY,
+}
+
+
+def legacy_parse(raw_output: str):
+    try:
+        return GeneratedTicketData.model_validate(json.loads(strip_code_fence(raw_output)))
+    except (json.JSONDecodeError, ValidationError):
+        return None
+
+
+def time_per_parse(parse, raw_output: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(raw_output)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'case':<24} {'legacy':>14} {'parser':>14}")
+    accepted = {"legacy": 0, "parser": 0}
+    for name, raw_output in CORPUS.items():
+        legacy_ok = legacy_parse(raw_output) is not None
+        parser_ok = parse_ticket(raw_output)[0] is not None
+        accepted["legacy"] += legacy_ok
+        accepted["parser"] += parser_ok
+        legacy_us = time_per_parse(legacy_parse, raw_output, args.iterations)
+        parser_us = time_per_parse(parse_ticket, raw_output, args.iterations)
+        print(
+            f"{name:<24} {('ok' if legacy_ok else 'FAIL'):>4} {legacy_us:6.1f} us "
+            f"{('ok' if parser_ok else 'FAIL'):>4} {parser_us:6.1f} us"
+        )
+    print(f"Accepted: legacy {accepted['legacy']}/{len(CORPUS)}, parser {accepted['parser']}/{len(CORPUS)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="Parses to time per case and approach.")
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+# ai-service/benchmarks/bench_pdf_parse.py
+"""
+Measures PDF parsing throughput (pages/sec) of the inline path against the
+process-pool engine at increasing pool sizes.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_pdf_parse --pages 300 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.services.pdf_parse_engine import PDFParseEngine, parse_document_inline
+from benchmarks.synthetic_pdf import make_requirements_pdf
+
+
+async def run_inline(pdf_bytes: bytes, concurrency: int) -> float:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        loop.run_in_executor(None, parse_document_inline, pdf_bytes) for _ in range(concurrency)
+    ])
+    return time.perf_counter() - start
+
+
+async def run_engine(engine: PDFParseEngine, pdf_bytes: bytes, concurrency: int) -> float:
+    await engine.parse(pdf_bytes)  # Warm up: spawn workers before timing.
+    start = time.perf_counter()
+    await asyncio.gather(*[engine.parse(pdf_bytes) for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    pdf_bytes = make_requirements_pdf(args.pages)
+    total_pages = args.pages * args.concurrency
+    print(f"Synthetic PDF: {args.pages} pages, {len(pdf_bytes)} bytes; {args.concurrency} concurrent parses.")
+
+    results = []
+    elapsed = await run_inline(pdf_bytes, args.concurrency)
+    results.append({"mode": "inline", "workers": 0, "seconds": elapsed, "pages_per_sec": total_pages / elapsed})
+
+    pool_sizes = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    for pool_size in [size for size in pool_sizes if size <= (os.cpu_count() or 1)]:
+        engine = PDFParseEngine(
+            pool_size=pool_size,
+            inline_max_pages=0,
+            min_pages_per_task=args.min_pages_per_task,
+            max_tasks_per_child=1000,
+        )
+        try:
+            elapsed = await run_engine(engine, pdf_bytes, args.concurrency)
+        finally:
+            engine.shutdown()
+        results.append({"mode": "pool", "workers": pool_size, "seconds": elapsed, "pages_per_sec": total_pages / elapsed})
+
+    for result in results:
+        print(f"{result['mode']:>6} workers={result['workers']:<3} {result['seconds']:.2f}s  {result['pages_per_sec']:.1f} pages/sec")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic document.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Documents parsed concurrently.")
+    parser.add_argument("--min-pages-per-task", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="Also print machine-readable results.")
+    asyncio.run(main(parser.parse_args()))
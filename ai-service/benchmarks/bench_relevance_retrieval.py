@@ -0,0 +1,87 @@
+# ai-service/benchmarks/bench_relevance_retrieval.py
+"""
+Measures `relevance_retriever` on a generated requirements spec whose pages
+each cover one of several modules (authentication, billing, reporting, ...).
+For a narrow prompt per module it reports the estimated tokens of the full
+document and of the selected chunks, the precision of the selection (share
+of selected chunks from the prompt's module) and the time to build the
+BM25 index and to rank a prompt against the cached index.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.bench_relevance_retrieval --pages 120 --max-tokens 4000
+"""
+
+import argparse
+import time
+
+from app.services.document_chunker import chunk_document, estimate_tokens
+from app.services.pdf_parse_engine import PAGE_SEPARATOR
+from app.services.relevance_retriever import BM25Index, select_relevant_chunks
+
+MODULES = {
+    "authentication": ("log in with email and password, reset a forgotten password and enrol in two-factor "
+                       "authentication; lock the account after failed login attempts"),
+    "billing": "issue invoices, take card payments, refund a payment and send billing statements",
+    "reporting": "build dashboards, export monthly reports as CSV and chart sales trends",
+    "inventory": "track warehouse stock levels, reorder products and record shipments",
+    "notifications": "send email and SMS alerts, and let a user mute notification channels",
+    "search": "search the catalogue by keyword, filter results by category and sort by price",
+}
+
+PROMPTS = {
+    "authentication": "Extract the requirement for password reset and account lockout after failed logins.",
+    "billing": "Extract the requirement about refunds of card payments.",
+    "reporting": "Extract the requirement for exporting monthly reports.",
+    "inventory": "Extract the requirement for reordering products when warehouse stock is low.",
+    "notifications": "Extract the requirement for muting SMS alerts.",
+    "search": "Extract the requirement for filtering search results by category.",
+}
+
+FORMAT = " Format as JSON with keys 'title', 'description', 'priority'."
+
+
+def build_document(pages: int) -> str:
+    names = list(MODULES)
+    page_texts = []
+    for page in range(pages):
+        module = names[page % len(names)]
+        lines = [f"{page + 1}. {module.title()} module"]
+        for item in range(1, 16):
+            lines.append(
+                f"REQ-{module.upper()}-{page}-{item}: The portal shall let a customer {MODULES[module]} "
+                f"(scenario {item}), and record the outcome in the audit log."
+            )
+        page_texts.append("\n".join(lines))
+    return PAGE_SEPARATOR.join(page_texts)
+
+
+def main(args: argparse.Namespace) -> None:
+    document = build_document(args.pages)
+    started = time.perf_counter()
+    index = BM25Index(chunk_document(document, args.chunk_tokens))
+    build_ms = (time.perf_counter() - started) * 1000.0
+    full_tokens = estimate_tokens(document)
+    print(f"Document: {args.pages} pages, ~{full_tokens} tokens, {len(index.chunks)} chunks; index built in {build_ms:.1f} ms")
+
+    for module, prompt in PROMPTS.items():
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            selected = select_relevant_chunks(prompt + FORMAT, index, args.top_k, args.max_tokens) or []
+        rank_ms = (time.perf_counter() - started) / args.iterations * 1000.0
+        tokens = sum(chunk.estimated_tokens for chunk in selected)
+        relevant = sum(1 for chunk in selected if f"REQ-{module.upper()}-" in chunk.text)
+        precision = relevant / len(selected) if selected else 0.0
+        print(
+            f"{module:<15} tokens {full_tokens} -> {tokens} ({1 - tokens / full_tokens:.1%} fewer), "
+            f"{len(selected)} chunks, precision {precision:.0%}, ranked in {rank_ms:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=120, help="Pages in the generated document.")
+    parser.add_argument("--chunk-tokens", type=int, default=600, help="Chunk size of the index.")
+    parser.add_argument("--top-k", type=int, default=6, help="Chunks selected at most.")
+    parser.add_argument("--max-tokens", type=int, default=4000, help="Token budget of the selected chunks.")
+    parser.add_argument("--iterations", type=int, default=20, help="Rankings to time per prompt.")
+    main(parser.parse_args())
@@ -0,0 +1,184 @@
+# ai-service/benchmarks/minio_standin.py
+"""
+An in-memory stand-in for MinIO that speaks the subset of the S3 REST API the
+ai-service uses: bucket lookups, PUT/GET/HEAD/DELETE of objects with
+`x-amz-meta-*` metadata, and multipart uploads. Request signatures are not
+checked. The service's real `Minio` client talks to it over HTTP, so the
+storage path is exercised unchanged.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.minio_standin --port 19000
+"""
+
+import argparse
+import hashlib
+import itertools
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+S3_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class ObjectStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects = {}  # (bucket, key) -> (data, headers)
+        self.uploads = {}  # upload_id -> {part_number: data}
+        self.upload_ids = itertools.count(1)
+
+
+def make_handler(store: ObjectStore):
+    class S3Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _target(self):
+            parts = urlsplit(self.path)
+            bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+            return bucket, key, parse_qs(parts.query, keep_blank_values=True)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _reply(self, status: int, body: bytes = b"", headers: dict = None, head: bool = False):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body and not head:
+                self.wfile.write(body)
+
+        def _xml(self, status: int, xml: str, head: bool = False):
+            body = f'<?xml version="1.0" encoding="UTF-8"?>{xml}'.encode("utf-8")
+            self._reply(status, body, {"Content-Type": "application/xml"}, head)
+
+        def _no_such_key(self, bucket: str, key: str, head: bool = False):
+            self._xml(
+                404,
+                f"<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message>"
+                f"<Key>{key}</Key><BucketName>{bucket}</BucketName><Resource>/{bucket}/{key}</Resource>"
+                f"<RequestId>standin</RequestId><HostId>standin</HostId></Error>",
+                head,
+            )
+
+        def do_GET(self):
+            bucket, key, query = self._target()
+            if not key:
+                if "location" in query:
+                    self._xml(200, f'<LocationConstraint xmlns="{S3_XMLNS}"></LocationConstraint>')
+                else:
+                    self._xml(200, f'<ListBucketResult xmlns="{S3_XMLNS}"><Name>{bucket}</Name></ListBucketResult>')
+                return
+            with store.lock:
+                stored = store.objects.get((bucket, key))
+            if stored is None:
+                self._no_such_key(bucket, key)
+                return
+            data, headers = stored
+            self._reply(200, data, headers)
+
+        def do_HEAD(self):
+            bucket, key, _ = self._target()
+            if not key:
+                self._reply(200)
+                return
+            with store.lock:
+                stored = store.objects.get((bucket, key))
+            if stored is None:
+                self._no_such_key(bucket, key, head=True)
+                return
+            data, headers = stored
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+
+        def _store(self, bucket: str, key: str, data: bytes, request_headers) -> str:
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            headers = {
+                "ETag": etag,
+                "Last-Modified": formatdate(usegmt=True),
+                "Content-Type": request_headers.get("Content-Type", "application/octet-stream"),
+            }
+            headers.update({
+                name: value for name, value in request_headers.items() if name.lower().startswith("x-amz-meta-")
+            })
+            with store.lock:
+                store.objects[(bucket, key)] = (data, headers)
+            return etag
+
+        def do_PUT(self):
+            bucket, key, query = self._target()
+            data = self._body()
+            if not key:
+                self._reply(200)
+                return
+            if "uploadId" in query:
+                with store.lock:
+                    store.uploads[query["uploadId"][0]][int(query["partNumber"][0])] = data
+                self._reply(200, headers={"ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+                return
+            self._reply(200, headers={"ETag": self._store(bucket, key, data, self.headers)})
+
+        def do_POST(self):
+            bucket, key, query = self._target()
+            self._body()
+            if "uploads" in query:
+                with store.lock:
+                    upload_id = str(next(store.upload_ids))
+                    store.uploads[upload_id] = {}
+                    store.uploads[upload_id + ":headers"] = dict(self.headers)
+                self._xml(
+                    200,
+                    f'<InitiateMultipartUploadResult xmlns="{S3_XMLNS}"><Bucket>{bucket}</Bucket>'
+                    f"<Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>",
+                )
+                return
+            if "uploadId" in query:
+                upload_id = query["uploadId"][0]
+                with store.lock:
+                    parts = store.uploads.pop(upload_id, {})
+                    headers = store.uploads.pop(upload_id + ":headers", {})
+                data = b"".join(parts[number] for number in sorted(parts))
+                etag = self._store(bucket, key, data, headers)
+                self._xml(
+                    200,
+                    f'<CompleteMultipartUploadResult xmlns="{S3_XMLNS}"><Bucket>{bucket}</Bucket>'
+                    f"<Key>{key}</Key><ETag>{etag}</ETag></CompleteMultipartUploadResult>",
+                )
+                return
+            self._reply(501)
+
+        def do_DELETE(self):
+            bucket, key, query = self._target()
+            with store.lock:
+                if "uploadId" in query:
+                    store.uploads.pop(query["uploadId"][0], None)
+                else:
+                    store.objects.pop((bucket, key), None)
+            self._reply(204)
+
+        def log_message(self, format, *args):
+            pass
+
+    return S3Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=19000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(ObjectStore()))
+    server.daemon_threads = True
+    print(f"MinIO stand-in listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,44 @@
+"""
+Synthetic requirement PDFs for benchmarks.
+
+Pages carry a running header, a page-number footer and numbered requirement
+lines, so they resemble the specs users upload without shipping real documents.
+"""
+
+import fitz
+
+LINES_PER_PAGE = 40
+
+
+def make_requirements_pdf(page_count: int, lines_per_page: int = LINES_PER_PAGE) -> bytes:
+    """Builds a PDF with `page_count` text pages and returns its bytes."""
+    doc = fitz.open()
+    for page_index in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 40), "ACME Platform - Software Requirements Specification v2.3", fontsize=9)
+        y = 72
+        for line_index in range(lines_per_page):
+            requirement_id = f"REQ-{page_index + 1:03d}-{line_index + 1:02d}"
+            page.insert_text(
+                (72, y),
+                f"{requirement_id}: The system shall validate user session tokens within {50 + line_index} ms.",
+                fontsize=9,
+            )
+            y += 17
+        page.insert_text((290, 810), f"Page {page_index + 1} of {page_count}", fontsize=8)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def with_revision(pdf_bytes: bytes, revision: int) -> bytes:
+    """
+    Returns a copy of `pdf_bytes` with a revision line stamped on the first
+    page, so repeated uploads have distinct content hashes. Much cheaper than
+    building a new document.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    doc[0].insert_text((72, 56), f"Revision {revision}", fontsize=9)
+    stamped = doc.tobytes()
+    doc.close()
+    return stamped
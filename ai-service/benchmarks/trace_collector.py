@@ -0,0 +1,64 @@
+# ai-service/benchmarks/trace_collector.py
+"""
+A local stand-in for an OTLP/HTTP collector: accepts the OTLP/JSON span
+batches both services POST when TRACING_EXPORTER=otlp and appends them, one
+batch per line, to a JSON-lines file that `benchmarks.trace_report` reads.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.trace_collector --port 4318 --output ./.cache/traces/collected.jsonl
+"""
+
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(output_path: str, lock: threading.Lock):
+    class OTLPHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_error(400, "Expected OTLP/JSON")
+                return
+            with lock, open(output_path, "a", encoding="utf-8") as output:
+                output.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            span_count = sum(
+                len(scope_spans.get("spans", []))
+                for resource_spans in payload.get("resourceSpans", [])
+                for scope_spans in resource_spans.get("scopeSpans", [])
+            )
+            print(f"Received {span_count} spans.")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    return OTLPHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="./.cache/traces/collected.jsonl", help="JSON-lines file to append to.")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.output, threading.Lock()))
+    print(f"Collecting OTLP/JSON spans on http://{args.host}:{args.port}/v1/traces into {args.output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
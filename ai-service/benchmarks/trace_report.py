@@ -0,0 +1,79 @@
+# ai-service/benchmarks/trace_report.py
+"""
+Reads OTLP/JSON span files written by the services (or by
+`benchmarks.trace_collector`) and prints the slowest traces as span trees
+with durations, so a slow request can be attributed to storage, parsing or
+the LLM.
+
+Usage (from the ai-service directory):
+    python -m benchmarks.trace_report ./.cache/traces/*.jsonl --top 5
+    python -m benchmarks.trace_report ./.cache/traces/*.jsonl --trace-id 0af7651916cd43dd8448eb211c80319c
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+
+def load_spans(paths: List[str]) -> List[dict]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                if not line.strip():
+                    continue
+                for resource_spans in json.loads(line).get("resourceSpans", []):
+                    service = next(
+                        (attribute["value"].get("stringValue") for attribute in resource_spans.get("resource", {}).get("attributes", [])
+                         if attribute["key"] == "service.name"),
+                        "unknown",
+                    )
+                    for scope_spans in resource_spans.get("scopeSpans", []):
+                        for span in scope_spans.get("spans", []):
+                            span["service"] = service
+                            span["duration_ms"] = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+                            spans.append(span)
+    return spans
+
+
+def print_tree(span: dict, children: Dict[str, List[dict]], depth: int = 0) -> None:
+    status = " ERROR" if span.get("status", {}).get("code") == 2 else ""
+    print(f"{'  ' * depth}{span['duration_ms']:10.1f} ms  [{span['service']}] {span['name']}{status}")
+    for child in sorted(children.get(span["spanId"], []), key=lambda child: int(child["startTimeUnixNano"])):
+        print_tree(child, children, depth + 1)
+
+
+def main(args: argparse.Namespace) -> None:
+    spans = load_spans(args.files)
+    by_trace: Dict[str, List[dict]] = defaultdict(list)
+    for span in spans:
+        by_trace[span["traceId"]].append(span)
+
+    if args.trace_id:
+        trace_ids = [args.trace_id]
+    else:
+        trace_ids = sorted(by_trace, key=lambda trace_id: max(s["duration_ms"] for s in by_trace[trace_id]), reverse=True)[:args.top]
+
+    for trace_id in trace_ids:
+        trace_spans = by_trace.get(trace_id, [])
+        span_ids = {span["spanId"] for span in trace_spans}
+        children: Dict[str, List[dict]] = defaultdict(list)
+        roots = []
+        for span in trace_spans:
+            if span.get("parentSpanId") in span_ids:
+                children[span["parentSpanId"]].append(span)
+            else:
+                roots.append(span)
+        print(f"Trace {trace_id} ({len(trace_spans)} spans)")
+        for root in sorted(roots, key=lambda root: int(root["startTimeUnixNano"])):
+            print_tree(root, children, 1)
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="OTLP/JSON span files (one export batch per line).")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest traces to print.")
+    parser.add_argument("--trace-id", help="Print only this trace.")
+    main(parser.parse_args())
@@ -11,15 +11,19 @@ import org.springframework.stereotype.Component;
 import org.springframework.web.server.ServerWebExchange;
 import reactor.core.publisher.Mono;
 
+import java.util.concurrent.ThreadLocalRandom;
+
 @Component
 public class ForwardAuthHeaderFilter implements GatewayFilter, Ordered {
 
     private static final Logger logger = LoggerFactory.getLogger(ForwardAuthHeaderFilter.class);
     private static final String AUTHORIZATION_HEADER = HttpHeaders.AUTHORIZATION;
     private static final String BEARER_PREFIX = "Bearer ";
+    private static final String TRACEPARENT_HEADER = "traceparent";
 
     @Override
     public Mono<Void> filter(ServerWebExchange exchange, GatewayFilterChain chain) {
+        exchange = ensureTraceparent(exchange);
         ServerHttpRequest request = exchange.getRequest();
         HttpHeaders headers = request.getHeaders();
 
@@ -45,6 +49,24 @@ public class ForwardAuthHeaderFilter implements GatewayFilter, Ordered {
         return chain.filter(exchange);
     }
 
+    /**
+     * Starts a W3C trace for requests that arrive without a {@code traceparent} header,
+     * so the downstream services' spans for one request share a trace ID.
+     */
+    private ServerWebExchange ensureTraceparent(ServerWebExchange exchange) {
+        String traceparent = exchange.getRequest().getHeaders().getFirst(TRACEPARENT_HEADER);
+        if (traceparent != null && !traceparent.isBlank()) {
+            return exchange;
+        }
+        ThreadLocalRandom random = ThreadLocalRandom.current();
+        String newTraceparent = String.format("00-%016x%016x-%016x-01", random.nextLong(), random.nextLong(), random.nextLong());
+        logger.debug("Starting trace {} for path: {}", newTraceparent, exchange.getRequest().getPath());
+        ServerHttpRequest tracedRequest = exchange.getRequest().mutate()
+                .header(TRACEPARENT_HEADER, newTraceparent)
+                .build();
+        return exchange.mutate().request(tracedRequest).build();
+    }
+
     @Override
     public int getOrder() {
         return 1;
@@ -4,22 +4,46 @@ from fastapi import (
     APIRouter,
     Depends,  # <<< Add Depends
     HTTPException,
+    Request,
+    Response,
     status,
 )
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models.chat_models import BaseChatModel
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.schemas import EvaluateTicketRequest, EvaluateTicketResponse
+from app.schemas import (
+    EvaluateTicketRequest,
+    EvaluateTicketResponse,
+    VerdictCacheStatsResponse,
+    EvaluateBatchRequest,
+    EvaluateBatchItemResult,
+)
+from app.core.config import settings
 from app.core.dependencies import get_evaluation_llm_model
 from app.services.llm_evaluator import (
     LLMEvaluatorService,
     LLMEvaluationError,
     LLMResponseParsingError
 )
+from app.services.verdict_cache import verdict_cache
+from app.services.precheck import evaluation_precheck
 from app.core.security import get_current_user_claims  # <<< Import the dependency
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-llm_evaluator = LLMEvaluatorService()
+llm_evaluator = LLMEvaluatorService(
+    cache=verdict_cache,
+    precheck=evaluation_precheck if settings.EVAL_PRECHECK_ENABLED else None
+)
+
+CACHE_STATUS_HEADER = "X-Cache"
+AGE_HEADER = "Age"
+
+
+def _client_requested_no_cache(request: Request) -> bool:
+    cache_control = request.headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
 
 @router.post(
     "/ticket",
@@ -30,7 +54,8 @@ llm_evaluator = LLMEvaluatorService()
     tags=["Evaluation"],
     responses={ # <<< MAKE SURE THIS IS A DICTIONARY LIKE BELOW
         400: {"description": "Invalid request format (e.g., malformed JSON)."},
-        422: {"description": "Evaluation LLM response parsing failed or input invalid."}, # Clarified 422
+        422: {"description": "Invalid request body."},
+        502: {"description": "Evaluation LLM returned a verdict that could not be parsed."},
         500: {"description": "Internal server error during evaluation."},
         503: {"description": "Evaluation LLM service unavailable or failed."},
         # Add 401 if you forgot to handle SecurityException explicitly returning it, though 401 is often handled by FastAPI directly based on the dependency
@@ -39,7 +64,9 @@ llm_evaluator = LLMEvaluatorService()
 )
 async def evaluate_ticket_endpoint(
     request_data: EvaluateTicketRequest,
-    evaluation_llm: ChatGoogleGenerativeAI = Depends(get_evaluation_llm_model),
+    request: Request,
+    response: Response,
+    evaluation_llm: BaseChatModel = Depends(get_evaluation_llm_model),
     claims: dict = Depends(get_current_user_claims)  # <<< ADD SECURITY DEPENDENCY
 ):
     """API endpoint to evaluate a generated ticket JSON using an LLM."""
@@ -50,25 +77,109 @@ async def evaluate_ticket_endpoint(
     logger.debug(f"Generated JSON to evaluate: {request_data.generated_json}")
 
     try:
-        is_valid, reasoning = await llm_evaluator.evaluate_ticket(
+        is_valid, reasoning, cache_status, age_seconds = await llm_evaluator.evaluate_ticket_cached(
             generated_json=request_data.generated_json,
             original_system_prompt=request_data.original_system_prompt,
-            evaluation_llm_client=evaluation_llm
+            evaluation_llm_client=evaluation_llm,
+            bypass_cache=_client_requested_no_cache(request)
         )
-        response = EvaluateTicketResponse(
+        response.headers[CACHE_STATUS_HEADER] = cache_status
+        if age_seconds is not None:
+            response.headers[AGE_HEADER] = str(int(age_seconds))
+        logger.info(f"Evaluation for user '{user_identifier}' completed. Verdict: {is_valid} (cache: {cache_status})")
+        return EvaluateTicketResponse(
             is_valid=is_valid,
             evaluation_reasoning=reasoning
         )
-        logger.info(f"Evaluation for user '{user_identifier}' completed. Verdict: {is_valid}")
-        return response
     except LLMResponseParsingError as e:
         logger.error(f"Failed to parse evaluation LLM response for user '{user_identifier}': {e}", exc_info=True)
-        raise HTTPException(...)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"The evaluation LLM returned a verdict that could not be parsed: {e}"
+        )
     except LLMEvaluationError as e:
         logger.error(f"Evaluation LLM invocation failed for user '{user_identifier}': {e}", exc_info=True)
-        raise HTTPException(...)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"The evaluation LLM is unavailable or failed: {e}"
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.exception(f"Unexpected error during ticket evaluation for user '{user_identifier}'.")
-        raise HTTPException(...)
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while evaluating the ticket."
+        )
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Evaluate a Batch of Generated Tickets",
+    description=(
+        "Evaluates many tickets concurrently and streams one `EvaluateBatchItemResult` "
+        "per line (NDJSON) as each evaluation completes, in completion order."
+    ),
+    tags=["Evaluation"],
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One JSON result per line."},
+        401: {"description": "Not authenticated - Invalid or missing JWT."},
+        413: {"description": "Too many items in the batch."},
+    }
+)
+async def evaluate_batch_endpoint(
+    request_data: EvaluateBatchRequest,
+    request: Request,
+    evaluation_llm: BaseChatModel = Depends(get_evaluation_llm_model),
+    claims: dict = Depends(get_current_user_claims)
+):
+    """Streams per-item evaluation results so slow or failing items don't hold up the rest."""
+    user_identifier = claims.get('email', claims.get('sub', 'UNKNOWN'))
+    item_count = len(request_data.items)
+    if item_count > settings.EVAL_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch has {item_count} items; the limit is {settings.EVAL_BATCH_MAX_ITEMS}."
+        )
+    logger.info(
+        f"User '{user_identifier}' initiated batch evaluation of {item_count} items "
+        f"(concurrency {settings.EVAL_BATCH_CONCURRENCY})."
+    )
+
+    items = [(item.generated_json, item.original_system_prompt) for item in request_data.items]
+    bypass_cache = _client_requested_no_cache(request)
+
+    async def _stream_results():
+        failures = 0
+        async for index, outcome in llm_evaluator.evaluate_batch(
+            items, evaluation_llm, settings.EVAL_BATCH_CONCURRENCY, bypass_cache
+        ):
+            if isinstance(outcome, Exception):
+                failures += 1
+                logger.warning(f"Batch item {index} for user '{user_identifier}' failed: {outcome}")
+                result = EvaluateBatchItemResult(index=index, error=f"{type(outcome).__name__}: {outcome}")
+            else:
+                is_valid, reasoning, cache_status, _ = outcome
+                result = EvaluateBatchItemResult(
+                    index=index,
+                    is_valid=is_valid,
+                    evaluation_reasoning=reasoning,
+                    cache_status=cache_status
+                )
+            yield result.model_dump_json(exclude_none=True) + "\n"
+        logger.info(f"Batch evaluation for user '{user_identifier}' completed: {item_count} items, {failures} failed.")
+
+    return StreamingResponse(_stream_results(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/cache/stats",
+    response_model=VerdictCacheStatsResponse,
+    summary="Verdict Cache Statistics",
+    description="Returns hit/miss counters and occupancy of the evaluation verdict cache.",
+    tags=["Evaluation"],
+)
+async def get_verdict_cache_stats(claims: dict = Depends(get_current_user_claims)):
+    return VerdictCacheStatsResponse(**await run_in_threadpool(verdict_cache.stats))
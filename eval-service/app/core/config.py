@@ -17,18 +17,62 @@ class Settings(BaseSettings):
     EVAL_AI_TEMPERATURE: float = 0.2
     EVAL_AI_MAX_RETRIES: int = 2
 
+    # --- LLM Provider Settings ---
+    EVAL_LLM_PROVIDER: str = "gemini"  # "gemini", "record", "replay" or "synthetic"
+    EVAL_LLM_REPLAY_DIR: str = "./.cache/llm_replay"  # Captures written by "record", served by "replay"
+    EVAL_LLM_REPLAY_SIMULATE_LATENCY: bool = False  # Wait as long as the recorded call took
+    EVAL_LLM_SYNTHETIC_LATENCY_MS: float = 400.0  # Median time to first token
+    EVAL_LLM_SYNTHETIC_LATENCY_SIGMA: float = 0.5  # Log-normal spread; 0 gives a fixed latency
+    EVAL_LLM_SYNTHETIC_TOKENS_PER_SECOND: float = 150.0  # Output rate; 0 emits instantly
+    EVAL_STRUCTURED_OUTPUT: bool = False  # Pass EvaluationVerdict as the response schema (JSON mime type)
+
     LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True  # Serves GET /metrics
+
+    # --- Tracing Settings ---
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "file"  # "file", "otlp" or "none"
+    TRACING_FILE_PATH: str = "./.cache/traces/eval-service-spans.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0  # For requests without a sampled traceparent
+    TRACING_EXPORT_INTERVAL_SECONDS: float = 5.0
+
+    # --- Verdict Cache Settings ---
+    EVAL_CACHE_BACKEND: str = "memory"  # "memory", "sqlite" or "none"
+    EVAL_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    EVAL_CACHE_MAX_ENTRIES: int = 4096
+    EVAL_CACHE_SQLITE_PATH: str = "./.cache/verdict_cache.sqlite3"
+
+    # --- Batch Evaluation Settings ---
+    EVAL_BATCH_CONCURRENCY: int = 8  # Evaluations in flight per batch request
+    EVAL_BATCH_MAX_ITEMS: int = 500
+
+    # --- Evaluation Pre-check Settings ---
+    EVAL_PRECHECK_ENABLED: bool = True  # Reject clearly invalid tickets without an LLM call
+    EVAL_PRECHECK_MIN_TITLE_CHARS: int = 5
+    EVAL_PRECHECK_MIN_DESCRIPTION_CHARS: int = 30
+    EVAL_PRECHECK_REQUIRE_ACCEPTANCE_CRITERIA: bool = False  # Only when the original prompt asks for them
+
+    # --- LLM Rate Limit & Retry Settings ---
+    EVAL_LLM_RATE_LIMIT_RPM: int = 0  # 0 disables the limit; set to the per-process share of the provider quota
+    EVAL_LLM_RATE_LIMIT_TPM: int = 0  # Estimated tokens; 0 disables the limit
+    EVAL_LLM_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    EVAL_LLM_RETRY_MAX_DELAY_SECONDS: float = 30.0
 
     # --- JWT Validation Settings --- 
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY" , "secret")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS512")
     JWT_ISSUER: Optional[str] = os.getenv("JWT_ISSUER", None)
+    JWT_CACHE_MAX_ENTRIES: int = 4096  # 0 disables the verified-token cache
+    JWT_CACHE_MAX_TTL_SECONDS: int = 300  # Entries also expire at the token's exp
 
 
 settings = Settings()
 
 # --- Startup Validation ---
-if not settings.EVAL_GOOGLE_API_KEY:
+if settings.EVAL_LLM_PROVIDER not in ("gemini", "record"):
+    logger.info(f"Evaluation LLM provider is '{settings.EVAL_LLM_PROVIDER}'; EVAL_GOOGLE_API_KEY is not required.")
+elif not settings.EVAL_GOOGLE_API_KEY:
     error_msg = "Critical Error: EVAL_GOOGLE_API_KEY is not set."
     logger.critical(error_msg)
     raise ValueError(error_msg)
@@ -1,17 +1,21 @@
 import logging
 import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models.chat_models import BaseChatModel
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.schemas.evaluation import EvaluationVerdict
+from app.services.llm_provider import create_chat_model
 
 logger = logging.getLogger(__name__)
 
 try:
-    if not settings.EVAL_GOOGLE_API_KEY:
+    if settings.EVAL_LLM_PROVIDER not in ("gemini", "record"):
+        logger.info(f"Evaluation Service: EVAL_LLM_PROVIDER is '{settings.EVAL_LLM_PROVIDER}'; skipping Google Generative AI SDK configuration.")
+    elif not settings.EVAL_GOOGLE_API_KEY:
         raise ValueError("EVAL_GOOGLE_API_KEY is missing in settings.")
-
-    genai.configure(api_key=settings.EVAL_GOOGLE_API_KEY)
-    logger.info("Evaluation Service: Google Generative AI SDK configured successfully with EVAL_GOOGLE_API_KEY.")
+    else:
+        genai.configure(api_key=settings.EVAL_GOOGLE_API_KEY)
+        logger.info("Evaluation Service: Google Generative AI SDK configured successfully with EVAL_GOOGLE_API_KEY.")
 
 except ValueError as ve:
     logger.critical(f"Evaluation LLM Configuration Error: {ve}")
@@ -20,14 +24,10 @@ except Exception as e:
     logger.critical(f"CRITICAL: Error configuring Evaluation Google Generative AI SDK: {e}", exc_info=True)
     raise RuntimeError(f"Failed to configure Evaluation Google Generative AI SDK: {e}")
 
-def get_evaluation_llm_model() -> ChatGoogleGenerativeAI:
+def get_evaluation_llm_model() -> BaseChatModel:
     try:
-        llm_model = ChatGoogleGenerativeAI(
-            model=settings.EVAL_AI_MODEL_NAME,
-            temperature=settings.EVAL_AI_TEMPERATURE,
-            google_api_key=settings.EVAL_GOOGLE_API_KEY
-        )
-        logger.debug(f"Providing Evaluation LLM client instance for model: {settings.EVAL_AI_MODEL_NAME}")
+        llm_model = create_chat_model(response_schema=EvaluationVerdict if settings.EVAL_STRUCTURED_OUTPUT else None)
+        logger.debug(f"Providing Evaluation LLM client instance from provider '{settings.EVAL_LLM_PROVIDER}' for model: {settings.EVAL_AI_MODEL_NAME}")
         return llm_model
 
     except Exception as e:
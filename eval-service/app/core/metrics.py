@@ -0,0 +1,327 @@
+"""
+Metrics Module
+
+A small Prometheus-compatible metrics registry, exposed in the text
+exposition format at `GET /metrics`:
+
+- `http_request_duration_seconds{method,route,status}`: request latency per
+  route template, measured by `MetricsMiddleware` until the last body chunk
+  is sent (so streaming responses count their full duration).
+- `http_requests_in_flight`: requests currently being handled.
+- `pipeline_stage_duration_seconds{stage}`: time spent in individual stages
+  (storage fetch, PDF parse, LLM invoke, output validation, evaluation),
+  recorded with `stage_timer`.
+- `llm_output_parse_total{mode,outcome}`: how LLM responses were parsed, per
+  output mode ("text" or "json_schema"), so parse-failure rates can be
+  compared between modes.
+- `evaluation_precheck_total{outcome}`: evaluations the rule-based pre-check
+  rejected without an LLM call ("rejected") or passed on to the LLM
+  ("deferred"); `evaluation_precheck_resolved_share` is the share rejected.
+- `threadpool_*`: usage of the AnyIO worker thread limiter that
+  `run_in_threadpool` and sync endpoints share, sampled at scrape time.
+- Gauges for the numeric fields of the services' `stats()` snapshots, added
+  with `MetricsRegistry.register_stats`.
+
+No client library is needed; histograms are cumulative-bucket counters kept
+under a lock, which is cheap next to the work being measured.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """
+    A labelled histogram.
+
+    Attributes:
+        name (str): Metric name
+        documentation (str): HELP text
+        label_names (Tuple[str, ...]): Names of the labels, in `observe` order
+        buckets (Tuple[float, ...]): Upper bounds of the buckets, ascending
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1]) for labels, series in self._series.items()]
+        for label_values, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names + ("le",), label_values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A labelled gauge that is incremented, decremented or set directly."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *label_values: str) -> None:
+        self.inc(-amount, *label_values)
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = float(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for label_values, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter:
+    """A labelled, monotonically increasing counter."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for label_values, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._stats_sources: List[Tuple[str, Callable[[], dict]]] = []
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """Exports every numeric field of `stats()` as a gauge named `<prefix>_<field>`."""
+        self._stats_sources.append((prefix, stats))
+
+    def _render_stats(self) -> List[str]:
+        lines: List[str] = []
+        for prefix, stats in self._stats_sources:
+            try:
+                snapshot = stats()
+            except Exception as e:
+                logger.warning(f"Could not collect '{prefix}' stats for /metrics: {e}")
+                continue
+            for field, value in snapshot.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = _INVALID_NAME_CHARS.sub("_", f"{prefix}_{field}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+    def render(self) -> str:
+        """
+        Renders all metrics. Stats sources may hit SQLite, so call this from a
+        worker thread (e.g. `run_in_threadpool`), after `sample_threadpool()`.
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_stats())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code.",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled.",
+)
+stage_duration = metrics_registry.histogram(
+    "pipeline_stage_duration_seconds",
+    "Time spent in individual processing stages.",
+    ("stage",),
+)
+llm_output_parse = metrics_registry.counter(
+    "llm_output_parse_total",
+    "LLM responses by output mode and parse outcome.",
+    ("mode", "outcome"),
+)
+precheck_outcomes = metrics_registry.counter(
+    "evaluation_precheck_total",
+    "Evaluations resolved by the rule-based pre-check or deferred to the LLM.",
+    ("outcome",),
+)
+threadpool_busy = metrics_registry.gauge(
+    "threadpool_threads_busy",
+    "Worker threads of the AnyIO thread limiter in use at scrape time.",
+)
+threadpool_size = metrics_registry.gauge(
+    "threadpool_threads_total",
+    "Size of the AnyIO thread limiter.",
+)
+threadpool_waiting = metrics_registry.gauge(
+    "threadpool_tasks_waiting",
+    "Tasks waiting for a worker thread at scrape time.",
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Records the duration of the block, whether it succeeds or raises, under `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage)
+
+
+def sample_threadpool() -> None:
+    """Samples the default thread limiter. Must run on the event loop thread."""
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+    except Exception as e:
+        logger.debug(f"Could not sample the thread limiter: {e}")
+        return
+    threadpool_busy.set(statistics.borrowed_tokens)
+    threadpool_size.set(statistics.total_tokens)
+    threadpool_waiting.set(statistics.tasks_waiting)
+
+
+def route_template(scope: dict) -> str:
+    """
+    Returns the matched route's path template (e.g. `/api/v1/jobs/{job_id}`),
+    so per-ID paths share one series, or "unmatched" for 404s.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    path_params = scope.get("path_params") or {}
+    if not path_params:
+        return scope.get("path", "")
+    names_by_value = {str(value): name for name, value in path_params.items()}
+    return "/".join(
+        f"{{{names_by_value[segment]}}}" if segment in names_by_value else segment
+        for segment in scope.get("path", "").split("/")
+    )
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), str(status_code)
+            )
@@ -1,4 +1,9 @@
+import hashlib
 import logging 
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from  fastapi import HTTPException , status , Security 
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt , JWTError , ExpiredSignatureError 
@@ -22,6 +27,81 @@ INVALID_TOKEN_EXCEPTION = HTTPException(
     headers={"WWW-Authenticate": "Bearer"},
 )
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of claims for tokens that already passed validation.
+
+    The front-end resends the same gateway-issued token on every request, so
+    the signature check only needs to run once per token. Entries are keyed
+    by the token's SHA-256 digest (the raw token is never stored) and expire
+    at the token's `exp`, or after `max_ttl_seconds`, whichever comes first.
+
+    Attributes:
+        max_entries (int): Maximum number of cached tokens; 0 disables the cache
+        max_ttl_seconds (int): Upper bound on how long a verification is reused
+    """
+
+    def __init__(self, max_entries: int, max_ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_entries <= 0:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.max_ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (dict(claims), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+verified_token_cache = VerifiedTokenCache(
+    max_entries=settings.JWT_CACHE_MAX_ENTRIES,
+    max_ttl_seconds=settings.JWT_CACHE_MAX_TTL_SECONDS,
+)
+
 def decode_and_validate_token(token: str) -> dict:
     """ 
     Decodes and validates the JWT token passed by the API Gateway 
@@ -62,5 +142,8 @@ def decode_and_validate_token(token: str) -> dict:
         )
 
 async def get_current_user_claims(token: str = Security(oauth2_scheme)) -> dict:
-    claims = decode_and_validate_token(token)
+    claims = verified_token_cache.get(token)
+    if claims is None:
+        claims = decode_and_validate_token(token)
+        verified_token_cache.put(token, claims)
     return claims
@@ -1,9 +1,18 @@
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.api.v1.api import api_v1_router
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics_registry, sample_threadpool
+from app.core.tracing import TracingMiddleware, tracer
+from app.core.security import verified_token_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.verdict_cache import verdict_cache
+from app.services.precheck import evaluation_precheck
 
 log_level_str = getattr(settings, 'LOG_LEVEL', 'INFO').upper() # Use getattr for safety
 logging.basicConfig(level=getattr(logging, log_level_str, logging.INFO))
@@ -11,9 +20,17 @@ logger = logging.getLogger(__name__)
 
 logger.info(f"Initializing {settings.PROJECT_NAME}...")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    logger.info(f"Shutting down {settings.PROJECT_NAME}...")
+    if tracer.exporter is not None:
+        tracer.exporter.shutdown()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -25,6 +42,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
 @app.get("/", tags=["Health Check"])
 async def read_root():
     logger.debug("Root endpoint '/' accessed.")
@@ -35,6 +58,18 @@ async def health_check():
     logger.debug("Health endpoint '/health' accessed.")
     return {"status": "ok", "service": settings.PROJECT_NAME}
 
+if settings.METRICS_ENABLED:
+    metrics_registry.register_stats("verdict_cache", verdict_cache.stats)
+    metrics_registry.register_stats("evaluation_precheck", evaluation_precheck.stats)
+    metrics_registry.register_stats("llm_scheduler", llm_scheduler.stats)
+    metrics_registry.register_stats("jwt_cache", verified_token_cache.stats)
+
+    @app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+    async def metrics():
+        sample_threadpool()
+        body = await run_in_threadpool(metrics_registry.render)
+        return PlainTextResponse(body, media_type=CONTENT_TYPE)
+
 logger.info(f"Including API V1 router with prefix: {settings.API_V1_STR}")
 app.include_router(api_v1_router, prefix=settings.API_V1_STR)
 
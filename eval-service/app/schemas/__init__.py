@@ -1,10 +1,24 @@
 # eval-service/app/schemas/__init__.py
 
-from .evaluation import EvaluateTicketRequest, EvaluateTicketResponse
+from .evaluation import (
+    EvaluateTicketRequest,
+    EvaluateTicketResponse,
+    VerdictCacheStatsResponse,
+    EvaluateBatchRequest,
+    EvaluateBatchItemResult,
+    EvaluationVerdict,
+)
+from .ticket import PriorityEnum, GeneratedTicketData
 
 # Define which symbols are exported when using 'from app.schemas import *'
 # More importantly, signifies these are the main schemas of this package.
 __all__ = [
     "EvaluateTicketRequest",
     "EvaluateTicketResponse",
+    "VerdictCacheStatsResponse",
+    "EvaluateBatchRequest",
+    "EvaluateBatchItemResult",
+    "EvaluationVerdict",
+    "PriorityEnum",
+    "GeneratedTicketData",
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 # eval-service/app/schemas/evaluation.py
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any # Use Dict and Any for flexible generated_json
+from typing import Optional, Dict, Any, List # Use Dict and Any for flexible generated_json
 
 # Note: We do NOT import GeneratedTicketData here because the *input*
 # might not conform perfectly to it, and we want the LLM evaluator
@@ -50,4 +50,49 @@ class EvaluateTicketResponse(BaseModel):
     #                 "evaluation_reasoning": "Missing required 'priority' field."
     #             }
     #         ]
-    #     }
\ No newline at end of file
+    #     }
+
+
+class VerdictCacheStatsResponse(BaseModel):
+    """
+    Schema for the verdict cache statistics endpoint.
+    """
+    backend: str = Field(..., description="Configured cache backend: memory, sqlite or none.")
+    hits: int = Field(..., description="Evaluations answered from the cache.")
+    misses: int = Field(..., description="Lookups that required an LLM call.")
+    bypassed: int = Field(..., description="Requests that skipped the cache (Cache-Control: no-cache).")
+    hit_ratio: float = Field(..., description="hits / (hits + misses).")
+    evictions: int = Field(..., description="Entries dropped for TTL expiry or capacity.")
+    entries: int = Field(..., description="Verdicts currently cached.")
+
+
+class EvaluateBatchRequest(BaseModel):
+    """
+    Schema defining the request body for the batch evaluation endpoint.
+    """
+    items: List[EvaluateTicketRequest] = Field(
+        ...,
+        min_length=1,
+        description="The tickets to evaluate. Results are streamed back as each one completes."
+    )
+
+
+class EvaluateBatchItemResult(BaseModel):
+    """
+    One NDJSON line of the batch evaluation response. Either the verdict fields
+    or `error` are set.
+    """
+    index: int = Field(..., description="Position of the item in the request's `items` list.")
+    is_valid: Optional[bool] = Field(None, description="The verdict, if the evaluation succeeded.")
+    evaluation_reasoning: Optional[str] = Field(None, description="Reasoning for the verdict.")
+    cache_status: Optional[str] = Field(None, description="HIT, MISS, BYPASS, or LOCAL when the pre-check resolved it.")
+    error: Optional[str] = Field(None, description="Why the evaluation of this item failed.")
+
+
+class EvaluationVerdict(BaseModel):
+    """
+    The evaluation LLM's answer in structured output mode, passed to the model
+    as its response schema.
+    """
+    verdict: bool = Field(..., description="True if the generated JSON fulfils the original prompt, false otherwise.")
+    reasoning: str = Field(..., description="A brief explanation of the verdict.")
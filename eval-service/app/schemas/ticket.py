@@ -0,0 +1,30 @@
+# eval-service/app/schemas/ticket.py
+
+from enum import Enum
+
+from pydantic import BaseModel, ConfigDict, Field, StrictStr
+
+# A local copy of ai-service's GeneratedTicketData, used by the evaluation
+# pre-check. It is stricter than the original: no type coercion and no extra
+# keys, since anything it rejects is judged without the evaluation LLM.
+
+class PriorityEnum(str, Enum):
+    """Enumeration for ticket priority levels."""
+    HIGH = "High"
+    MEDIUM = "Medium"
+    LOW = "Low"
+
+class GeneratedTicketData(BaseModel):
+    """
+    Schema of the ticket JSON generated by ai-service.
+    
+    Attributes:
+        title (str): Title of the ticket
+        description (str): Detailed description including acceptance criteria
+        priority (PriorityEnum): Priority level of the ticket
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    title: StrictStr = Field(..., description="Title of the ticket")
+    description: StrictStr = Field(..., description="Detailed description including acceptance criteria")
+    priority: PriorityEnum = Field(..., description="Priority level of the ticket")
@@ -1,9 +1,17 @@
+import asyncio
 import logging
 import json
-from typing import Optional, Dict, Any, Tuple
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Optional, Dict, Any, Tuple, List, AsyncIterator, Union
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import SystemMessage, HumanMessage
+from pydantic import ValidationError
 from app.core.config import settings
+from app.core.metrics import llm_output_parse, stage_timer
+from app.core.tracing import traced
+from app.schemas.evaluation import EvaluationVerdict
+from app.services.verdict_cache import VerdictCache, make_verdict_cache_key, verdict_cache
+from app.services.precheck import EvaluationPrecheck
+from app.services.llm_scheduler import PRIORITY_BATCH, estimate_message_tokens, llm_priority, llm_scheduler
 
 class LLMEvaluationError(Exception):
     pass
@@ -13,6 +21,11 @@ class LLMResponseParsingError(Exception):
 
 logger = logging.getLogger(__name__)
 
+CACHE_STATUS_HIT = "HIT"
+CACHE_STATUS_MISS = "MISS"
+CACHE_STATUS_BYPASS = "BYPASS"
+CACHE_STATUS_LOCAL = "LOCAL"  # Resolved by the pre-check; neither cached nor sent to the LLM
+
 INTERNAL_EVALUATION_PROMPT_TEMPLATE = """
 You are an expert evaluator for AI-generated software requirement tickets.
 Your task is to assess if the provided 'Generated JSON' accurately and adequately fulfills the requirements described in the 'Original System Prompt'.
@@ -47,12 +60,82 @@ Example format: `verdict: explanation`
 **Now, evaluate the provided input based on the criteria and respond ONLY in the specified format.**
 """
 
+# Used when EVAL_STRUCTURED_OUTPUT is on: same criteria and input, but the answer is an EvaluationVerdict object.
+STRUCTURED_EVALUATION_PROMPT_TEMPLATE = INTERNAL_EVALUATION_PROMPT_TEMPLATE.split("**Output Format:**")[0] + """**Output Format:**
+Respond with a JSON object with two keys: "verdict" (true if the 'Generated JSON' meets the criteria, false otherwise) and "reasoning" (a brief explanation).
+"""
+
 class LLMEvaluatorService:
+    def __init__(self, cache: Optional[VerdictCache] = None, precheck: Optional[EvaluationPrecheck] = None):
+        self.cache = cache
+        self.precheck = precheck
+
+    async def evaluate_ticket_cached(
+        self,
+        generated_json: Dict[str, Any],
+        original_system_prompt: str,
+        evaluation_llm_client: BaseChatModel,
+        bypass_cache: bool = False
+    ) -> Tuple[bool, Optional[str], str, Optional[float]]:
+        """
+        Evaluates a ticket, answering from the verdict cache when the same JSON
+        and prompt were evaluated before. Only successfully parsed verdicts are cached.
+        Tickets the pre-check rejects get a "false" verdict without a cache lookup.
+
+        Returns:
+            A tuple of (is_valid, reasoning, cache_status, age_seconds) where
+            cache_status is "HIT", "MISS", "BYPASS" or "LOCAL" and age_seconds is
+            the cached verdict's age on a HIT, else None.
+        """
+        if self.precheck is not None:
+            reasoning = self.precheck.check(generated_json, original_system_prompt)
+            if reasoning is not None:
+                return False, reasoning, CACHE_STATUS_LOCAL, None
+
+        if self.cache is None or bypass_cache:
+            if self.cache is not None:
+                self.cache.record_bypass()
+            is_valid, reasoning = await self._evaluate_timed(
+                generated_json, original_system_prompt, evaluation_llm_client
+            )
+            return is_valid, reasoning, CACHE_STATUS_BYPASS, None
+
+        try:
+            cache_key = make_verdict_cache_key(generated_json, original_system_prompt)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not build verdict cache key; evaluating without cache: {e}")
+            is_valid, reasoning = await self._evaluate_timed(
+                generated_json, original_system_prompt, evaluation_llm_client
+            )
+            return is_valid, reasoning, CACHE_STATUS_BYPASS, None
+
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            is_valid, reasoning, age_seconds = cached
+            logger.info(f"Verdict cache hit ({age_seconds:.0f}s old). Verdict: {is_valid}")
+            return is_valid, reasoning, CACHE_STATUS_HIT, age_seconds
+
+        is_valid, reasoning = await self._evaluate_timed(
+            generated_json, original_system_prompt, evaluation_llm_client
+        )
+        await self.cache.put(cache_key, is_valid, reasoning)
+        return is_valid, reasoning, CACHE_STATUS_MISS, None
+
+    async def _evaluate_timed(
+        self,
+        generated_json: Dict[str, Any],
+        original_system_prompt: str,
+        evaluation_llm_client: BaseChatModel
+    ) -> Tuple[bool, Optional[str]]:
+        with stage_timer("evaluation"):
+            return await self.evaluate_ticket(generated_json, original_system_prompt, evaluation_llm_client)
+
+    @traced("llm_evaluator.evaluate_ticket")
     async def evaluate_ticket(
         self,
         generated_json: Dict[str, Any],
         original_system_prompt: str,
-        evaluation_llm_client: ChatGoogleGenerativeAI
+        evaluation_llm_client: BaseChatModel
     ) -> Tuple[bool, Optional[str]]:
         logger.info("Starting LLM-based evaluation...")
 
@@ -62,7 +145,9 @@ class LLMEvaluatorService:
              logger.error(f"Failed to serialize generated_json for evaluation prompt: {e}")
              return False, f"Internal Error: Could not format the generated JSON for evaluation ({e})."
 
-        final_evaluation_prompt = INTERNAL_EVALUATION_PROMPT_TEMPLATE.format(
+        output_mode = "json_schema" if settings.EVAL_STRUCTURED_OUTPUT else "text"
+        prompt_template = STRUCTURED_EVALUATION_PROMPT_TEMPLATE if output_mode == "json_schema" else INTERNAL_EVALUATION_PROMPT_TEMPLATE
+        final_evaluation_prompt = prompt_template.format(
             original_prompt=original_system_prompt,
             generated_json_str=generated_json_str
         )
@@ -73,7 +158,10 @@ class LLMEvaluatorService:
 
         try:
             logger.debug(f"Invoking evaluation LLM: {evaluation_llm_client.model}")
-            response = await evaluation_llm_client.ainvoke(messages)
+            response = await llm_scheduler.run(
+                lambda: evaluation_llm_client.ainvoke(messages),
+                estimate_message_tokens(messages)
+            )
             raw_eval_output = response.content.strip() if response and response.content else None
             logger.debug(f"Received raw response from evaluation LLM: '{raw_eval_output}'")
 
@@ -85,6 +173,30 @@ class LLMEvaluatorService:
             logger.exception("Error occurred during evaluation LLM invocation.")
             raise LLMEvaluationError(f"Failed to get response from evaluation LLM: {e}") from e
 
+        try:
+            is_valid, reasoning = self._parse_verdict(raw_eval_output, output_mode)
+        except LLMResponseParsingError:
+            llm_output_parse.inc(1, output_mode, "invalid")
+            raise
+        llm_output_parse.inc(1, output_mode, "parsed")
+        logger.info(f"Evaluation completed. Verdict: {is_valid}. Reasoning: {reasoning}")
+        return is_valid, reasoning
+
+    @staticmethod
+    def _parse_verdict(raw_eval_output: str, output_mode: str) -> Tuple[bool, str]:
+        """
+        Parses a 'verdict: reasoning' line ("text" mode) or an EvaluationVerdict
+        JSON object ("json_schema" mode). Raises LLMResponseParsingError.
+        """
+        if output_mode == "json_schema":
+            cleaned = raw_eval_output.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+            try:
+                parsed = EvaluationVerdict.model_validate_json(cleaned)
+            except ValidationError as e:
+                logger.warning(f"Structured evaluation response did not match EvaluationVerdict. Response: '{raw_eval_output}'")
+                raise LLMResponseParsingError(f"Failed to parse evaluation response '{raw_eval_output}': {e.errors()}") from e
+            return parsed.verdict, parsed.reasoning.strip()
+
         try:
             parts = raw_eval_output.split(':', 1)
             if len(parts) != 2:
@@ -102,9 +214,51 @@ class LLMEvaluatorService:
                 logger.warning(f"Evaluation LLM verdict ('{verdict_str}') is not 'true' or 'false'.")
                 raise LLMResponseParsingError(f"Invalid verdict '{verdict_str}' received. Expected 'true' or 'false'.")
 
-            logger.info(f"Evaluation completed. Verdict: {is_valid}. Reasoning: {reasoning}")
             return is_valid, reasoning
 
         except Exception as e:
             logger.exception("Error parsing the evaluation LLM's response.")
             raise LLMResponseParsingError(f"Failed to parse evaluation response '{raw_eval_output}': {e}") from e
+
+    async def evaluate_batch(
+        self,
+        items: List[Tuple[Dict[str, Any], str]],
+        evaluation_llm_client: BaseChatModel,
+        concurrency: int,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Tuple[int, Union[Tuple[bool, Optional[str], str, Optional[float]], Exception]]]:
+        """
+        Evaluates (generated_json, original_system_prompt) pairs concurrently,
+        at most `concurrency` at a time, yielding results in completion order.
+
+        Failures are yielded in place of a result rather than raised, so one bad
+        item does not abort the rest. Pending evaluations are cancelled if the
+        consumer stops iterating (e.g. the client disconnects).
+
+        Yields:
+            Tuples of (item index, (is_valid, reasoning, cache_status, age_seconds) or the exception raised).
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _evaluate(index: int, generated_json: Dict[str, Any], original_system_prompt: str):
+            async with semaphore:
+                try:
+                    return index, await self.evaluate_ticket_cached(
+                        generated_json, original_system_prompt, evaluation_llm_client, bypass_cache
+                    )
+                except Exception as e:
+                    return index, e
+
+        # Tasks copy the context they are created in, so the batch priority reaches the scheduler.
+        with llm_priority(PRIORITY_BATCH):
+            tasks = [
+                asyncio.create_task(_evaluate(index, generated_json, original_system_prompt))
+                for index, (generated_json, original_system_prompt) in enumerate(items)
+            ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
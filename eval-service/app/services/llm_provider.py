@@ -0,0 +1,361 @@
+"""
+LLM Provider Module
+
+Builds the chat model used for evaluations from EVAL_LLM_PROVIDER, so the
+service can run against Gemini, against responses captured on disk, or
+against a synthetic model that needs no network access or API key.
+
+- gemini: ChatGoogleGenerativeAI (requires EVAL_GOOGLE_API_KEY).
+- record: Gemini, with every response also written to EVAL_LLM_REPLAY_DIR.
+- replay: serves the responses captured by "record". A prompt that was never
+  recorded fails with ReplayMissError instead of reaching the network.
+- synthetic: answers every prompt with a 'verdict: reasoning' line after a
+  log-normally distributed time to first token, then emits the output at
+  EVAL_LLM_SYNTHETIC_TOKENS_PER_SECOND.
+
+Every backend is a LangChain chat model, so `ainvoke`, `astream` and the
+LLM scheduler work unchanged whichever one is selected.
+
+`create_chat_model(response_schema=...)` asks for JSON constrained to a
+schema (EVAL_STRUCTURED_OUTPUT): Gemini receives it as its response schema with the JSON
+mime type, the synthetic model answers with bare JSON, and recordings are
+keyed by response format so text and JSON captures never mix.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("gemini", "record", "replay", "synthetic")
+CHARS_PER_TOKEN = 4
+STREAM_FRAGMENT_TOKENS = 4
+
+
+class ReplayMissError(LookupError):
+    """No recorded response exists for the prompt (not retryable)."""
+
+
+def _message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return json.dumps(message.content, sort_keys=True, ensure_ascii=False)
+
+
+def make_replay_key(model: str, temperature: float, messages: List[BaseMessage], response_format: str = "text") -> str:
+    """Hashes the model settings, response format and every message (type and content) into a capture key."""
+    digest = hashlib.sha256()
+    for part in [model, repr(float(temperature)), response_format] + [f"{m.type}\x01{_message_text(m)}" for m in messages]:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ReplayStore:
+    """One JSON file per captured response, named by its replay key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as capture_file:
+                return json.load(capture_file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, model: str, content: str, latency_seconds: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        capture = {
+            "model": model,
+            "content": content,
+            "latency_seconds": round(latency_seconds, 4),
+            "recorded_at": time.time(),
+        }
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as capture_file:
+            json.dump(capture, capture_file, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+
+def _fragments(text: str) -> List[str]:
+    size = CHARS_PER_TOKEN * STREAM_FRAGMENT_TOKENS
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _result(text: str) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class RecordingChatModel(BaseChatModel):
+    """Delegates to `inner` and writes each completed response to the replay store."""
+
+    inner: BaseChatModel
+    model: str
+    temperature: float
+    store: ReplayStore
+    response_format: str = "text"
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "record"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        result.generations[0].message.content, time.perf_counter() - started)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        result.generations[0].message.content, time.perf_counter() - started)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        parts = []
+        async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+            if isinstance(chunk.message.content, str):
+                parts.append(chunk.message.content)
+            yield chunk
+        self.store.save(make_replay_key(self.model, self.temperature, messages, self.response_format), self.model,
+                        "".join(parts), time.perf_counter() - started)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded responses; optionally waits as long as the recorded call took."""
+
+    model: str
+    temperature: float
+    store: ReplayStore
+    response_format: str = "text"
+    simulate_latency: bool = False
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _lookup(self, messages: List[BaseMessage]) -> dict:
+        key = make_replay_key(self.model, self.temperature, messages, self.response_format)
+        capture = self.store.load(key)
+        if capture is None:
+            raise ReplayMissError(
+                f"No recorded response for this prompt (replay key {key}) in '{self.store.directory}'. "
+                "Run once with EVAL_LLM_PROVIDER=record to capture it."
+            )
+        return capture
+
+    def _delay(self, capture: dict) -> float:
+        return float(capture.get("latency_seconds", 0.0)) if self.simulate_latency else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        capture = self._lookup(messages)
+        time.sleep(self._delay(capture))
+        return _result(capture["content"])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        capture = self._lookup(messages)
+        await asyncio.sleep(self._delay(capture))
+        return _result(capture["content"])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        capture = self._lookup(messages)
+        fragments = _fragments(capture["content"])
+        step = self._delay(capture) / len(fragments)
+        for fragment in fragments:
+            await asyncio.sleep(step)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+
+_VALID_PRIORITY = re.compile(r'"priority"\s*:\s*"(High|Medium|Low)"')
+
+
+def synthetic_verdict_response(messages: List[BaseMessage], json_mode: bool = False) -> str:
+    """
+    Returns a 'verdict: reasoning' answer (or, with `json_mode`, a JSON
+    verdict object): true when the ticket JSON in the prompt has a title, a
+    description and a valid priority, false otherwise.
+    """
+    prompt = _message_text(messages[-1])
+    missing = [field for field in ("title", "description") if f'"{field}"' not in prompt]
+    if not _VALID_PRIORITY.search(prompt):
+        missing.append("priority")
+    if missing:
+        verdict, reasoning = False, f"The ticket is missing or has an invalid {', '.join(missing)}."
+    else:
+        verdict, reasoning = True, "The ticket has a clear title, a description with acceptance criteria, and a valid priority."
+    if json_mode:
+        return json.dumps({"verdict": verdict, "reasoning": reasoning})
+    return f"{str(verdict).lower()}: {reasoning}"
+
+
+class SyntheticChatModel(BaseChatModel):
+    """
+    Answers with `responder(messages, json_mode)` after a log-normal time to first token
+    (median `latency_ms`, spread `latency_sigma`), then emits the output at
+    `tokens_per_second`.
+    """
+
+    model: str = "synthetic"
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 150.0
+    json_mode: bool = False  # Answer with bare JSON, as under a response schema
+    responder: Callable[[List[BaseMessage], bool], str] = synthetic_verdict_response
+
+    @property
+    def _llm_type(self) -> str:
+        return "synthetic"
+
+    def _first_token_delay(self) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000.0
+        return self.latency_ms / 1000.0 * random.lognormvariate(0.0, self.latency_sigma)
+
+    def _output_seconds(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return max(1, len(text) // CHARS_PER_TOKEN) / self.tokens_per_second
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self.responder(messages, self.json_mode)
+        time.sleep(self._first_token_delay() + self._output_seconds(text))
+        return _result(text)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self.responder(messages, self.json_mode)
+        await asyncio.sleep(self._first_token_delay() + self._output_seconds(text))
+        return _result(text)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self.responder(messages, self.json_mode)
+        fragments = _fragments(text)
+        time.sleep(self._first_token_delay())
+        for fragment in fragments:
+            time.sleep(self._output_seconds(text) / len(fragments))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self.responder(messages, self.json_mode)
+        fragments = _fragments(text)
+        await asyncio.sleep(self._first_token_delay())
+        for fragment in fragments:
+            await asyncio.sleep(self._output_seconds(text) / len(fragments))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=fragment))
+
+
+_GEMINI_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "items", "properties", "required")
+
+
+def response_json_schema(schema: Any) -> dict:
+    """
+    The JSON schema of `schema` (a Pydantic model or any type TypeAdapter
+    accepts) with `$ref`s inlined and only the keywords Gemini's response
+    schema supports.
+    """
+    full_schema = TypeAdapter(schema).json_schema()
+    definitions = full_schema.get("$defs", {})
+
+    def simplify(node: dict) -> dict:
+        if "$ref" in node:
+            node = {**definitions[node["$ref"].rsplit("/", 1)[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+        simplified = {}
+        for key in _GEMINI_SCHEMA_KEYS:
+            if key not in node:
+                continue
+            value = node[key]
+            if key == "properties":
+                value = {name: simplify(property_schema) for name, property_schema in value.items()}
+            elif key == "items":
+                value = simplify(value)
+            simplified[key] = value
+        return simplified
+
+    return simplify(full_schema)
+
+
+def model_identity() -> str:
+    """
+    The model name used in verdict-cache keys. Replayed and synthetic verdicts
+    are namespaced so they never share a persistent cache entry with real
+    Gemini output.
+    """
+    if settings.EVAL_LLM_PROVIDER in ("gemini", "record"):
+        return settings.EVAL_AI_MODEL_NAME
+    return f"{settings.EVAL_LLM_PROVIDER}/{settings.EVAL_AI_MODEL_NAME}"
+
+
+def create_chat_model(response_schema: Any = None) -> BaseChatModel:
+    """
+    Builds the chat model selected by EVAL_LLM_PROVIDER. With
+    `response_schema` (a Pydantic model or type), the model is asked for JSON
+    matching it. Raises ValueError on bad configuration.
+    """
+    provider = settings.EVAL_LLM_PROVIDER
+    response_format = "text" if response_schema is None else "json_schema"
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown EVAL_LLM_PROVIDER '{provider}'; expected one of {', '.join(PROVIDERS)}.")
+
+    if provider == "synthetic":
+        return SyntheticChatModel(
+            model=model_identity(),
+            latency_ms=settings.EVAL_LLM_SYNTHETIC_LATENCY_MS,
+            latency_sigma=settings.EVAL_LLM_SYNTHETIC_LATENCY_SIGMA,
+            tokens_per_second=settings.EVAL_LLM_SYNTHETIC_TOKENS_PER_SECOND,
+            json_mode=response_schema is not None,
+        )
+
+    store = ReplayStore(settings.EVAL_LLM_REPLAY_DIR)
+    if provider == "replay":
+        return ReplayChatModel(
+            model=settings.EVAL_AI_MODEL_NAME,
+            temperature=settings.EVAL_AI_TEMPERATURE,
+            store=store,
+            response_format=response_format,
+            simulate_latency=settings.EVAL_LLM_REPLAY_SIMULATE_LATENCY,
+        )
+
+    if not settings.EVAL_GOOGLE_API_KEY:
+        raise ValueError(f"EVAL_GOOGLE_API_KEY is not set (required by EVAL_LLM_PROVIDER={provider}).")
+
+    model_options = {}
+    if response_schema is not None:
+        model_options = {"response_mime_type": "application/json", "response_schema": response_json_schema(response_schema)}
+    gemini = ChatGoogleGenerativeAI(
+        model=settings.EVAL_AI_MODEL_NAME,
+        temperature=settings.EVAL_AI_TEMPERATURE,
+        google_api_key=settings.EVAL_GOOGLE_API_KEY,
+        max_retries=1,  # Retries are handled by llm_scheduler
+        **model_options
+    )
+    if provider == "gemini":
+        return gemini
+    return RecordingChatModel(
+        inner=gemini, model=settings.EVAL_AI_MODEL_NAME, temperature=settings.EVAL_AI_TEMPERATURE, store=store,
+        response_format=response_format
+    )
@@ -0,0 +1,154 @@
+"""
+Evaluation Pre-check Module
+
+A rule-based tier that runs before the evaluation LLM and rejects tickets
+that clearly fail, so they cost no LLM call:
+
+- Schema conformance against the local copy of the ticket schema
+  (`app.schemas.ticket.GeneratedTicketData`): missing keys, non-string
+  title or description, a priority other than High/Medium/Low, extra keys.
+  Extra keys and priority values whose words all appear in the original
+  prompt ("acceptance_criteria" for "a list of acceptance criteria") are left
+  to the LLM, since the prompt may have asked for them.
+- Heuristics: a title or description shorter than EVAL_PRECHECK_MIN_TITLE_CHARS
+  or EVAL_PRECHECK_MIN_DESCRIPTION_CHARS, and, only if
+  EVAL_PRECHECK_REQUIRE_ACCEPTANCE_CRITERIA is on (off by default), a
+  description without recognisable acceptance criteria when the prompt asks
+  for them and does not say to leave them out.
+
+Tickets that pass are not accepted locally: whether they capture the prompt's
+requirement is for the LLM to judge. The share of requests resolved locally
+is exported as `evaluation_precheck_resolved_share`.
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.metrics import precheck_outcomes
+from app.schemas.ticket import GeneratedTicketData
+
+logger = logging.getLogger(__name__)
+
+_ACCEPTANCE_CRITERIA_REQUESTED = re.compile(r"acceptance\s+criteria", re.IGNORECASE)
+# "Do not include acceptance criteria", "without acceptance criteria", "no acceptance criteria".
+_ACCEPTANCE_CRITERIA_DECLINED = re.compile(
+    r"\b(?:no|not|without|omit|skip|exclude|don'?t|never)\b(?:\W+\w+){0,3}?\W+acceptance\s+criteria",
+    re.IGNORECASE,
+)
+# "Acceptance criteria: ...", "AC: ...", "Given ... then ...", "Done when ...", or a list starting with "1." or a bullet.
+_ACCEPTANCE_CRITERIA_MARKERS = re.compile(
+    r"acceptance\s+criteria|\bAC\s*[:\-]|\bgiven\b[^.]*\bthen\b|\bdone\s+when\b|definition\s+of\s+done"
+    r"|(?:^|\s)1[.)]\s+\S|^\s*[-*•]\s+\S",
+    re.IGNORECASE | re.MULTILINE,
+)
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def _mentioned_in(value: Any, prompt: str) -> bool:
+    """Whether every word of `value` appears in the prompt, so "acceptance_criteria" matches "acceptance criteria"."""
+    if not isinstance(value, str):
+        return False
+    # Split snake_case, kebab-case and camelCase into words.
+    words = _WORDS.findall(re.sub(r"(?<=[a-z])(?=[A-Z])", " ", value).lower())
+    prompt_words = set(_WORDS.findall(prompt.lower()))
+    return bool(words) and all(word in prompt_words for word in words)
+
+
+def _schema_problems(generated_json: Dict[str, Any], original_system_prompt: str) -> List[str]:
+    try:
+        GeneratedTicketData.model_validate(generated_json)
+        return []
+    except ValidationError as e:
+        errors = e.errors()
+
+    problems = []
+    for error in errors:
+        field = ".".join(str(part) for part in error["loc"])
+        if error["type"] == "missing":
+            problems.append(f"The required key '{field}' is missing.")
+        elif error["type"] == "extra_forbidden":
+            if not _mentioned_in(field, original_system_prompt):
+                problems.append(f"The key '{field}' is not part of the ticket schema.")
+        elif error["type"] == "enum":
+            if not _mentioned_in(error["input"], original_system_prompt):
+                problems.append(f"The '{field}' value {error['input']!r} is not one of High, Medium or Low.")
+        elif error["type"] == "string_type":
+            problems.append(f"The '{field}' value must be a string, not {type(error['input']).__name__}.")
+        else:
+            problems.append(f"The '{field}' value is invalid: {error['msg']}.")
+    return problems
+
+
+def _heuristic_problems(generated_json: Dict[str, Any], original_system_prompt: str) -> List[str]:
+    problems = []
+    for field, minimum in (("title", settings.EVAL_PRECHECK_MIN_TITLE_CHARS),
+                           ("description", settings.EVAL_PRECHECK_MIN_DESCRIPTION_CHARS)):
+        value = generated_json.get(field)
+        if not isinstance(value, str):
+            continue
+        length = len(value.strip())
+        if length == 0:
+            problems.append(f"The '{field}' is empty.")
+        elif length < minimum:
+            problems.append(f"The '{field}' is too short ({length} characters; at least {minimum} expected).")
+
+    description = generated_json.get("description")
+    if (
+        settings.EVAL_PRECHECK_REQUIRE_ACCEPTANCE_CRITERIA
+        and isinstance(description, str) and description.strip()
+        and _ACCEPTANCE_CRITERIA_REQUESTED.search(original_system_prompt)
+        and not _ACCEPTANCE_CRITERIA_DECLINED.search(original_system_prompt)
+        and not _ACCEPTANCE_CRITERIA_MARKERS.search(description)
+    ):
+        problems.append("The prompt asks for acceptance criteria, but the 'description' contains none.")
+    return problems
+
+
+class EvaluationPrecheck:
+    """Rule-based rejection of clearly invalid tickets, with counters of what it resolved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.deferred = 0
+
+    def check(self, generated_json: Dict[str, Any], original_system_prompt: str) -> Optional[str]:
+        """
+        Returns the reasoning for a local "false" verdict if the ticket clearly
+        fails, or None if it has to be evaluated by the LLM.
+        """
+        problems = _schema_problems(generated_json, original_system_prompt)
+        if not problems:
+            problems = _heuristic_problems(generated_json, original_system_prompt)
+
+        outcome = "rejected" if problems else "deferred"
+        precheck_outcomes.inc(1, outcome)
+        with self._lock:
+            if problems:
+                self.rejected += 1
+            else:
+                self.deferred += 1
+        if not problems:
+            return None
+        reasoning = "Pre-check: " + " ".join(problems)
+        logger.info(f"Evaluation resolved without the LLM. {reasoning}")
+        return reasoning
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the pre-check counters."""
+        with self._lock:
+            checked = self.rejected + self.deferred
+            return {
+                "checked": checked,
+                "rejected": self.rejected,
+                "deferred": self.deferred,
+                "resolved_share": (self.rejected / checked) if checked else 0.0,
+            }
+
+
+evaluation_precheck = EvaluationPrecheck()
@@ -0,0 +1,236 @@
+"""
+Verdict Cache Module
+
+Caches evaluation verdicts so re-evaluating the same ticket (e.g. when a user
+re-opens it in the wizard) is answered without another LLM call.
+
+Keys combine the evaluation model settings, a SHA-256 of the original system
+prompt and the canonical form of the generated JSON (sorted keys, compact
+separators), so key order and whitespace differences still hit.
+
+Backends:
+- "memory": an in-process LRU with TTL.
+- "sqlite": an on-disk SQLite table with TTL and LRU eviction, which survives
+  restarts.
+- "none": caching disabled.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.llm_provider import model_identity
+
+logger = logging.getLogger(__name__)
+
+
+def canonicalize_json(generated_json: Dict[str, Any]) -> str:
+    """Serializes JSON with sorted keys and compact separators, so equal objects hash equally."""
+    return json.dumps(generated_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def make_verdict_cache_key(generated_json: Dict[str, Any], original_system_prompt: str) -> str:
+    """
+    Builds the cache key from the canonical JSON, a hash of the prompt and the
+    evaluation model settings (a different model may reach a different verdict).
+    """
+    prompt_hash = hashlib.sha256(original_system_prompt.encode("utf-8")).hexdigest()
+    digest = hashlib.sha256()
+    for part in (
+        model_identity(),
+        repr(float(settings.EVAL_AI_TEMPERATURE)),
+        prompt_hash,
+        canonicalize_json(generated_json),
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class MemoryVerdictCacheBackend:
+    """In-process LRU with TTL, bounded by entry count."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, payload = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return payload, created_at
+
+    def put(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteVerdictCacheBackend:
+    """Persistent verdict cache in a SQLite table with TTL and LRU eviction by entry count."""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdict_cache ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdict_cache_last_access ON verdict_cache (last_access)")
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM verdict_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM verdict_cache WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            self._conn.execute("UPDATE verdict_cache SET last_access = ? WHERE key = ?", (now, key))
+            return payload, created_at
+
+    def put(self, key: str, payload: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdict_cache (key, payload, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            expired = self._conn.execute(
+                "DELETE FROM verdict_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM verdict_cache WHERE key IN ("
+                " SELECT key FROM verdict_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self.evictions += max(expired, 0) + max(overflow, 0)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdict_cache").fetchone()[0]
+
+
+class VerdictCache:
+    """
+    Caches (is_valid, reasoning) verdicts for previously evaluated tickets.
+
+    Lookups return the verdict and its age in seconds, which the endpoint
+    sends as the `Age` header on cache hits.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    async def get(self, key: str) -> Optional[Tuple[bool, Optional[str], float]]:
+        if self.backend is None:
+            return None
+        try:
+            entry = await run_in_threadpool(self.backend.get, key)
+        except Exception as e:
+            logger.warning(f"Verdict cache lookup failed; treating as a miss: {e}")
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        payload, created_at = entry
+        data = json.loads(payload)
+        return data["is_valid"], data["reasoning"], max(0.0, time.time() - created_at)
+
+    async def put(self, key: str, is_valid: bool, reasoning: Optional[str]) -> None:
+        if self.backend is None:
+            return
+        try:
+            await run_in_threadpool(
+                self.backend.put, key, json.dumps({"is_valid": is_valid, "reasoning": reasoning})
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store verdict in cache: {e}")
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> dict:
+        entries = self.backend.size() if self.backend is not None else 0
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": settings.EVAL_CACHE_BACKEND,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": getattr(self.backend, "evictions", 0),
+                "entries": entries,
+            }
+
+
+def _build_backend():
+    backend = settings.EVAL_CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryVerdictCacheBackend(
+            max_entries=settings.EVAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EVAL_CACHE_TTL_SECONDS,
+        )
+    if backend == "sqlite":
+        return SQLiteVerdictCacheBackend(
+            path=settings.EVAL_CACHE_SQLITE_PATH,
+            max_entries=settings.EVAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EVAL_CACHE_TTL_SECONDS,
+        )
+    if backend != "none":
+        logger.warning(f"Unknown EVAL_CACHE_BACKEND '{settings.EVAL_CACHE_BACKEND}'; verdict caching disabled.")
+    return None
+
+
+verdict_cache = VerdictCache(_build_backend())